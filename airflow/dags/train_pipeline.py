@@ -2,27 +2,97 @@
 MLOps Training Pipeline DAG
 
 This DAG orchestrates the machine learning training pipeline:
-1. Load data
-2. Train model
-3. Save trained model
-4. Log results
+0. Choose incremental or full retraining
+1. Load the base dataset and every data partition
+2. Sweep model candidates in parallel and pick the best
+   (incremental runs replace 1-2 with a warm-start update that folds only
+   new data partitions into the saved sufficient statistics)
+3. Save the chosen model with its feature schema and training feature
+   summary, which the API validates requests and scores drift against
+   (full runs also save the sufficient statistics, so the next run can
+   warm-start)
+4. Log the saved model's results
+
+Both branches split each partition into train and test rows the same way
+(seeded from its content hash, see train.accumulate_partition), so they
+train and score on the same rows.
 """
 
 from datetime import datetime, timedelta
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import BranchPythonOperator, PythonOperator
 from airflow.utils.dates import days_ago
+import json
+import numpy as np
 import pandas as pd
 import pickle
 import os
+import sys
 import logging
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+
+# Project source (mounted by docker-compose) for shared helpers
+sys.path.insert(0, '/opt/airflow/src')
+from artifact_store import ArtifactStore  # noqa: E402
+from datagen import generate_dataset  # noqa: E402
+from feature_schema import save_schema  # noqa: E402
+from feature_stats import FeatureSummary, load_summary, save_summary  # noqa: E402
+from model_artifact import save_model_artifact  # noqa: E402
+from model_format import save_compact_model  # noqa: E402
+from sweep import expand_candidates, run_sweep  # noqa: E402
+from train import list_partitions, load_partitions, pending_partitions, save_statistics  # noqa: E402
+from train import schema_from_statistics, split_statistics, train_incremental  # noqa: E402
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Datasets and models are handed between tasks through this store; XCom only
+# carries small references to them
+ARTIFACT_ROOT = '/opt/airflow/artifacts'
+store = ArtifactStore(ARTIFACT_ROOT)
+
+
+DATA_PATH = '/opt/airflow/data/dataset.csv'
+PARTITIONS_DIR = '/opt/airflow/data/partitions'
+MODEL_PATH = '/opt/airflow/models/model.pkl'
+STATS_PATH = '/opt/airflow/models/model_stats.npz'
+# Serving contract read by the API next to the model (as written by src/train.py)
+SCHEMA_PATH = '/opt/airflow/models/feature_schema.json'
+SUMMARY_PATH = '/opt/airflow/models/feature_summary.json'
+# Which candidate produced the saved model, written by save_model
+MODEL_INFO_PATH = '/opt/airflow/models/model_info.json'
+
+# Rows generated when no dataset exists yet
+SAMPLE_DATASET_ROWS = int(os.environ.get('SAMPLE_DATASET_ROWS', '1000'))
+
+# 'incremental' folds only new partitions into the saved statistics and
+# re-solves the linear regression; 'full' reloads everything and runs the
+# candidate sweep; 'auto' goes incremental only when there are new
+# partitions and the saved model is itself a plain least-squares solve, so
+# a sweep winner (e.g. Ridge or a polynomial model) is never replaced by
+# one. Override per run with dag_run.conf {"mode": "full"}.
+TRAINING_MODE = os.environ.get('TRAINING_MODE', 'auto')
+
+# Candidates an incremental update can stand in for
+LINEAR_SOLVE_CANDIDATES = ('linear', 'linear (incremental)')
+
+# Candidate grid for the sweep; override per run with dag_run.conf {"sweep_grid": [...]}
+SWEEP_GRID = None  # None = sweep.DEFAULT_GRID
+SWEEP_N_JOBS = int(os.environ.get('SWEEP_N_JOBS', '0')) or None  # None = all cores
+
+
+def load_dataset(dataset_ref):
+    """Open a stored dataset as a DataFrame over its memory-mapped array."""
+    return pd.DataFrame(store.get_array(dataset_ref), columns=dataset_ref['meta']['columns'], copy=False)
+
+
+def pull_first(context, key, task_ids):
+    """Pull an XCom value from whichever of `task_ids` ran on this branch."""
+    for task_id in task_ids:
+        value = context['ti'].xcom_pull(key=key, task_ids=task_id)
+        if value is not None:
+            return value
+    return None
+
 # Default arguments for the DAG
 default_args = {
     'owner': 'mlops-team',
@@ -45,142 +115,256 @@ dag = DAG(
 )
 
 
+def saved_candidate():
+    """Name of the candidate behind the saved model, or None if unknown."""
+    try:
+        with open(MODEL_INFO_PATH) as f:
+            return json.load(f).get('candidate')
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def incremental_is_safe():
+    """True when a warm-start update would only add new data to a linear-solve model."""
+    if not (os.path.exists(DATA_PATH) and os.path.exists(STATS_PATH)):
+        return False
+    candidate = saved_candidate()
+    if candidate not in LINEAR_SOLVE_CANDIDATES:
+        logger.info(f"Saved model is {candidate!r}, not a linear solve; running the full sweep")
+        return False
+    pending = pending_partitions(list_partitions(DATA_PATH, PARTITIONS_DIR), STATS_PATH)
+    if not pending:
+        logger.info("No new partitions since the statistics were saved")
+        return False
+    logger.info(f"{len(pending)} partition(s) to fold: {[os.path.basename(p) for p in pending]}")
+    return True
+
+
+def choose_training_mode(**context):
+    """
+    Task 0: Branch to an incremental warm-start or a full retrain.
+    
+    Returns:
+        str: task_id of the first task on the chosen branch
+    """
+    dag_run = context.get('dag_run')
+    mode = (dag_run.conf or {}).get('mode', TRAINING_MODE) if dag_run else TRAINING_MODE
+    if mode == 'auto':
+        mode = 'incremental' if incremental_is_safe() else 'full'
+    if mode == 'incremental' and not os.path.exists(DATA_PATH):
+        logger.info(f"{DATA_PATH} does not exist yet, running a full retrain to create it")
+        mode = 'full'
+    logger.info(f"Training mode: {mode}")
+    return 'incremental_update' if mode == 'incremental' else 'load_data'
+
+
+def incremental_update(**context):
+    """
+    Task 1b: Fold new data partitions into the saved statistics and re-solve.
+    
+    Only partitions not recorded in the statistics file are read, so the cost
+    is proportional to the new data. The coefficients equal a full refit.
+    
+    Returns:
+        dict: Model metrics and information
+    """
+    logger.info("Starting incremental update task")
+    
+    paths = list_partitions(DATA_PATH, PARTITIONS_DIR)
+    # The saved summary covers the same partitions as the saved statistics
+    if os.path.exists(STATS_PATH) and os.path.exists(SUMMARY_PATH):
+        summary = load_summary(SUMMARY_PATH)
+    else:
+        if os.path.exists(STATS_PATH):
+            logger.warning(f"{SUMMARY_PATH} not found, feature summary covers new partitions only")
+        summary = FeatureSummary()
+    model, train_stats, test_stats, metrics, new_paths = train_incremental(paths, STATS_PATH, summary=summary)
+    mse, r2 = metrics if metrics else (float('nan'), float('nan'))
+    
+    logger.info(f"Folded {len(new_paths)} new partition(s): {[os.path.basename(p) for p in new_paths]}")
+    logger.info(f"Training rows: {train_stats.n}, test rows: {test_stats.n}")
+    logger.info(f"Model coefficients: {model.coef_}")
+    logger.info(f"Model intercept: {model.intercept_}")
+    logger.info(f"  MSE: {mse:.4f}")
+    logger.info(f"  R² Score: {r2:.4f}")
+    
+    feature_names = list(model.feature_names_in_)
+    model_ref = store.put_object(model, meta={'feature_names': feature_names, 'candidate': 'linear (incremental)',
+                                              'mse': mse, 'r2': r2})
+    summary.feature_names = feature_names
+    contract_ref = store.put_object({'schema': schema_from_statistics(train_stats, feature_names),
+                                     'summary': summary.to_dict()})
+    context['ti'].xcom_push(key='model_ref', value=model_ref)
+    context['ti'].xcom_push(key='contract_ref', value=contract_ref)
+    context['ti'].xcom_push(key='data_shape', value=(train_stats.n + test_stats.n, len(feature_names) + 1))
+    
+    return {
+        'model_path': MODEL_PATH,
+        'mse': mse,
+        'r2_score': r2,
+        'new_partitions': len(new_paths),
+    }
+
+
 def load_data(**context):
     """
-    Task 1: Load dataset from CSV file.
+    Task 1: Load the base dataset and every partition, with their test rows.
     
     Returns:
-        str: Path to the dataset file
+        str: Path to the base dataset file
     """
     logger.info("Starting data loading task")
     
-    data_path = '/opt/airflow/data/dataset.csv'
+    data_path = DATA_PATH
     
     # Check if dataset exists, if not create it
     if not os.path.exists(data_path):
         logger.warning(f"Dataset not found at {data_path}, creating sample dataset...")
         os.makedirs(os.path.dirname(data_path), exist_ok=True)
         
-        # Create sample dataset
-        import numpy as np
-        np.random.seed(42)
-        n_samples = 1000
-        X = np.random.randn(n_samples, 5)
-        y = X[:, 0] * 2 + X[:, 1] * 1.5 - X[:, 2] * 0.5 + np.random.randn(n_samples) * 0.1
-        
-        df = pd.DataFrame(X, columns=[f'feature_{i+1}' for i in range(5)])
-        df['target'] = y
-        df.to_csv(data_path, index=False)
+        # Create sample dataset (size configurable for scale tests)
+        n_samples = SAMPLE_DATASET_ROWS
+        generate_dataset(data_path, rows=n_samples, n_features=5, seed=42)
         logger.info(f"Created dataset with {n_samples} samples")
     
-    # Load and validate dataset
-    df = pd.read_csv(data_path)
-    logger.info(f"Dataset loaded successfully: {df.shape[0]} rows, {df.shape[1]} columns")
+    # Parse and validate every partition (each only parses when its binary
+    # cache is stale) and draw the same test rows an incremental run would
+    paths = list_partitions(data_path, PARTITIONS_DIR)
+    values, columns, is_test, partitions = load_partitions(paths)
+    df = pd.DataFrame(values, columns=columns, copy=False)
+    logger.info(f"Dataset loaded successfully from {len(paths)} file(s): {df.shape[0]} rows, {df.shape[1]} columns")
     logger.info(f"Dataset columns: {list(df.columns)}")
+    logger.info(f"Training rows: {int((~is_test).sum())}, test rows: {int(is_test.sum())}")
     
     # Log dataset statistics
     logger.info(f"Dataset statistics:\n{df.describe()}")
     
+    # Hand the binary dataset and its test mask to the next tasks by
+    # reference; a lone base dataset is linked from its cache, not copied
+    meta = {'columns': columns, 'source': data_path, 'partitions': partitions}
+    if len(paths) == 1:
+        dataset_ref = store.put_file(values.filename, meta=meta)
+    else:
+        dataset_ref = store.put_array(values, meta=meta)
+    split_ref = store.put_array(is_test, meta={'test_rows': int(is_test.sum())})
+    logger.info(f"Dataset stored as artifact {dataset_ref['sha256'][:12]}")
+    
     # Push dataset info to XCom for next tasks
     context['ti'].xcom_push(key='data_path', value=data_path)
+    context['ti'].xcom_push(key='dataset_ref', value=dataset_ref)
+    context['ti'].xcom_push(key='split_ref', value=split_ref)
     context['ti'].xcom_push(key='data_shape', value=df.shape)
     
     return data_path
 
 
-def train_model(**context):
+def sweep_candidates(**context):
     """
-    Task 2: Train the machine learning model.
+    Task 2: Fit a grid of candidate models in parallel and keep the best.
+    
+    Workers memory-map the stored dataset read-only instead of receiving
+    copies. The best candidate is chosen by held-out MSE on the test rows
+    drawn by load_data; plain least squares ('linear') is one of the
+    candidates.
     
     Returns:
-        dict: Model metrics and information
+        dict: Best candidate name and metrics
     """
-    logger.info("Starting model training task")
-    
-    # Get data path from previous task
-    data_path = context['ti'].xcom_pull(key='data_path', task_ids='load_data')
-    
-    # Load dataset
-    df = pd.read_csv(data_path)
-    logger.info(f"Loaded dataset: {df.shape}")
-    
-    # Separate features and target
-    X = df.drop('target', axis=1)
-    y = df['target']
-    
-    logger.info(f"Features shape: {X.shape}, Target shape: {y.shape}")
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-    
-    logger.info(f"Training set: {len(X_train)} samples")
-    logger.info(f"Test set: {len(X_test)} samples")
-    
-    # Train model
-    logger.info("Training Linear Regression model...")
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    
-    logger.info("Model training completed")
-    logger.info(f"Model coefficients: {model.coef_}")
-    logger.info(f"Model intercept: {model.intercept_}")
-    
-    # Evaluate model
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-    
-    logger.info(f"Model Performance:")
-    logger.info(f"  MSE: {mse:.4f}")
-    logger.info(f"  R² Score: {r2:.4f}")
-    
-    # Push model and metrics to XCom
-    model_path = '/opt/airflow/models/model.pkl'
-    context['ti'].xcom_push(key='model_path', value=model_path)
-    context['ti'].xcom_push(key='mse', value=mse)
-    context['ti'].xcom_push(key='r2_score', value=r2)
-    context['ti'].xcom_push(key='model', value=model)  # For saving in next task
-    
-    return {
-        'model_path': model_path,
-        'mse': mse,
-        'r2_score': r2,
-        'train_size': len(X_train),
-        'test_size': len(X_test),
-    }
+    logger.info("Starting model sweep task")
+    
+    dataset_ref = context['ti'].xcom_pull(key='dataset_ref', task_ids='load_data')
+    split_ref = context['ti'].xcom_pull(key='split_ref', task_ids='load_data')
+    columns = dataset_ref['meta']['columns']
+    dag_run = context.get('dag_run')
+    grid = (dag_run.conf or {}).get('sweep_grid', SWEEP_GRID) if dag_run else SWEEP_GRID
+    candidates = expand_candidates(grid)
+    
+    start = datetime.now()
+    results = run_sweep(store.path(dataset_ref), columns.index('target'), candidates, n_jobs=SWEEP_N_JOBS,
+                        test_mask_path=store.path(split_ref))
+    elapsed = (datetime.now() - start).total_seconds()
+    
+    logger.info(f"Swept {len(results)} candidates in {elapsed:.2f}s")
+    for r in results:
+        logger.info(f"  {r['name']:<40} MSE={r['mse']:.6f} R²={r['r2']:.6f} fit={r['fit_seconds']:.3f}s")
+    
+    best = results[0]
+    feature_names = [c for c in columns if c != 'target']
+    model_ref = store.put_object(best['model'], meta={'feature_names': feature_names, 'candidate': best['name'],
+                                                      'mse': best['mse'], 'r2': best['r2']})
+    leaderboard = [{'name': r['name'], 'mse': r['mse'], 'r2': r['r2']} for r in results]
+    
+    logger.info(f"Best candidate: {best['name']} (MSE {best['mse']:.6f}, R² {best['r2']:.6f})")
+    context['ti'].xcom_push(key='model_ref', value=model_ref)
+    context['ti'].xcom_push(key='best_candidate', value=leaderboard[0])
+    context['ti'].xcom_push(key='leaderboard', value=leaderboard)
+    
+    return leaderboard[0]
+
+
+def full_run_statistics(dataset_ref, split_ref):
+    """
+    Train/test statistics, feature schema and training feature summary of a
+    full run, all over the training rows of load_data's split.
+    """
+    values, is_test = store.get_array(dataset_ref), store.get_array(split_ref)
+    columns = dataset_ref['meta']['columns']
+    target_index = columns.index('target')
+    feature_names = [c for c in columns if c != 'target']
+    train_stats, test_stats = split_statistics(values, target_index, is_test)
+    train_rows = np.flatnonzero(~is_test)
+    feature_index = [i for i in range(len(columns)) if i != target_index]
+    summary = FeatureSummary(feature_names).update(values[np.ix_(train_rows, feature_index)])
+    return train_stats, test_stats, schema_from_statistics(train_stats, feature_names), summary
 
 
 def save_model(**context):
     """
-    Task 3: Save the trained model to disk.
+    Task 3: Save the best model from the sweep (or the incremental update) to disk.
     """
     logger.info("Starting model saving task")
     
-    # Get model path and model from previous task
-    model_path = context['ti'].xcom_pull(key='model_path', task_ids='train_model')
-    
-    # Get model object (in production, you might want to serialize differently)
-    # For now, we'll retrain or load from XCom
-    # Note: XCom has size limits, so we'll retrain here or use a better approach
-    data_path = context['ti'].xcom_pull(key='data_path', task_ids='load_data')
-    df = pd.read_csv(data_path)
-    X = df.drop('target', axis=1)
-    y = df['target']
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
-    
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+    # Get the fitted model from the artifact store
+    model_path = MODEL_PATH
+    model_ref = pull_first(context, 'model_ref', ['sweep_candidates', 'incremental_update'])
+    model = store.get_object(model_ref)
+    logger.info(f"Saving candidate {model_ref['meta']['candidate']}")
     
     # Create models directory if it doesn't exist
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     
-    # Save model
-    with open(model_path, 'wb') as f:
+    # The feature schema and summary of the rows the model was trained on;
+    # written first, so an API reloading the new model also sees them
+    dataset_ref = context['ti'].xcom_pull(key='dataset_ref', task_ids='load_data')
+    if dataset_ref is not None:
+        split_ref = context['ti'].xcom_pull(key='split_ref', task_ids='load_data')
+        train_stats, test_stats, schema, summary = full_run_statistics(dataset_ref, split_ref)
+    else:
+        contract = store.get_object(context['ti'].xcom_pull(key='contract_ref', task_ids='incremental_update'))
+        schema, summary = contract['schema'], FeatureSummary.from_dict(contract['summary'])
+    save_schema(schema, SCHEMA_PATH)
+    save_summary(summary, SUMMARY_PATH)
+    logger.info(f"Feature schema saved to {SCHEMA_PATH}, feature summary to {SUMMARY_PATH}")
+    
+    # Save model (write then rename, so the API never reloads a partial file)
+    tmp_path = f'{model_path}.tmp'
+    with open(tmp_path, 'wb') as f:
         pickle.dump(model, f)
+    os.replace(tmp_path, model_path)
+    
+    # NumPy-only artifacts preferred by the API (memory-mappable .bin, then
+    # .npz); non-linear winners (polynomial features) are served from the
+    # pickle, so drop any stale exports
+    exports = [(save_model_artifact, os.path.splitext(model_path)[0] + '.bin'),
+               (save_compact_model, os.path.splitext(model_path)[0] + '.npz')]
+    try:
+        for export, export_path in exports:
+            export(model, export_path, feature_names=model_ref['meta']['feature_names'])
+    except ValueError as e:
+        logger.info(f"No NumPy-only export ({e}); API will serve {model_path}")
+        for _, export_path in exports:
+            if os.path.exists(export_path):
+                os.remove(export_path)
     
     logger.info(f"Model saved successfully to {model_path}")
     
@@ -190,6 +374,19 @@ def save_model(**context):
         logger.info(f"Model file size: {file_size} bytes")
         context['ti'].xcom_push(key='model_saved', value=True)
         context['ti'].xcom_push(key='model_file_size', value=file_size)
+        # Report the metrics of the candidate actually saved
+        context['ti'].xcom_push(key='model_path', value=model_path)
+        context['ti'].xcom_push(key='candidate', value=model_ref['meta']['candidate'])
+        context['ti'].xcom_push(key='mse', value=model_ref['meta']['mse'])
+        context['ti'].xcom_push(key='r2_score', value=model_ref['meta']['r2'])
+        with open(MODEL_INFO_PATH, 'w') as f:
+            json.dump({'candidate': model_ref['meta']['candidate'], 'mse': model_ref['meta']['mse'],
+                       'r2': model_ref['meta']['r2'], 'saved_at': datetime.now().isoformat()}, f)
+        # The incremental branch already saved its statistics
+        if dataset_ref is not None:
+            partitions = dataset_ref['meta']['partitions']
+            save_statistics(train_stats, test_stats, summary.feature_names, partitions, STATS_PATH)
+            logger.info(f"Sufficient statistics of {len(partitions)} file(s) saved to {STATS_PATH}")
     else:
         raise FileNotFoundError(f"Model file was not created at {model_path}")
     
@@ -198,26 +395,32 @@ def save_model(**context):
 
 def log_results(**context):
     """
-    Task 4: Log training results and metrics.
+    Task 4: Log training results and the saved model's metrics.
     """
     logger.info("Starting results logging task")
     
     # Get all metrics from previous tasks
-    data_shape = context['ti'].xcom_pull(key='data_shape', task_ids='load_data')
-    mse = context['ti'].xcom_pull(key='mse', task_ids='train_model')
-    r2_score = context['ti'].xcom_pull(key='r2_score', task_ids='train_model')
-    model_path = context['ti'].xcom_pull(key='model_path', task_ids='train_model')
+    data_shape = pull_first(context, 'data_shape', ['load_data', 'incremental_update'])
+    candidate = context['ti'].xcom_pull(key='candidate', task_ids='save_model')
+    mse = context['ti'].xcom_pull(key='mse', task_ids='save_model')
+    r2_score = context['ti'].xcom_pull(key='r2_score', task_ids='save_model')
+    model_path = context['ti'].xcom_pull(key='model_path', task_ids='save_model')
     model_saved = context['ti'].xcom_pull(key='model_saved', task_ids='save_model')
     model_file_size = context['ti'].xcom_pull(key='model_file_size', task_ids='save_model')
+    best_candidate = context['ti'].xcom_pull(key='best_candidate', task_ids='sweep_candidates')
     
     # Log comprehensive results
     logger.info("=" * 50)
     logger.info("TRAINING PIPELINE RESULTS")
     logger.info("=" * 50)
     logger.info(f"Dataset Shape: {data_shape}")
+    logger.info(f"Saved Model: {candidate}")
     logger.info(f"Model Performance Metrics:")
     logger.info(f"  Mean Squared Error (MSE): {mse:.6f}")
     logger.info(f"  R² Score: {r2_score:.6f}")
+    if best_candidate:
+        logger.info(f"Best Sweep Candidate: {best_candidate['name']}")
+        logger.info(f"  MSE: {best_candidate['mse']:.6f}, R² Score: {best_candidate['r2']:.6f}")
     logger.info(f"Model Location: {model_path}")
     logger.info(f"Model Saved: {model_saved}")
     logger.info(f"Model File Size: {model_file_size} bytes")
@@ -227,16 +430,17 @@ def log_results(**context):
     summary = {
         'timestamp': datetime.now().isoformat(),
         'data_shape': data_shape,
+        'candidate': candidate,
         'mse': mse,
         'r2_score': r2_score,
         'model_path': model_path,
         'model_saved': model_saved,
         'model_file_size': model_file_size,
+        'best_candidate': best_candidate,
     }
     
     # Save summary to file
     summary_path = '/opt/airflow/logs/training_summary.json'
-    import json
     with open(summary_path, 'w') as f:
         json.dump(summary, f, indent=2)
     
@@ -247,21 +451,34 @@ def log_results(**context):
 
 
 # Define tasks
+task_choose_training_mode = BranchPythonOperator(
+    task_id='choose_training_mode',
+    python_callable=choose_training_mode,
+    dag=dag,
+)
+
+task_incremental_update = PythonOperator(
+    task_id='incremental_update',
+    python_callable=incremental_update,
+    dag=dag,
+)
+
 task_load_data = PythonOperator(
     task_id='load_data',
     python_callable=load_data,
     dag=dag,
 )
 
-task_train_model = PythonOperator(
-    task_id='train_model',
-    python_callable=train_model,
+task_sweep_candidates = PythonOperator(
+    task_id='sweep_candidates',
+    python_callable=sweep_candidates,
     dag=dag,
 )
 
 task_save_model = PythonOperator(
     task_id='save_model',
     python_callable=save_model,
+    trigger_rule='none_failed_min_one_success',  # runs after whichever branch ran
     dag=dag,
 )
 
@@ -272,5 +489,8 @@ task_log_results = PythonOperator(
 )
 
 # Define task dependencies
-task_load_data >> task_train_model >> task_save_model >> task_log_results
+task_choose_training_mode >> [task_load_data, task_incremental_update]
+task_load_data >> task_sweep_candidates >> task_save_model
+task_incremental_update >> task_save_model
+task_save_model >> task_log_results
 
@@ -2,120 +2,580 @@
 """
 MLOps API - Flask application for model inference
 """
-from flask import Flask, request, jsonify
-import pickle
+from flask import Flask, Response, request, jsonify, stream_with_context
+import json
 import os
+import sys
+import time
+from pathlib import Path
 import numpy as np
-import pandas as pd
+
+# Shared NumPy-only helpers live in src/ (copied next to app.py in the image)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from predictor import LinearPredictor, load_pickled_model  # noqa: E402
+from batching import MicroBatcher  # noqa: E402
+import payloads  # noqa: E402
+import procinfo  # noqa: E402
+from reload import ModelWatcher  # noqa: E402
+from cache import PredictionCache  # noqa: E402
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ServiceMetrics  # noqa: E402
+from validation import FeatureValidator, InvalidInput, error_body  # noqa: E402
+from registry import ModelNotFound, ModelRegistry  # noqa: E402
+from shadow import ShadowScorer  # noqa: E402
+from drift import DriftMonitor  # noqa: E402
+from model_artifact import ArtifactError, detect_format  # noqa: E402
+from feature_schema import feature_names, load_schema  # noqa: E402
+from feature_stats import load_summary  # noqa: E402
 
 app = Flask(__name__)
 
 # Load model
 MODEL_PATH = 'models/model.pkl'
+COMPACT_MODEL_PATH = 'models/model.npz'
+# Memory-mappable artifact, preferred over the two above when present
+ARTIFACT_PATH = 'models/model.bin'
+# Feature names, order and allowed ranges written by src/train.py
+SCHEMA_PATH = 'models/feature_schema.json'
+# Training feature distributions, the reference for drift monitoring
+FEATURE_SUMMARY_PATH = 'models/feature_summary.json'
 model = None
 
+# Unpickling runs arbitrary code, so pickled models (MODEL_PATH, registry
+# model.pkl files) are only served when explicitly allowed
+MODEL_ALLOW_PICKLE = os.environ.get('MODEL_ALLOW_PICKLE', '0') == '1'
+
+# Named, versioned models served on demand alongside the default model:
+# <MODEL_REGISTRY_DIR>/<name>/<version>/model.bin (see api/registry.py)
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'models/registry')
+MODEL_REGISTRY_MEMORY_MB = float(os.environ.get('MODEL_REGISTRY_MEMORY_MB', '512'))
+# Request headers selecting a registry model (the URL form is /models/<name>[/versions/<version>]/predict)
+MODEL_NAME_HEADER = 'X-Model-Name'
+MODEL_VERSION_HEADER = 'X-Model-Version'
+
+# Seconds between checks for a new model artifact (0 disables hot reload)
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', '5'))
+watcher = None
+
+# Startup figures for this process, filled in by gunicorn.conf.py hooks
+worker_info = {'startup_seconds': None}
+
+# Opt-in coalescing of concurrent /predict calls
+MICROBATCH_ENABLED = os.environ.get('MICROBATCH_ENABLED', '0') == '1'
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get('MICROBATCH_MAX_BATCH_SIZE', '64'))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get('MICROBATCH_MAX_WAIT_MS', '2'))
+
+
+def _predict_rows(features_array, current=None):
+    """Score a batch of rows with `current`, the model the requests resolved (default: the loaded one)."""
+    return (current if current is not None else model).predict(features_array)
+
+
+# Prediction cache: entries (0 disables), entry lifetime, and the largest
+# batch worth looking up row by row (bigger batches are cheaper to rescore)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '10000'))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '300'))
+PREDICTION_CACHE_MAX_BATCH_ROWS = int(os.environ.get('PREDICTION_CACHE_MAX_BATCH_ROWS', '1000'))
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+
+# Request counts and latency histograms served at /metrics
+metrics = ServiceMetrics()
+
+# Rows scored per chunk by the streaming endpoint
+STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', '1000'))
+
+# Shadow scoring: a candidate model (e.g. a newly trained artifact awaiting
+# promotion) scores a copy of live traffic in the background; off when unset
+SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH', '')
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', '1000'))
+SHADOW_MAX_BATCH_ROWS = int(os.environ.get('SHADOW_MAX_BATCH_ROWS', '4096'))
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '1.0'))
+shadow = None
+
+# Drift monitoring of the default model's inputs (0 disables): live rows kept
+# per window, rows buffered between summary updates, and the rows sampled
+# from any one request
+DRIFT_WINDOW_ROWS = int(os.environ.get('DRIFT_WINDOW_ROWS', '100000'))
+DRIFT_BUFFER_ROWS = int(os.environ.get('DRIFT_BUFFER_ROWS', '1024'))
+DRIFT_MAX_ROWS_PER_REQUEST = int(os.environ.get('DRIFT_MAX_ROWS_PER_REQUEST', '1024'))
+DRIFT_MIN_ROWS = int(os.environ.get('DRIFT_MIN_ROWS', '100'))
+drift = (DriftMonitor(DRIFT_WINDOW_ROWS, DRIFT_BUFFER_ROWS, DRIFT_MAX_ROWS_PER_REQUEST, DRIFT_MIN_ROWS)
+         if os.environ.get('DRIFT_MONITOR_ENABLED', '1') == '1' else None)
+
+batcher = MicroBatcher(_predict_rows, MICROBATCH_MAX_BATCH_SIZE, MICROBATCH_MAX_WAIT_MS) if MICROBATCH_ENABLED else None
+
+def model_source():
+    """Path of the artifact to serve, preferring NumPy-only artifacts over the pickle."""
+    for path in (ARTIFACT_PATH, COMPACT_MODEL_PATH):
+        if os.path.exists(path):
+            return path
+    return MODEL_PATH
+
+def read_model():
+    """Load the trained model from disk, or return None if there is none."""
+    path = model_source()
+    if not os.path.exists(path):
+        return None
+    loaded = load_model_file(path, SCHEMA_PATH)
+    loaded.feature_summary = load_reference_summary(loaded)
+    return loaded
+
+def load_model_file(path, schema_path):
+    """Load one model artifact (any format) with the validator from its schema."""
+    start = time.perf_counter()
+    if detect_format(path) == 'pickle':
+        if not MODEL_ALLOW_PICKLE:
+            raise ArtifactError(f'{path} is a pickle; set MODEL_ALLOW_PICKLE=1 to serve trusted pickles')
+        loaded = load_pickled_model(path, allow_pickle=True)
+    else:
+        loaded = LinearPredictor.from_file(path)
+    loaded.validator = load_validator(loaded, schema_path)
+    metrics.observe_model_load(time.perf_counter() - start)
+    return loaded
+
+def load_validator(current, schema_path=None):
+    """Build the input validator for a model from its saved feature schema."""
+    schema_path = schema_path or SCHEMA_PATH
+    if os.path.exists(schema_path):
+        schema = load_schema(schema_path)
+        if feature_names(schema) == list(current.feature_names):
+            return FeatureValidator(schema)
+        print(f"Warning: {schema_path} does not match the model's features, checking names only")
+    return FeatureValidator.for_names(current.feature_names)
+
+def load_reference_summary(current, summary_path=None):
+    """The training feature summary for a model, or None if missing or for other features."""
+    summary_path = summary_path or FEATURE_SUMMARY_PATH
+    if not os.path.exists(summary_path):
+        return None
+    summary = load_summary(summary_path)
+    if summary.feature_names != list(current.feature_names):
+        print(f"Warning: {summary_path} does not match the model's features, drift scores disabled")
+        return None
+    return summary
+
+def reference_summary():
+    return getattr(model, 'feature_summary', None) if model is not None else None
+
+def metrics_text():
+    """The /metrics body: service metrics plus drift gauges computed at scrape time."""
+    return metrics.render(drift.metric_lines(reference_summary()) if drift is not None else ())
+
+def validator_for(current):
+    """The validator attached to a model, built from its feature names if it has none."""
+    validator = getattr(current, 'validator', None)
+    if validator is None:
+        validator = current.validator = FeatureValidator.for_names(current.feature_names)
+    return validator
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR, load_model_file, MODEL_REGISTRY_MEMORY_MB * 2**20,
+                         allow_pickle=MODEL_ALLOW_PICKLE)
+
+def resolve_model(name=None, version=None, headers=None):
+    """
+    The model a request targets: a registry model when one is named in the
+    URL or the X-Model-Name / X-Model-Version headers, else the default model.
+    Raises ModelNotFound (404).
+    """
+    if headers is not None:
+        name = name or headers.get(MODEL_NAME_HEADER)
+        version = version or headers.get(MODEL_VERSION_HEADER)
+    if not name:
+        return model
+    return registry.get(name, version)
+
 def load_model():
-    """Load the trained model."""
+    """Load the trained model (and the shadow candidate, if configured)."""
     global model
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-        print(f"Model loaded from {MODEL_PATH}")
+    try:
+        loaded = read_model()
+    except ArtifactError as e:
+        print(f"Warning: {e}")
     else:
-        print(f"Warning: Model file not found at {MODEL_PATH}")
+        if loaded is not None:
+            model = loaded
+            print(f"Model {model.version} loaded from {model_source()}")
+        else:
+            print(f"Warning: Model file not found at {MODEL_PATH}")
+    if SHADOW_MODEL_PATH:
+        load_shadow_model(SHADOW_MODEL_PATH)
+
+def load_shadow_model(path):
+    """Start shadow scoring with the candidate model at `path`."""
+    global shadow
+    if not os.path.exists(path):
+        print(f"Warning: shadow model not found at {path}, shadow scoring disabled")
+        return None
+    candidate = load_model_file(path, os.path.join(os.path.dirname(path), 'feature_schema.json'))
+    if model is not None and candidate.n_features != model.n_features:
+        print(f"Warning: shadow model expects {candidate.n_features} features, "
+              f"primary expects {model.n_features}; shadow scoring disabled")
+        return None
+    shadow = ShadowScorer(candidate, SHADOW_QUEUE_SIZE, SHADOW_MAX_BATCH_ROWS, SHADOW_SAMPLE_RATE, metrics)
+    print(f"Shadow scoring with model {candidate.version} from {path}")
+    return shadow
+
+def _swap_model(new_model):
+    """Publish a new model; a single assignment, so readers see old or new, never a mix."""
+    global model
+    model = new_model
+
+def start_model_watcher():
+    """Start hot reload of the model artifacts in this process (once)."""
+    global watcher
+    if MODEL_RELOAD_INTERVAL > 0 and watcher is None:
+        # New models must keep the feature count clients are sending today
+        watcher = ModelWatcher(
+            [ARTIFACT_PATH, COMPACT_MODEL_PATH, MODEL_PATH], read_model, _swap_model, lambda: model,
+            interval=MODEL_RELOAD_INTERVAL, expected_features=model.n_features if model is not None else None,
+            sidecar_paths=[SCHEMA_PATH, FEATURE_SUMMARY_PATH],
+        ).start()
+    return watcher
+
+# Request contract shared by the Flask app and the ASGI server (asgi.py)
+
+API_INFO = {
+    'message': 'MLOps API - Model Inference Service',
+    'version': '1.0',
+    'endpoints': {
+        '/': 'API information',
+        '/health': 'Health check',
+        '/predict': 'Model prediction (POST)',
+        '/predict/batch': 'Batch prediction (POST)',
+        '/predict/stream': 'Streaming NDJSON prediction (POST)',
+        '/models': 'Registry models and versions',
+        '/models/<name>[/versions/<version>]/predict[/batch|/stream]': 'Prediction with a registry model (POST)',
+        '/stats': 'Serving statistics',
+        '/drift': 'Per-feature drift of live inputs from the training data',
+        '/metrics': 'Prometheus metrics'
+    }
+}
+
+
+def health_payload():
+    """Body of the /health response."""
+    return {
+        'status': 'healthy',
+        'model_loaded': model is not None,
+        'model_version': model.version if model is not None else None
+    }
+
+
+def parse_single(data, validator):
+    """
+    Validate a /predict JSON body; returns (features, features_array).
+
+    `features` is either a positional list or a {name: value} object.
+    """
+    if not data or 'features' not in data:
+        raise InvalidInput(f'Invalid input. Expected {{"features": {validator.example()}}} '
+                           f'or {{"features": {{"name": value, ...}}}}')
+    
+    features = data['features']
+    
+    if isinstance(features, dict):
+        features_array = validator.rows_to_array([features])
+    else:
+        if not isinstance(features, list) or len(features) != validator.n_features:
+            raise InvalidInput(f'Expected {validator.n_features} features')
+        features_array = validator.rows_to_array([features])
+    
+    validator.check(features_array, f'Expected {validator.n_features} features',
+                    positional=not isinstance(features, dict))
+    return features, features_array
+
+
+def parse_batch(fmt, data=None, body=None, headers=None, validator=None):
+    """
+    Validate a /predict/batch body and return it as a 2-D array in schema order.
+
+    JSON bodies are passed already parsed as `data`. Rows are positional
+    lists (optionally with "feature_names" giving the column order) or
+    {name: value} objects. Binary formats are decoded from the raw `body`
+    bytes; Arrow tables with named columns are matched by name. Raises
+    InvalidInput (400) or payloads.UnsupportedMediaType (415).
+    """
+    positional = True
+    if fmt == payloads.JSON:
+        if not data or 'features' not in data:
+            raise InvalidInput('Invalid input. Expected {"features": [[f1, f2, ...], ...]}')
+        
+        features_list = data['features']
+        
+        if not isinstance(features_list, list) or len(features_list) == 0:
+            raise InvalidInput('Features must be a non-empty list')
+        
+        # Convert to numpy array (in schema order)
+        features_array = validator.rows_to_array(features_list)
+        positional = not isinstance(features_list[0], dict)
+        if positional and data.get('feature_names') is not None:
+            features_array = validator.reorder(features_array, data['feature_names'])
+            positional = False
+    else:
+        try:
+            features_array = payloads.decode(fmt, body, headers, validator.names)
+        except payloads.UnsupportedMediaType:
+            raise
+        except ValueError as e:
+            raise InvalidInput(str(e))
+        
+        if features_array.size == 0:
+            raise InvalidInput('Features must be a non-empty array')
+    
+    return validator.check(features_array, f'Each sample must have {validator.n_features} features',
+                           positional=positional)
+
+
+def score_single(current, features_array):
+    """Score one row through the prediction cache and micro-batcher, if enabled."""
+    if current is not model:
+        # Registry models: the batcher, cache and shadow are scoped to the default model
+        return current.predict(features_array)[0]
+    
+    def score(rows):
+        if batcher is not None:
+            return np.array([batcher.predict(rows[0], current)])
+        return current.predict(rows)
+    
+    if prediction_cache is not None:
+        predictions = prediction_cache.predict(current, features_array, score)
+    else:
+        predictions = score(features_array)
+    if shadow is not None:
+        shadow.submit(features_array, predictions)
+    if drift is not None:
+        drift.observe(features_array)
+    return predictions[0]
+
+
+def score_batch(current, features_array):
+    """Score a batch, serving repeated rows from the prediction cache."""
+    if (prediction_cache is not None and current is model
+            and len(features_array) <= PREDICTION_CACHE_MAX_BATCH_ROWS):
+        predictions = prediction_cache.predict(current, features_array)
+    else:
+        predictions = current.predict(features_array)
+    if current is model:
+        if shadow is not None:
+            shadow.submit(features_array, predictions)
+        if drift is not None:
+            drift.observe(features_array)
+    return predictions
+
+
+def json_predictions(predictions):
+    """Predictions as a list for JSON bodies; NaN and ±inf become null (JSON has no such numbers)."""
+    predictions = np.asarray(predictions, dtype=np.float64)
+    finite = np.isfinite(predictions)
+    if finite.all():
+        return predictions.tolist()
+    return np.where(finite, predictions, None).tolist()
+
+
+def single_response(current, features, prediction):
+    """Body of a /predict response."""
+    return {
+        'prediction': json_predictions([prediction])[0],
+        'features': features,
+        'model_type': current.model_type
+    }
+
+
+def batch_response(current, predictions):
+    """Body of a JSON /predict/batch response."""
+    predictions = json_predictions(predictions)
+    return {
+        'predictions': predictions,
+        'count': len(predictions),
+        'model_type': current.model_type
+    }
+
 
 @app.route('/')
 def home():
     """Home endpoint."""
-    return jsonify({
-        'message': 'MLOps API - Model Inference Service',
-        'version': '1.0',
-        'endpoints': {
-            '/': 'API information',
-            '/health': 'Health check',
-            '/predict': 'Model prediction (POST)',
-            '/predict/batch': 'Batch prediction (POST)'
-        }
-    })
+    return jsonify(API_INFO)
 
 @app.route('/health')
 def health():
     """Health check endpoint."""
+    return jsonify(health_payload())
+
+@app.route('/stats')
+def stats():
+    """Serving statistics endpoint."""
     return jsonify({
-        'status': 'healthy',
-        'model_loaded': model is not None
+        'batching': batcher.stats() if batcher is not None else {'enabled': False},
+        'reload': watcher.stats() if watcher is not None else {'enabled': False},
+        'cache': prediction_cache.stats() if prediction_cache is not None else {'enabled': False},
+        'registry': registry.stats(),
+        'shadow': shadow.stats() if shadow is not None else {'enabled': False},
+        'worker': dict(worker_info, pid=os.getpid(), memory=procinfo.memory_usage())
+    })
+
+@app.route('/drift')
+def drift_endpoint():
+    """Drift scores and the mergeable live feature summary of this worker."""
+    if drift is None:
+        return jsonify({'enabled': False})
+    return jsonify(drift.report(reference_summary()))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics endpoint."""
+    return Response(metrics_text(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/models')
+def list_models():
+    """Registry models and their published versions."""
+    return jsonify({
+        'models': {name: registry.versions(name) for name in registry.names()},
+        'loaded': registry.stats()['loaded'],
     })
 
 @app.route('/predict', methods=['POST'])
-def predict():
+@app.route('/models/<name>/predict', methods=['POST'])
+@app.route('/models/<name>/versions/<version>/predict', methods=['POST'])
+def predict(name=None, version=None):
     """Single prediction endpoint."""
+    start = time.perf_counter()
+    status = 500
     try:
-        if model is None:
+        current = resolve_model(name, version, request.headers)
+        if current is None:
             return jsonify({'error': 'Model not loaded'}), 500
         
         data = request.get_json()
+        parsed = time.perf_counter()
+        features, features_array = parse_single(data, validator_for(current))
+        converted = time.perf_counter()
         
-        if not data or 'features' not in data:
-            return jsonify({'error': 'Invalid input. Expected {"features": [f1, f2, f3, f4, f5]}'}), 400
-        
-        features = data['features']
+        # Make prediction (cached / coalesced with concurrent callers if enabled)
+        prediction = score_single(current, features_array)
+        predicted = time.perf_counter()
         
-        if len(features) != 5:
-            return jsonify({'error': 'Expected 5 features'}), 400
-        
-        # Convert to numpy array and reshape for prediction
-        features_array = np.array(features).reshape(1, -1)
-        
-        # Make prediction
-        prediction = model.predict(features_array)[0]
-        
-        return jsonify({
-            'prediction': float(prediction),
-            'features': features,
-            'model_type': 'LinearRegression'
-        })
+        response = jsonify(single_response(current, features, prediction))
+        metrics.observe_phases('/predict', parsed - start, converted - parsed,
+                               predicted - converted, time.perf_counter() - predicted)
+        metrics.observe_batch_size('/predict', 1)
+        status = 200
+        return response
     
+    except InvalidInput as e:
+        status = 400
+        return jsonify(error_body(e)), 400
+    except ModelNotFound as e:
+        status = 404
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        metrics.observe_request('/predict', status, time.perf_counter() - start)
 
 @app.route('/predict/batch', methods=['POST'])
-def predict_batch():
-    """Batch prediction endpoint."""
+@app.route('/models/<name>/predict/batch', methods=['POST'])
+@app.route('/models/<name>/versions/<version>/predict/batch', methods=['POST'])
+def predict_batch(name=None, version=None):
+    """
+    Batch prediction endpoint.
+
+    Accepts JSON, .npy, Arrow IPC or raw float buffers (see api/payloads.py)
+    and answers in the same format as the request.
+    """
+    start = time.perf_counter()
+    status = 500
     try:
-        if model is None:
+        current = resolve_model(name, version, request.headers)
+        if current is None:
             return jsonify({'error': 'Model not loaded'}), 500
         
-        data = request.get_json()
+        fmt = payloads.media_type(request.content_type)
         
-        if not data or 'features' not in data:
-            return jsonify({'error': 'Invalid input. Expected {"features": [[f1, f2, ...], ...]}'}), 400
-        
-        features_list = data['features']
-        
-        if not isinstance(features_list, list) or len(features_list) == 0:
-            return jsonify({'error': 'Features must be a non-empty list'}), 400
-        
-        # Convert to numpy array
-        features_array = np.array(features_list)
-        
-        if features_array.shape[1] != 5:
-            return jsonify({'error': 'Each sample must have 5 features'}), 400
+        if fmt == payloads.JSON:
+            data = request.get_json()
+            parsed = time.perf_counter()
+            features_array = parse_batch(fmt, data=data, validator=validator_for(current))
+        else:
+            body = request.get_data()
+            parsed = time.perf_counter()
+            features_array = parse_batch(fmt, body=body, headers=request.headers, validator=validator_for(current))
+        converted = time.perf_counter()
         
         # Make predictions
-        predictions = model.predict(features_array).tolist()
+        predictions = score_batch(current, features_array)
+        predicted = time.perf_counter()
         
-        return jsonify({
-            'predictions': predictions,
-            'count': len(predictions),
-            'model_type': 'LinearRegression'
-        })
+        if fmt != payloads.JSON:
+            body, headers = payloads.encode(fmt, predictions)
+            response = Response(body, mimetype=fmt, headers=headers)
+        else:
+            response = jsonify(batch_response(current, predictions))
+        metrics.observe_phases('/predict/batch', parsed - start, converted - parsed,
+                               predicted - converted, time.perf_counter() - predicted)
+        metrics.observe_batch_size('/predict/batch', len(features_array))
+        status = 200
+        return response
     
+    except InvalidInput as e:
+        status = 400
+        return jsonify(error_body(e)), 400
+    except payloads.UnsupportedMediaType as e:
+        status = 415
+        return jsonify({'error': str(e)}), 415
+    except ModelNotFound as e:
+        status = 404
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        metrics.observe_request('/predict/batch', status, time.perf_counter() - start)
+
+@app.route('/predict/stream', methods=['POST'])
+@app.route('/models/<name>/predict/stream', methods=['POST'])
+@app.route('/models/<name>/versions/<version>/predict/stream', methods=['POST'])
+def predict_stream(name=None, version=None):
+    """
+    Streaming prediction endpoint.
+
+    Reads newline-delimited rows ([f1, ..., f5], {"features": [...]} or
+    {name: value, ...}) from the request body as it arrives and streams back one {"prediction": p}
+    line per row, scoring STREAM_CHUNK_ROWS rows at a time. Memory use is
+    bounded by the chunk size, not the upload size. Errors found after
+    streaming has started are reported as a final {"error": ...} line.
+    """
+    try:
+        current = resolve_model(name, version, request.headers)
+    except ModelNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    if current is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+    
+    stream = request.stream
+    validator = validator_for(current)
+    
+    def generate():
+        scored = 0
+        try:
+            for rows in payloads.iter_ndjson_chunks(stream, STREAM_CHUNK_ROWS):
+                features_array = validator.rows_to_array(rows)
+                validator.check(
+                    features_array,
+                    f'Each sample must have {validator.n_features} features (rows {scored + 1}-{scored + len(rows)})',
+                    row_offset=scored + 1, positional=not isinstance(rows[0], dict),
+                )
+                predictions = json_predictions(current.predict(features_array))
+                scored += len(predictions)
+                yield ''.join(json.dumps({'prediction': p}) + '\n' for p in predictions)
+        except Exception as e:
+            yield json.dumps(dict(error_body(e), rows_scored=scored)) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype=payloads.NDJSON)
 
 if __name__ == '__main__':
-    # Load model on startup
+    # Load model on startup and watch for new versions
     load_model()
+    start_model_watcher()
     
     # Run Flask app
     app.run(host='0.0.0.0', port=8000, debug=False)
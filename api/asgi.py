@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+ASGI serving mode for the inference API.
+
+Serves `/`, `/health`, `/metrics`, `/predict` and `/predict/batch` (also
+under /models/<name>[/versions/<version>] for registry models) with the
+same request and response contract as the Flask app (the validation and response helpers
+are shared with app.py). Connections are handled on the event loop, so slow
+uploads do not pin a worker thread. Body parsing and scoring of large
+batches run on a bounded thread pool.
+
+Run from the api/ directory:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import app as service
+import payloads
+from cache import row_keys
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+# Threads used for CPU-bound parsing and scoring
+EXECUTOR_WORKERS = int(os.environ.get('ASGI_EXECUTOR_WORKERS', str(os.cpu_count() or 4)))
+# Offloaded jobs allowed in flight before new requests wait for a slot
+EXECUTOR_MAX_PENDING = int(os.environ.get('ASGI_EXECUTOR_MAX_PENDING', str(EXECUTOR_WORKERS * 4)))
+# Batches smaller than this are scored inline; a thread hop costs more than the dot product
+OFFLOAD_MIN_BYTES = int(os.environ.get('ASGI_OFFLOAD_MIN_BYTES', '65536'))
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', str(512 * 1024 * 1024)))
+
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix='asgi-score')
+_slots = None
+
+
+class RequestTooLarge(Exception):
+    """The request body exceeded MAX_BODY_BYTES (HTTP 413)."""
+
+
+async def _offload(fn, *args):
+    """Run `fn` on the bounded executor, waiting for a free slot first."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(EXECUTOR_MAX_PENDING)
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestTooLarge(f'Request body exceeds {MAX_BODY_BYTES} bytes')
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def _send(send, status, body, content_type='application/json', headers=None):
+    raw_headers = [(b'content-type', content_type.encode('latin-1')),
+                   (b'content-length', str(len(body)).encode('latin-1'))]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status, payload):
+    await _send(send, status, json.dumps(payload).encode('utf-8'))
+
+
+def _score_batch(current, fmt, body, headers):
+    start = time.perf_counter()
+    if fmt == payloads.JSON:
+        data = json.loads(body) if body else None
+        parsed = time.perf_counter()
+        features_array = service.parse_batch(fmt, data=data, validator=service.validator_for(current))
+    else:
+        parsed = start
+        features_array = service.parse_batch(fmt, body=body, headers=headers,
+                                             validator=service.validator_for(current))
+    converted = time.perf_counter()
+    predictions = service.score_batch(current, features_array)
+    predicted = time.perf_counter()
+    if fmt != payloads.JSON:
+        out = payloads.encode(fmt, predictions)
+    else:
+        out = json.dumps(service.batch_response(current, predictions)).encode('utf-8'), None
+    service.metrics.observe_phases('/predict/batch', parsed - start, converted - parsed,
+                                   predicted - converted, time.perf_counter() - predicted)
+    service.metrics.observe_batch_size('/predict/batch', len(features_array))
+    return out
+
+
+def _route(path):
+    """Split a prediction path into (endpoint, model name, version); endpoint is None if unknown."""
+    if path in ('/predict', '/predict/batch'):
+        return path, None, None
+    parts = path.split('/')
+    # ['', 'models', name, ('versions', version,) 'predict'(, 'batch')]
+    if len(parts) < 4 or parts[1] != 'models':
+        return None, None, None
+    name, rest = parts[2], parts[3:]
+    version = None
+    if rest[:1] == ['versions'] and len(rest) >= 3:
+        version, rest = rest[1], rest[2:]
+    endpoint = '/' + '/'.join(rest)
+    if endpoint not in ('/predict', '/predict/batch'):
+        return None, None, None
+    return endpoint, name, version
+
+
+async def _resolve_model(name, version, headers):
+    """The targeted model; listing versions and loading a cold model run off the event loop."""
+    name = name or headers.get(service.MODEL_NAME_HEADER)
+    version = version or headers.get(service.MODEL_VERSION_HEADER)
+    if not name:
+        return service.model
+    current = service.registry.peek(name, version, list_versions=False)
+    if current is None:
+        current = await _offload(service.registry.get, name, version)
+    return current
+
+
+async def _score_coalesced(current, features_array):
+    """Await the micro-batcher without blocking the event loop."""
+    cache = service.prediction_cache
+    prediction = None
+    if cache is not None:
+        keys = row_keys(features_array)
+        prediction = cache.get_many(current.version, keys)[0]
+    if prediction is None:
+        prediction = await asyncio.wrap_future(service.batcher.submit(features_array[0], current))
+        if cache is not None:
+            cache.put_many(current.version, keys, [prediction])
+    # Cache hits are live traffic too, as in score_single
+    if service.shadow is not None:
+        service.shadow.submit(features_array, np.array([prediction]))
+    if service.drift is not None:
+        service.drift.observe(features_array)
+    return prediction
+
+
+async def _predict(current, body, send):
+    start = time.perf_counter()
+    data = json.loads(body) if body else None
+    parsed = time.perf_counter()
+    features, features_array = service.parse_single(data, service.validator_for(current))
+    converted = time.perf_counter()
+    if service.batcher is not None and current is service.model:
+        prediction = await _score_coalesced(current, features_array)
+    else:
+        prediction = service.score_single(current, features_array)
+    predicted = time.perf_counter()
+    out = json.dumps(service.single_response(current, features, prediction)).encode('utf-8')
+    service.metrics.observe_phases('/predict', parsed - start, converted - parsed,
+                                   predicted - converted, time.perf_counter() - predicted)
+    service.metrics.observe_batch_size('/predict', 1)
+    await _send(send, 200, out)
+
+
+async def _predict_batch(current, body, headers, send):
+    fmt = payloads.media_type(headers.get('Content-Type'))
+    if len(body) >= OFFLOAD_MIN_BYTES:
+        out, extra_headers = await _offload(_score_batch, current, fmt, body, headers)
+    else:
+        out, extra_headers = _score_batch(current, fmt, body, headers)
+    await _send(send, 200, out, fmt, extra_headers)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if service.model is None:
+                service.load_model()
+            service.start_model_watcher()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path'].rstrip('/') or '/'
+    method = scope['method']
+
+    if path == '/' and method == 'GET':
+        return await _send_json(send, 200, service.API_INFO)
+    if path == '/health' and method == 'GET':
+        return await _send_json(send, 200, service.health_payload())
+    if path == '/metrics' and method == 'GET':
+        return await _send(send, 200, service.metrics_text().encode('utf-8'), METRICS_CONTENT_TYPE)
+    endpoint, name, version = _route(path)
+    if endpoint is None:
+        return await _send_json(send, 404, {'error': 'Not found'})
+    if method != 'POST':
+        return await _send_json(send, 405, {'error': 'Method not allowed'})
+
+    headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope['headers']}
+    start = time.perf_counter()
+    status = 500
+    try:
+        body = await _read_body(receive)
+        current = await _resolve_model(name, version, headers)
+        if current is None:
+            return await _send_json(send, 500, {'error': 'Model not loaded'})
+        if endpoint == '/predict':
+            await _predict(current, body, send)
+        else:
+            await _predict_batch(current, body, headers, send)
+        status = 200
+    except (service.InvalidInput, json.JSONDecodeError) as e:
+        status = 400
+        await _send_json(send, 400, service.error_body(e))
+    except payloads.UnsupportedMediaType as e:
+        status = 415
+        await _send_json(send, 415, {'error': str(e)})
+    except service.ModelNotFound as e:
+        status = 404
+        await _send_json(send, 404, {'error': str(e)})
+    except RequestTooLarge as e:
+        status = 413
+        await _send_json(send, 413, {'error': str(e)})
+    except Exception as e:
+        await _send_json(send, 500, {'error': str(e)})
+    finally:
+        service.metrics.observe_request(endpoint, status, time.perf_counter() - start)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for single-row predictions.
+
+Concurrent `/predict` calls hand their row to a MicroBatcher, which scores
+everything that arrived within a short window with one vectorized call and
+resolves each caller's future with its own result. It only helps when the
+server handles requests concurrently (threaded dev server, gunicorn gthread
+workers).
+
+Callers may pass the model their request resolved along with the row. Rows
+are scored with the model they came with, so a request that started before
+a hot reload is never answered by the new model.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesce single-row predictions into batches.
+
+    A batch is dispatched when it reaches `max_batch_size` rows or when
+    `max_wait_ms` has passed since its first row arrived. The window is
+    adaptive: if the previous batch held a single row (low load) whatever is
+    already queued is dispatched immediately instead of waiting.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._last_batch_size = 1
+        # Achieved batch sizes, bucketed by powers of two (1, 2, 4, ...)
+        self._size_buckets = [0] * (self.max_batch_size.bit_length() + 1)
+        self._batches = 0
+        self._rows = 0
+        self._max_seen = 0
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers get their own thread
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                    self._worker.start()
+
+    def submit(self, row, model=None):
+        """
+        Queue one feature row and return a Future for its prediction.
+
+        Rows are scored with `predict_fn(rows)`, or `predict_fn(rows, model)`
+        when a model is given.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, model, future))
+        return future
+
+    def predict(self, row, model=None, timeout=None):
+        """Score one row through the batcher and wait for the result."""
+        return self.submit(row, model).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        wait = self.max_wait if self._last_batch_size > 1 else 0.0
+        deadline = time.monotonic() + wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # One call per model; around a reload a batch can hold rows for two
+            groups = {}
+            for row, model, future in batch:
+                group = groups.setdefault(id(model), (model, [], []))
+                group[1].append(row)
+                group[2].append(future)
+            for model, rows, futures in groups.values():
+                try:
+                    X = np.vstack(rows)
+                    predictions = self.predict_fn(X) if model is None else self.predict_fn(X, model)
+                except Exception as e:  # deliver the failure to every waiting caller
+                    for future in futures:
+                        future.set_exception(e)
+                else:
+                    for future, prediction in zip(futures, predictions):
+                        future.set_result(prediction)
+            self._record(len(batch))
+
+    def _record(self, size):
+        self._last_batch_size = size
+        self._batches += 1
+        self._rows += size
+        self._max_seen = max(self._max_seen, size)
+        self._size_buckets[(size - 1).bit_length()] += 1
+
+    def stats(self):
+        """Return achieved batch-size statistics."""
+        histogram = {}
+        for i, count in enumerate(self._size_buckets):
+            if count:
+                upper = min(1 << i, self.max_batch_size)
+                histogram[f'<={upper}'] = count
+        return {
+            'enabled': True,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self._batches,
+            'requests': self._rows,
+            'mean_batch_size': self._rows / self._batches if self._batches else 0.0,
+            'max_batch_size_seen': self._max_seen,
+            'batch_size_histogram': histogram,
+            'queue_depth': self._queue.qsize(),
+        }
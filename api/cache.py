@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+In-process cache of predictions keyed by feature vector.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def row_keys(features_array):
+    """
+    Return one hashable key per row.
+
+    The key is the row's float64 bytes, which identifies the vector exactly
+    and is cheaper than a digest for a handful of features.
+    """
+    rows = np.ascontiguousarray(features_array, dtype=np.float64)
+    return [row.tobytes() for row in rows]
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with per-entry TTL, scoped to one model version.
+
+    Entries are only valid for the model version that produced them. The
+    first lookup made with a different version clears the cache.
+    """
+
+    def __init__(self, max_entries=10_000, ttl_seconds=300.0, clock=time.monotonic):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        # Caller holds the lock
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get_many(self, version, keys):
+        """Return cached predictions for `keys`, with None for misses."""
+        now = self.clock()
+        results = []
+        with self._lock:
+            self._check_version(version)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results.append(entry[0])
+        return results
+
+    def put_many(self, version, keys, values):
+        """Store predictions for `keys`, evicting least recently used entries."""
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (float(value), expires_at)
+                self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(overflow, 0)):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict(self, current, features_array, predict_fn=None):
+        """Predict rows, scoring only the cache misses in one vectorized call."""
+        keys = row_keys(features_array)
+        cached = self.get_many(current.version, keys)
+        missing = [i for i, value in enumerate(cached) if value is None]
+        if not missing:
+            return np.array(cached, dtype=np.float64)
+        scored = (predict_fn or current.predict)(np.asarray(features_array)[missing])
+        self.put_many(current.version, [keys[i] for i in missing], scored)
+        for i, value in zip(missing, scored):
+            cached[i] = value
+        return np.array(cached, dtype=np.float64)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': True,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'model_version': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
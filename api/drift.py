@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Online feature-drift monitoring against the training distribution.
+
+Request handlers pass each validated batch to DriftMonitor.observe. Rows are
+copied into a fixed buffer and folded into a FeatureSummary (see
+src/feature_stats.py) once the buffer is full, so the per-request cost is
+a slice assignment. The vectorized fold then runs about once per
+`buffer_rows` rows. Requests larger than `max_rows_per_request` contribute
+an evenly strided sample of their rows, which keeps large batches from
+paying for a full sort.
+
+The live summary covers between `window_rows` and twice that many of the
+most recent observed rows. Two summaries are kept and the older one is
+dropped each time the newer one fills. Memory stays constant and old
+traffic ages out.
+
+Summaries are per process. Each worker's /drift response carries its raw
+live summary, and FeatureSummary.from_dict(...).merge(...) combines them
+into a fleet-wide view.
+"""
+import threading
+
+import numpy as np
+
+from feature_stats import SKETCH_SIZE, FeatureSummary, drift_scores
+
+
+class DriftMonitor:
+    """Streaming summary of live features and their drift from a reference."""
+
+    def __init__(self, window_rows=100_000, buffer_rows=1024, max_rows_per_request=1024,
+                 min_rows=100, sketch_size=SKETCH_SIZE):
+        self.window_rows = int(window_rows)
+        self.buffer_rows = max(1, int(buffer_rows))
+        self.max_rows_per_request = max(1, int(max_rows_per_request))
+        self.min_rows = int(min_rows)
+        self.sketch_size = sketch_size
+        self._current = FeatureSummary(sketch_size=sketch_size)
+        self._previous = None
+        self._buffer = None
+        self._filled = 0
+        self._lock = threading.Lock()
+        self.observed_rows = 0
+        self.skipped_requests = 0
+
+    def observe(self, features_array):
+        """Record a validated batch (columns in model feature order)."""
+        rows = len(features_array)
+        if rows > self.max_rows_per_request:
+            features_array = features_array[::-(-rows // self.max_rows_per_request)]
+        with self._lock:
+            if self._buffer is None:
+                self._buffer = np.empty((self.buffer_rows, features_array.shape[1]), dtype=np.float64)
+            elif features_array.shape[1] != self._buffer.shape[1]:
+                # A model with a different feature count; its rows are not comparable
+                self.skipped_requests += 1
+                return
+            self.observed_rows += len(features_array)
+            start = 0
+            while start < len(features_array):
+                take = min(self.buffer_rows - self._filled, len(features_array) - start)
+                self._buffer[self._filled:self._filled + take] = features_array[start:start + take]
+                self._filled += take
+                start += take
+                if self._filled == self.buffer_rows:
+                    self._flush()
+
+    def _flush(self):
+        # Caller holds the lock
+        if self._filled:
+            self._current.update(self._buffer[:self._filled])
+            self._filled = 0
+        if self.window_rows > 0 and self._current.n >= self.window_rows:
+            self._previous, self._current = self._current, FeatureSummary(sketch_size=self.sketch_size)
+
+    def live_summary(self, feature_names=None):
+        """A merged copy of the live window, including buffered rows."""
+        with self._lock:
+            self._flush()
+            live = FeatureSummary(feature_names, self.sketch_size)
+            if self._previous is not None:
+                live.merge(self._previous)
+            return live.merge(self._current)
+
+    def scores(self, reference, live=None):
+        """Per-feature drift against `reference`, or None until enough rows are seen."""
+        if reference is None:
+            return None
+        if live is None:
+            live = self.live_summary(reference.feature_names)
+        if live.n < max(self.min_rows, 1) or live.n_features != reference.n_features:
+            return None
+        return drift_scores(reference, live)
+
+    def report(self, reference):
+        """Body of the /drift response."""
+        live = self.live_summary(reference.feature_names if reference is not None else None)
+        return {
+            'enabled': True,
+            'reference_loaded': reference is not None,
+            'reference_rows': reference.n if reference is not None else 0,
+            'observed_rows': self.observed_rows,
+            'window_rows': live.n,
+            'min_rows': self.min_rows,
+            'skipped_requests': self.skipped_requests,
+            'features': self.scores(reference, live),
+            'live_summary': live.to_dict(),
+        }
+
+    def metric_lines(self, reference):
+        """Prometheus gauges of the current drift scores."""
+        lines = [
+            '# HELP api_drift_observed_rows_total Rows folded into the live feature summary.',
+            '# TYPE api_drift_observed_rows_total counter',
+            f'api_drift_observed_rows_total {self.observed_rows}',
+        ]
+        scores = self.scores(reference)
+        if scores:
+            lines += [
+                '# HELP api_feature_drift_psi Population stability index of live vs training feature values.',
+                '# TYPE api_feature_drift_psi gauge',
+            ]
+            lines += [f'api_feature_drift_psi{{feature="{name}"}} {s["psi"]!r}' for name, s in scores.items()]
+            lines += [
+                '# HELP api_feature_drift_mean_shift Live mean shift in training standard deviations.',
+                '# TYPE api_feature_drift_mean_shift gauge',
+            ]
+            lines += [f'api_feature_drift_mean_shift{{feature="{name}"}} {s["mean_shift"]!r}'
+                      for name, s in scores.items()]
+        return lines
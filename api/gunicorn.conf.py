@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration for multi-worker serving.
+
+The app and the model are loaded once in the master (`preload_app`) before
+workers are forked, so every worker shares the master's model pages
+copy-on-write instead of unpickling its own copy. gthread workers keep
+several requests in flight per process, which the /predict micro-batcher
+needs.
+
+Run from the api/ directory:
+    gunicorn app:app
+"""
+import gc
+import os
+import time
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', str(os.cpu_count() or 2)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def when_ready(server):
+    """Load the model in the master before the first fork."""
+    if not preload_app:
+        return
+    import app
+    if app.model is None:
+        app.load_model()
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers don't write to (and un-share) the inherited pages.
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    """Record and log how long this worker took to start and what it uses."""
+    import app
+    import procinfo
+    if app.model is None:
+        app.load_model()
+    # Threads don't survive fork, so each worker watches for new models itself
+    app.start_model_watcher()
+    app.worker_info['startup_seconds'] = time.monotonic() - worker.forked_at
+    memory = procinfo.memory_usage()
+    worker.log.info(
+        "Worker %s ready in %.3fs: rss=%.1f MiB pss=%.1f MiB shared=%.1f MiB",
+        os.getpid(), app.worker_info['startup_seconds'],
+        memory.get('rss_bytes', 0) / 2**20, memory.get('pss_bytes', 0) / 2**20,
+        (memory.get('shared_clean_bytes', 0) + memory.get('shared_dirty_bytes', 0)) / 2**20,
+    )
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Request metrics in the Prometheus text exposition format.
+
+Every counter and histogram is created up front for the known endpoints,
+phases and status codes, and histograms keep fixed bucket arrays. Recording
+a request is therefore a few list/dict lookups, a bisect and integer
+increments under a lock, with no containers allocated per request.
+
+Metrics are per process. Under preforked gunicorn each worker reports its
+own figures; label or aggregate them by scrape target.
+"""
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ENDPOINTS = ('/predict', '/predict/batch')
+# Phases of a prediction request, in the order they run
+PHASES = ('parse', 'convert', 'predict', 'serialize')
+STATUSES = (200, 400, 404, 413, 415, 500)
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                      10000, 20000, 50000, 100000, 200000, 500000, 1000000)
+# |candidate - primary| prediction differences recorded by shadow scoring
+SHADOW_DELTA_BUCKETS = (1e-9, 1e-6, 1e-4, 0.001, 0.01, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 100.0)
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket upper bounds are inclusive (`le`)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(float(b) for b in buckets)
+        # One slot per bucket plus the +Inf overflow slot, never resized
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def observe_many(self, values):
+        """Record an array of values with one vectorized bucket assignment."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        slots = np.bincount(np.searchsorted(self.buckets, values, side='left'), minlength=len(self.counts))
+        total = float(values.sum())
+        with self._lock:
+            for i in np.flatnonzero(slots).tolist():
+                self.counts[i] += int(slots[i])
+            self.sum += total
+            self.count += values.size
+
+    def snapshot(self):
+        """Return (cumulative bucket counts, sum, count) taken consistently."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+
+class ServiceMetrics:
+    """All metrics exported by the inference API."""
+
+    def __init__(self, endpoints=ENDPOINTS):
+        self.endpoints = tuple(endpoints)
+        self.requests = {e: {s: Counter() for s in STATUSES} for e in self.endpoints}
+        self.latency = {e: Histogram(LATENCY_BUCKETS) for e in self.endpoints}
+        self.phases = {e: tuple(Histogram(LATENCY_BUCKETS) for _ in PHASES) for e in self.endpoints}
+        self.batch_size = {e: Histogram(BATCH_SIZE_BUCKETS) for e in self.endpoints}
+        self.model_load_seconds = Histogram(LATENCY_BUCKETS)
+        self.last_model_load_seconds = None
+        # Shadow scoring, rendered once a candidate model is configured
+        self.shadow_enabled = False
+        self.shadow_abs_delta = Histogram(SHADOW_DELTA_BUCKETS)
+        self.shadow_dropped_rows = Counter()
+        self.shadow_errors = Counter()
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint, status, seconds):
+        """Count a finished request and record its total latency."""
+        counters = self.requests[endpoint]
+        counter = counters.get(status)
+        if counter is None:
+            # Unexpected status code: allocate its counter once
+            with self._lock:
+                counter = counters.setdefault(status, Counter())
+        counter.inc()
+        self.latency[endpoint].observe(seconds)
+
+    def observe_phases(self, endpoint, parse, convert, predict, serialize):
+        """Record the seconds spent in each phase of a successful request."""
+        histograms = self.phases[endpoint]
+        histograms[0].observe(parse)
+        histograms[1].observe(convert)
+        histograms[2].observe(predict)
+        histograms[3].observe(serialize)
+
+    def observe_batch_size(self, endpoint, rows):
+        self.batch_size[endpoint].observe(rows)
+
+    def observe_model_load(self, seconds):
+        self.model_load_seconds.observe(seconds)
+        self.last_model_load_seconds = seconds
+
+    def observe_shadow(self, abs_deltas):
+        self.shadow_abs_delta.observe_many(abs_deltas)
+
+    def _histogram_lines(self, name, histogram, **labels):
+        cumulative, total, count = histogram.snapshot()
+        lines = []
+        for bound, c in zip(histogram.buckets + (float('inf'),), cumulative):
+            lines.append(f'{name}_bucket{_labels(**labels, le=_format_value(bound))} {c}')
+        suffix = _labels(**labels) if labels else ''
+        lines.append(f'{name}_sum{suffix} {_format_value(total)}')
+        lines.append(f'{name}_count{suffix} {count}')
+        return lines
+
+    def render(self, extra_lines=()):
+        """Return all metrics in the Prometheus text format, followed by `extra_lines`."""
+        lines = [
+            '# HELP api_requests_total Prediction requests by endpoint and HTTP status.',
+            '# TYPE api_requests_total counter',
+        ]
+        for endpoint in self.endpoints:
+            for status, counter in sorted(self.requests[endpoint].items()):
+                lines.append(f'api_requests_total{_labels(endpoint=endpoint, status=status)} {counter.value}')
+        lines += [
+            '# HELP api_request_errors_total Failed prediction requests by endpoint and HTTP status.',
+            '# TYPE api_request_errors_total counter',
+        ]
+        for endpoint in self.endpoints:
+            for status, counter in sorted(self.requests[endpoint].items()):
+                if status >= 400:
+                    lines.append(f'api_request_errors_total{_labels(endpoint=endpoint, status=status)} {counter.value}')
+        lines += [
+            '# HELP api_request_duration_seconds End-to-end latency of prediction requests.',
+            '# TYPE api_request_duration_seconds histogram',
+        ]
+        for endpoint in self.endpoints:
+            lines += self._histogram_lines('api_request_duration_seconds', self.latency[endpoint], endpoint=endpoint)
+        lines += [
+            '# HELP api_request_phase_seconds Latency of successful prediction requests by phase.',
+            '# TYPE api_request_phase_seconds histogram',
+        ]
+        for endpoint in self.endpoints:
+            for phase, histogram in zip(PHASES, self.phases[endpoint]):
+                lines += self._histogram_lines('api_request_phase_seconds', histogram, endpoint=endpoint, phase=phase)
+        lines += [
+            '# HELP api_batch_size_rows Rows per scored request.',
+            '# TYPE api_batch_size_rows histogram',
+        ]
+        for endpoint in self.endpoints:
+            lines += self._histogram_lines('api_batch_size_rows', self.batch_size[endpoint], endpoint=endpoint)
+        lines += [
+            '# HELP api_model_load_seconds Time to read and validate a model artifact.',
+            '# TYPE api_model_load_seconds histogram',
+        ]
+        lines += self._histogram_lines('api_model_load_seconds', self.model_load_seconds)
+        if self.last_model_load_seconds is not None:
+            lines += [
+                '# HELP api_model_last_load_seconds Load time of the most recently loaded model.',
+                '# TYPE api_model_last_load_seconds gauge',
+                f'api_model_last_load_seconds {_format_value(self.last_model_load_seconds)}',
+            ]
+        if self.shadow_enabled:
+            lines += [
+                '# HELP api_shadow_abs_delta Absolute difference between candidate and primary predictions.',
+                '# TYPE api_shadow_abs_delta histogram',
+            ]
+            lines += self._histogram_lines('api_shadow_abs_delta', self.shadow_abs_delta)
+            lines += [
+                '# HELP api_shadow_dropped_rows_total Rows not shadow-scored because the queue was full.',
+                '# TYPE api_shadow_dropped_rows_total counter',
+                f'api_shadow_dropped_rows_total {self.shadow_dropped_rows.value}',
+                '# HELP api_shadow_errors_total Shadow batches the candidate model failed to score.',
+                '# TYPE api_shadow_errors_total counter',
+                f'api_shadow_errors_total {self.shadow_errors.value}',
+            ]
+        lines += extra_lines
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Request/response body codecs for batch prediction.
+
+Binary bodies are decoded straight into NumPy arrays that share memory
+with the request bytes, so large batches skip JSON parsing and
+list-to-array conversion. The response uses the same format as the
+request.
+
+Supported media types:
+    application/json                     {"features": [[...], ...]}
+    application/x-npy                    a single .npy array
+    application/vnd.apache.arrow.stream  Arrow IPC stream (needs pyarrow)
+    application/octet-stream             raw little-endian floats; shape in
+                                         X-Shape ("rows,cols"), dtype in
+                                         X-Dtype (float64 or float32)
+"""
+import io
+import json
+
+import numpy as np
+
+JSON = 'application/json'
+NPY = 'application/x-npy'
+ARROW = 'application/vnd.apache.arrow.stream'
+RAW = 'application/octet-stream'
+NDJSON = 'application/x-ndjson'
+
+RAW_DTYPES = {'float64': np.dtype('<f8'), 'float32': np.dtype('<f4')}
+
+
+class UnsupportedMediaType(ValueError):
+    """The request body uses a format the API cannot decode."""
+
+
+def media_type(content_type):
+    """Return the bare media type of a Content-Type header (JSON if absent)."""
+    if not content_type:
+        return JSON
+    return content_type.split(';', 1)[0].strip().lower()
+
+
+def decode_npy(body):
+    """Decode a .npy body without copying the array data."""
+    header = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(header)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+    except ValueError as e:
+        raise ValueError(f'Invalid .npy body: {e}')
+    # Booleans, integers and floats only: object, string, structured and
+    # datetime arrays cannot be cast to float64 features
+    if dtype.kind not in 'biuf':
+        raise ValueError(f'.npy arrays must be numeric, got dtype {dtype.str}')
+    count = int(np.prod(shape))
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=header.tell())
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+
+def decode_raw(body, headers):
+    """Decode a raw little-endian float buffer described by X-Shape/X-Dtype."""
+    dtype_name = headers.get('X-Dtype', 'float64').lower()
+    if dtype_name not in RAW_DTYPES:
+        raise ValueError(f'X-Dtype must be one of {sorted(RAW_DTYPES)}')
+    shape_header = headers.get('X-Shape')
+    if not shape_header:
+        raise ValueError('X-Shape header is required for raw buffers, e.g. "1000,5"')
+    try:
+        shape = tuple(int(d) for d in shape_header.split(','))
+    except ValueError:
+        raise ValueError(f'Invalid X-Shape header: {shape_header!r}')
+    dtype = RAW_DTYPES[dtype_name]
+    if len(body) != int(np.prod(shape)) * dtype.itemsize:
+        raise ValueError(f'Body has {len(body)} bytes, expected {shape} of {dtype_name}')
+    return np.frombuffer(body, dtype=dtype).reshape(shape)
+
+
+def decode_arrow(body, feature_names=None):
+    """
+    Decode an Arrow IPC stream.
+
+    A single fixed-size-list column (one list per row) is converted without
+    copying. A table with one numeric column per feature is stacked into a
+    2-D array, which costs one copy; when its columns carry all of
+    `feature_names`, they are taken by name in that order.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedMediaType('Arrow input requires pyarrow to be installed')
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    if table.num_columns == 1 and pa.types.is_fixed_size_list(table.schema.field(0).type):
+        column = table.column(0).combine_chunks()
+        width = column.type.list_size
+        values = column.flatten().to_numpy(zero_copy_only=False)
+        return values.reshape(-1, width)
+    if feature_names is not None and set(feature_names) <= set(table.column_names):
+        columns = [table.column(name).to_numpy() for name in feature_names]
+        return np.column_stack(columns)
+    columns = [table.column(i).to_numpy() for i in range(table.num_columns)]
+    return np.column_stack(columns) if columns else np.empty((0, 0))
+
+
+def decode(fmt, body, headers, feature_names=None):
+    """Decode a binary request body into a NumPy array."""
+    if fmt == NPY:
+        return decode_npy(body)
+    if fmt == ARROW:
+        return decode_arrow(body, feature_names)
+    if fmt == RAW:
+        return decode_raw(body, headers)
+    raise UnsupportedMediaType(f'Unsupported Content-Type: {fmt}')
+
+
+def encode(fmt, predictions):
+    """Encode predictions in the request's format; returns (body, headers)."""
+    predictions = np.ascontiguousarray(predictions, dtype='<f8')
+    headers = {'X-Count': str(predictions.shape[0])}
+    if fmt == NPY:
+        buffer = io.BytesIO()
+        np.lib.format.write_array(buffer, predictions, allow_pickle=False)
+        return buffer.getvalue(), headers
+    if fmt == ARROW:
+        import pyarrow as pa
+        table = pa.table({'prediction': predictions})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), headers
+    if fmt == RAW:
+        headers.update({'X-Shape': str(predictions.shape[0]), 'X-Dtype': 'float64'})
+        return predictions.tobytes(), headers
+    raise UnsupportedMediaType(f'Unsupported Content-Type: {fmt}')
+
+
+def _unwrap_row(row):
+    # {"features": [...]} wraps a row; any other object is a {name: value} row
+    return row['features'] if isinstance(row, dict) and 'features' in row else row
+
+
+def _parse_ndjson_line(line):
+    return _unwrap_row(json.loads(line))
+
+
+def iter_ndjson_chunks(stream, chunk_rows):
+    """
+    Read newline-delimited feature rows from a file-like stream.
+
+    Each line is a JSON array of feature values, an object with a
+    "features" array, or a {name: value} object; blank lines are skipped. Yields lists of at most
+    `chunk_rows` rows, so only one chunk is held in memory. Raises
+    ValueError naming the first malformed line.
+    """
+    lines, numbers = [], []
+    for line_number, raw in enumerate(stream, start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        lines.append(line.decode('utf-8') if isinstance(line, bytes) else line)
+        numbers.append(line_number)
+        if len(lines) >= chunk_rows:
+            yield _parse_ndjson_chunk(lines, numbers)
+            lines, numbers = [], []
+    if lines:
+        yield _parse_ndjson_chunk(lines, numbers)
+
+
+def _parse_ndjson_chunk(lines, numbers):
+    try:
+        # One json.loads call per chunk is much cheaper than one per line
+        parsed = json.loads('[' + ','.join(lines) + ']')
+        return [_unwrap_row(row) for row in parsed]
+    except (ValueError, KeyError, TypeError):
+        pass
+    rows = []
+    for line_number, line in zip(numbers, lines):
+        try:
+            rows.append(_parse_ndjson_line(line))
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f'Invalid row at line {line_number}: {e}')
+    return rows
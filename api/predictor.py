@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+NumPy-only predictors used by the inference API.
+"""
+import hashlib
+import pickle
+
+import numpy as np
+
+from model_artifact import ArtifactError, detect_format, load_linear_model, load_model_artifact
+from model_format import load_compact_model
+
+
+class LinearPredictor:
+    """Scores rows with a single matrix-vector product."""
+
+    model_type = 'LinearRegression'
+
+    def __init__(self, coef, intercept, feature_names, dtype=np.float64, version=None):
+        self.dtype = np.dtype(dtype)
+        self.coef = np.ascontiguousarray(coef, dtype=self.dtype)
+        self.intercept = self.dtype.type(intercept)
+        self.feature_names = list(feature_names)
+        self.version = version
+
+    @property
+    def n_features(self):
+        return self.coef.shape[0]
+
+    @classmethod
+    def from_file(cls, model_path):
+        """
+        Load a memory-mappable `.bin` (src/model_artifact.py) or compact
+        `.npz` (src/model_format.py) artifact.
+
+        A `.bin` artifact is mapped, not read: the coefficients stay in the
+        page cache, shared by every worker serving the same file.
+        """
+        if detect_format(model_path) == 'mmap':
+            artifact = load_model_artifact(model_path)
+        else:
+            artifact = load_compact_model(model_path)
+        return cls(artifact['coef'], artifact['intercept'], artifact['feature_names'],
+                   artifact['dtype'], artifact['version'])
+
+    def predict(self, X):
+        """Return predictions for a 2-D array of shape (rows, n_features)."""
+        X = np.asarray(X, dtype=self.dtype)
+        return X @ self.coef + self.intercept
+
+
+class EstimatorPredictor:
+    """Adapter for pickled estimators that have no compact export."""
+
+    def __init__(self, estimator, version=None):
+        self.estimator = estimator
+        self.model_type = type(estimator).__name__
+        self.n_features = getattr(estimator, 'n_features_in_', None)
+        names = getattr(estimator, 'feature_names_in_', None)
+        if names is None:
+            names = [f'feature_{i+1}' for i in range(self.n_features or 0)]
+        self.feature_names = [str(n) for n in names]
+        self.version = version
+
+    def predict(self, X):
+        return self.estimator.predict(np.asarray(X, dtype=np.float64))
+
+
+def load_pickled_model(model_path, allow_pickle=False):
+    """
+    Load a pickled sklearn estimator; unpickling runs arbitrary code, so
+    this raises ArtifactError unless `allow_pickle` is set.
+
+    Linear models are read through model_artifact.load_linear_model and
+    served by a LinearPredictor, so that serving does not go through
+    sklearn's per-call input validation. Other estimators are wrapped.
+    """
+    try:
+        artifact = load_linear_model(model_path, allow_pickle)
+    except ArtifactError:
+        raise
+    except ValueError:
+        # Not linear (e.g. a polynomial sweep winner): serve the estimator itself
+        with open(model_path, 'rb') as f:
+            raw = f.read()
+        return EstimatorPredictor(pickle.loads(raw), version=hashlib.sha256(raw).hexdigest()[:12])
+    return LinearPredictor(artifact['coef'], artifact['intercept'], artifact['feature_names'],
+                           artifact['dtype'], artifact['version'])
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Per-process memory figures for the API workers.
+"""
+import os
+import resource
+
+_ROLLUP_FIELDS = {
+    'Rss': 'rss_bytes',
+    'Pss': 'pss_bytes',
+    'Shared_Clean': 'shared_clean_bytes',
+    'Shared_Dirty': 'shared_dirty_bytes',
+    'Private_Clean': 'private_clean_bytes',
+    'Private_Dirty': 'private_dirty_bytes',
+}
+
+
+def memory_usage(pid='self'):
+    """
+    Return memory usage of a process in bytes.
+
+    On Linux this reads /proc/<pid>/smaps_rollup, which splits RSS into
+    pages shared with other processes (e.g. the preforked master's model)
+    and private pages. PSS divides shared pages between their users, so the
+    PSS of all workers adds up to their real footprint. Elsewhere only the
+    peak RSS of the current process is available.
+    """
+    path = f'/proc/{pid}/smaps_rollup'
+    if os.path.exists(path):
+        usage = {}
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in _ROLLUP_FIELDS:
+                    usage[_ROLLUP_FIELDS[key]] = int(rest.split()[0]) * 1024
+        return usage
+    return {'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
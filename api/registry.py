@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Named, versioned models loaded on demand.
+
+Models live under a root directory as <root>/<name>/<version>/, each holding
+the same files as models/: model.bin or model.npz, plus an optional
+feature_schema.json. A model.pkl is only considered when the registry is
+created with `allow_pickle`, since unpickling runs arbitrary code. A version directory is treated as immutable,
+so publish a new version instead of rewriting one. Omitting the version
+selects the highest one (compared numerically where the names are numbers).
+
+A model is loaded the first time a request needs it. Concurrent requests
+for a model that is not loaded yet wait for a single load. Loaded models
+are kept in LRU order, and the least recently used are dropped once their
+artifact sizes add up to more than the memory budget. Requests that
+already hold an evicted model finish with it.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Preferred artifact first, as in app.model_source()
+MODEL_FILES = ('model.bin', 'model.npz')
+# Considered last, and only by registries created with allow_pickle=True
+PICKLE_FILE = 'model.pkl'
+SCHEMA_FILE = 'feature_schema.json'
+
+_SAFE_NAME = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_.-]*$')
+
+
+class ModelNotFound(LookupError):
+    """No model (or version) by that name in the registry (HTTP 404)."""
+
+
+def version_key(version):
+    """Sort key that orders 'v2' before 'v10' and '1.9' before '1.10'."""
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.split(r'(\d+)', version) if part]
+
+
+class _PendingLoad:
+    """A load in progress; followers wait on it instead of loading again."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.model = None
+        self.error = None
+
+
+class ModelRegistry:
+    """LRU cache of lazily loaded models under a memory budget."""
+
+    def __init__(self, root, load_fn, memory_budget_bytes=512 * 2**20, latest_ttl=5.0, clock=time.monotonic,
+                 allow_pickle=False):
+        self.root = root
+        self.load_fn = load_fn
+        self.model_files = MODEL_FILES + ((PICKLE_FILE,) if allow_pickle else ())
+        self.memory_budget_bytes = int(memory_budget_bytes)
+        self.latest_ttl = float(latest_ttl)
+        self.clock = clock
+        self._models = OrderedDict()
+        self._pending = {}
+        self._latest = {}
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.evictions = 0
+
+    def names(self):
+        try:
+            return sorted(n for n in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, n)))
+        except FileNotFoundError:
+            return []
+
+    def versions(self, name):
+        """Published versions of `name`, oldest first."""
+        directory = os.path.join(self.root, self._checked(name, 'model'))
+        try:
+            entries = os.listdir(directory)
+        except FileNotFoundError:
+            raise ModelNotFound(f"Unknown model '{name}'")
+        versions = [v for v in entries if _SAFE_NAME.match(v) and self._model_file(os.path.join(directory, v))]
+        return sorted(versions, key=version_key)
+
+    def cached_latest_version(self, name):
+        """The latest version of `name` if it was listed within `latest_ttl` seconds, else None."""
+        cached = self._latest.get(name)
+        if cached is not None and self.clock() - cached[1] < self.latest_ttl:
+            return cached[0]
+        return None
+
+    def latest_version(self, name):
+        """Highest published version of `name`, re-listed at most every `latest_ttl` seconds."""
+        cached = self.cached_latest_version(name)
+        if cached is not None:
+            return cached
+        now = self.clock()
+        versions = self.versions(name)
+        if not versions:
+            raise ModelNotFound(f"Model '{name}' has no published versions")
+        self._latest[name] = (versions[-1], now)
+        return versions[-1]
+
+    def peek(self, name, version=None, list_versions=True):
+        """
+        The model if it is already loaded, else None; never loads.
+
+        With `list_versions=False` the latest version is only taken from the
+        cache, so the call never touches the filesystem; a stale cache
+        returns None.
+        """
+        version = version or (self.latest_version(name) if list_versions else self.cached_latest_version(name))
+        if version is None:
+            return None
+        key = (name, version)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, name, version=None):
+        """Return the model, loading it (once, however many callers ask) if needed."""
+        key = (name, version or self.latest_version(name))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingLoad()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.model
+
+        try:
+            model, size = self._load(*key)
+        except BaseException as e:
+            pending.error = e
+            with self._lock:
+                self.failures += 1
+                del self._pending[key]
+            pending.done.set()
+            raise
+        pending.model = model
+        with self._lock:
+            self.loads += 1
+            del self._pending[key]
+            self._models[key] = (model, size)
+            self._loaded_bytes += size
+            self._evict()
+        pending.done.set()
+        return model
+
+    def _load(self, name, version):
+        directory = os.path.join(self.root, self._checked(name, 'model'), self._checked(version, 'version'))
+        model_path = self._model_file(directory)
+        if model_path is None:
+            raise ModelNotFound(f"Unknown version '{version}' of model '{name}'")
+        schema_path = os.path.join(directory, SCHEMA_FILE)
+        model = self.load_fn(model_path, schema_path)
+        # Artifact size stands in for the in-memory footprint
+        size = os.path.getsize(model_path)
+        if os.path.exists(schema_path):
+            size += os.path.getsize(schema_path)
+        return model, size
+
+    def _evict(self):
+        # Caller holds the lock; the newest model stays even if it alone exceeds the budget
+        while self._loaded_bytes > self.memory_budget_bytes and len(self._models) > 1:
+            _, (_, size) = self._models.popitem(last=False)
+            self._loaded_bytes -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _checked(value, kind):
+        # Names become path components, so refuse anything that could leave the root
+        if not isinstance(value, str) or not _SAFE_NAME.match(value):
+            raise ModelNotFound(f'Invalid {kind} name {value!r}')
+        return value
+
+    def _model_file(self, directory):
+        for filename in self.model_files:
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def stats(self):
+        with self._lock:
+            loaded = [{'name': n, 'version': v, 'bytes': size} for (n, v), (_, size) in self._models.items()]
+            return {
+                'root': self.root,
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'loaded_bytes': self._loaded_bytes,
+                'loaded': loaded,
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'coalesced': self.coalesced,
+                'failures': self.failures,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Background hot reload of the served model.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(paths):
+    """Cheap change detector: (path, mtime_ns, size) of each existing file."""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def content_digest(paths):
+    """SHA-256 of the existing files' contents, so a touch without an edit keeps the digest."""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        digest.update(path.encode() + b'\0' + str(len(data)).encode() + b'\0' + data)
+    return digest.hexdigest()
+
+
+def validate_model(candidate, expected_features=None):
+    """
+    Smoke-test a freshly loaded model before it takes traffic.
+
+    Raises ValueError if the feature count changed or a prediction on a
+    zero row is not a finite number.
+    """
+    n_features = candidate.n_features
+    if expected_features is not None and n_features != expected_features:
+        raise ValueError(f'Model expects {n_features} features, serving contract has {expected_features}')
+    prediction = np.asarray(candidate.predict(np.zeros((1, n_features))))
+    if prediction.shape != (1,) or not np.isfinite(prediction).all():
+        raise ValueError(f'Model returned {prediction!r} for a zero row')
+
+
+class ModelWatcher:
+    """
+    Poll model artifacts and swap in a new model when they change.
+
+    A change in mtime or size triggers a load on the watcher thread. The new
+    model is validated and then published through `swap_fn` with a single
+    reference assignment. Requests that already hold the old model finish
+    on it, and new requests pick up the new one. A load that fails (for
+    example a file caught half-written) is retried on the next poll, and the
+    current model keeps serving. Reloads with an unchanged content hash are
+    ignored, unless one of `sidecar_paths` (files loaded with the model, such
+    as its feature schema) changed content.
+    """
+
+    def __init__(self, paths, load_fn, swap_fn, current_fn, interval=5.0, expected_features=None,
+                 sidecar_paths=()):
+        self.sidecar_paths = list(sidecar_paths)
+        self.paths = list(paths) + [p for p in self.sidecar_paths if p not in paths]
+        self.load_fn = load_fn
+        self.swap_fn = swap_fn
+        self.current_fn = current_fn
+        self.interval = interval
+        self.expected_features = expected_features
+        self.reloads = 0
+        self.failures = 0
+        self._signature = file_signature(self.paths)
+        self._sidecars = content_digest(self.sidecar_paths)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """Reload if the artifacts changed; returns True if a new model was swapped in."""
+        signature = file_signature(self.paths)
+        if signature == self._signature:
+            return False
+        sidecars = content_digest(self.sidecar_paths)
+        try:
+            candidate = self.load_fn()
+            if candidate is None:
+                raise FileNotFoundError('No model artifact found')
+            validate_model(candidate, self.expected_features)
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Model reload failed, keeping current model: %s", e)
+            return False
+        self._signature = signature
+        current = self.current_fn()
+        if current is not None and current.version == candidate.version and sidecars == self._sidecars:
+            return False
+        self._sidecars = sidecars
+        self.swap_fn(candidate)
+        self.reloads += 1
+        logger.info("Swapped in model version %s", candidate.version)
+        return True
+
+    def stats(self):
+        return {'enabled': True, 'interval_seconds': self.interval,
+                'reloads': self.reloads, 'failures': self.failures}
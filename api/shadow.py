@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Shadow scoring of live traffic with a candidate model.
+
+After the primary model has answered, request handlers hand the inputs and
+primary predictions to ShadowScorer.submit. That is a non-blocking put on
+a bounded queue; when the queue is full the sample is dropped and counted
+rather than waited for. A background thread drains the queue in batches,
+scores them with the candidate and folds the candidate - primary deltas
+into streaming statistics. Requests only pay for the enqueue.
+"""
+import queue
+import random
+import threading
+
+import numpy as np
+
+
+class DeltaStats:
+    """Running count, mean, variance and extremes of prediction deltas."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum_abs = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.max_abs = 0.0
+
+    def update(self, deltas):
+        """Fold in a batch of deltas (merging the batch's moments, as in Chan et al.)."""
+        n = deltas.size
+        if n == 0:
+            return
+        mean = float(deltas.mean())
+        m2 = float(((deltas - mean) ** 2).sum())
+        total = self.count + n
+        shift = mean - self.mean
+        self.m2 += m2 + shift * shift * self.count * n / total
+        self.mean += shift * n / total
+        self.count = total
+        abs_deltas = np.abs(deltas)
+        self.sum_abs += float(abs_deltas.sum())
+        self.min = min(self.min, float(deltas.min()))
+        self.max = max(self.max, float(deltas.max()))
+        self.max_abs = max(self.max_abs, float(abs_deltas.max()))
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0,
+            'rmse': ((self.m2 + self.mean * self.mean * self.count) / self.count) ** 0.5,
+            'mean_abs': self.sum_abs / self.count,
+            'min': self.min,
+            'max': self.max,
+            'max_abs': self.max_abs,
+        }
+
+
+class ShadowScorer:
+    """
+    Score sampled requests with a candidate model off the request path.
+
+    `max_queue` bounds queued requests, `max_batch_rows` the rows scored per
+    candidate call, and `sample_rate` the fraction of requests shadowed.
+    """
+
+    def __init__(self, candidate, max_queue=1000, max_batch_rows=4096, sample_rate=1.0, metrics=None):
+        self.candidate = candidate
+        self.max_batch_rows = max(1, int(max_batch_rows))
+        self.sample_rate = float(sample_rate)
+        self.metrics = metrics
+        self.deltas = DeltaStats()
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._idle = threading.Condition(self._stats_lock)
+        self._in_flight = 0
+        self.submitted_rows = 0
+        self.dropped_rows = 0
+        self.scored_rows = 0
+        self.batches = 0
+        self.errors = 0
+        if metrics is not None:
+            metrics.shadow_enabled = True
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers get their own thread
+        if self._worker is None or not self._worker.is_alive():
+            with self._start_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                    self._worker.start()
+
+    def submit(self, features_array, primary_predictions):
+        """Queue a scored request for the candidate; returns False if it was sampled out or dropped."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        self._ensure_worker()
+        rows = len(features_array)
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            self._queue.put_nowait((features_array, primary_predictions))
+        except queue.Full:
+            with self._stats_lock:
+                self._in_flight -= 1
+                self.dropped_rows += rows
+                self._idle.notify_all()
+            if self.metrics is not None:
+                self.metrics.shadow_dropped_rows.inc(rows)
+            return False
+        with self._stats_lock:
+            self.submitted_rows += rows
+        return True
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        while rows < self.max_batch_rows:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                X = batch[0][0] if len(batch) == 1 else np.concatenate([x for x, _ in batch])
+                primary = np.concatenate([np.ravel(p) for _, p in batch])
+                deltas = np.asarray(self.candidate.predict(X), dtype=np.float64).ravel() - primary
+            except Exception:
+                with self._stats_lock:
+                    self.errors += 1
+                if self.metrics is not None:
+                    self.metrics.shadow_errors.inc()
+            else:
+                with self._stats_lock:
+                    self.deltas.update(deltas)
+                    self.scored_rows += deltas.size
+                    self.batches += 1
+                if self.metrics is not None:
+                    self.metrics.observe_shadow(np.abs(deltas))
+            with self._stats_lock:
+                self._in_flight -= len(batch)
+                self._idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until everything queued so far has been scored; returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'enabled': True,
+                'candidate_version': getattr(self.candidate, 'version', None),
+                'sample_rate': self.sample_rate,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'submitted_rows': self.submitted_rows,
+                'dropped_rows': self.dropped_rows,
+                'scored_rows': self.scored_rows,
+                'batches': self.batches,
+                'errors': self.errors,
+                'delta': self.deltas.summary(),
+            }
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Request validation compiled from the model's feature schema.
+
+The validator is built once per model. It holds the feature order, a
+name-to-column map and the allowed ranges as NumPy arrays. A batch is
+checked with one vectorized comparison against those arrays. Per-row
+error details are only computed after that check has failed, so valid
+requests never pay for them.
+"""
+import numpy as np
+
+from feature_schema import feature_names, schema_from_names
+
+# Row-level problems listed in an error response; the total is always reported
+MAX_REPORTED_ERRORS = 20
+
+_FLOAT_MAX = np.finfo(np.float64).max
+
+
+class InvalidInput(ValueError):
+    """The request body failed validation (HTTP 400)."""
+
+    def __init__(self, message, details=None):
+        super().__init__(message)
+        self.details = details
+
+
+def error_body(error):
+    """JSON body of a 400 response, with per-row details when there are any."""
+    body = {'error': str(error)}
+    details = getattr(error, 'details', None)
+    if details:
+        body['details'] = details
+    return body
+
+
+class FeatureValidator:
+    """Converts and checks request rows against one feature schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.names = feature_names(schema)
+        self.n_features = len(self.names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        # Unbounded sides use the float64 limits, so inf and NaN still fail
+        self.lower = np.array([_bound(f.get('min'), -_FLOAT_MAX) for f in schema['features']])
+        self.upper = np.array([_bound(f.get('max'), _FLOAT_MAX) for f in schema['features']])
+
+    @classmethod
+    def for_names(cls, names):
+        """A validator that checks only feature count, names and finiteness."""
+        return cls(schema_from_names(names))
+
+    def example(self):
+        return '[' + ', '.join(self.names) + ']'
+
+    def rows_to_array(self, rows):
+        """
+        Convert JSON rows to a float64 array in schema order.
+
+        Rows are either positional lists or {name: value} objects; a batch
+        must use one form throughout.
+        """
+        if rows and isinstance(rows[0], dict):
+            names = self.names
+            try:
+                values = [[row[name] for name in names] for row in rows]
+            except (KeyError, TypeError):
+                raise self._named_row_error(rows)
+            if sum(map(len, rows)) != len(rows) * self.n_features:
+                raise self._named_row_error(rows)
+        else:
+            values = rows
+        try:
+            return np.asarray(values, dtype=np.float64)
+        except (ValueError, TypeError):
+            raise InvalidInput(f'Each sample must be a list of {self.n_features} numbers or an object '
+                               f'with fields {self.names}')
+
+    def reorder(self, array, column_names):
+        """Reorder the columns of `array`, named by `column_names`, into schema order."""
+        column_names = [str(n) for n in column_names]
+        missing = [n for n in self.names if n not in column_names]
+        unknown = [n for n in column_names if n not in self.index]
+        if missing or unknown or len(column_names) != len(set(column_names)):
+            raise InvalidInput('feature_names must list each model feature exactly once',
+                               {'missing': missing, 'unknown': unknown, 'expected': self.names})
+        if np.ndim(array) != 2 or np.shape(array)[1] != len(column_names):
+            raise InvalidInput(f'Each sample must have {len(column_names)} values to match feature_names')
+        order = [column_names.index(n) for n in self.names]
+        if order == list(range(self.n_features)):
+            return array
+        return np.asarray(array)[:, order]
+
+    def check(self, array, shape_message=None, row_offset=0, positional=True):
+        """
+        Validate a 2-D batch; returns it unchanged or raises InvalidInput.
+
+        `row_offset` is added to reported row numbers (for streamed chunks).
+        `positional` enables the column-order hint for unnamed input.
+        """
+        if array.ndim != 2 or array.shape[1] != self.n_features:
+            raise InvalidInput(shape_message or f'Each sample must have {self.n_features} features')
+        ok = (array >= self.lower) & (array <= self.upper)
+        if ok.all():
+            return array
+        raise self._range_error(array, ok, row_offset, positional)
+
+    def _range_error(self, array, ok, row_offset, positional):
+        bad_rows, bad_cols = np.nonzero(~ok)
+        details = []
+        for row, col in zip(bad_rows[:MAX_REPORTED_ERRORS].tolist(), bad_cols[:MAX_REPORTED_ERRORS].tolist()):
+            value = float(array[row, col])
+            if not np.isfinite(value):
+                reason = 'not a finite number'
+            elif value < self.lower[col]:
+                reason = f'below minimum {self.lower[col]:.6g}'
+            else:
+                reason = f'above maximum {self.upper[col]:.6g}'
+            details.append({'row': row + row_offset, 'feature': self.names[col], 'value': _json_float(value),
+                            'reason': reason})
+        invalid_rows = int(np.unique(bad_rows).size)
+        message = f'{invalid_rows} sample(s) have feature values outside the allowed range'
+        hint = self._order_hint(array, np.unique(bad_cols)) if positional else None
+        if hint:
+            message += f'; {hint}'
+        return InvalidInput(message, details)
+
+    def _order_hint(self, array, bad_cols):
+        """Name features whose ranges the offending columns would fit (likely swapped columns)."""
+        finite = np.isfinite(array).all(axis=0)
+        col_min, col_max = array.min(axis=0), array.max(axis=0)
+        swaps = []
+        for col in bad_cols.tolist():
+            if not finite[col]:
+                continue
+            fits = np.nonzero((col_min[col] >= self.lower) & (col_max[col] <= self.upper))[0]
+            fits = [self.names[j] for j in fits.tolist() if j != col]
+            if fits:
+                swaps.append(f"values given as '{self.names[col]}' fit {fits}")
+        if not swaps:
+            return None
+        return 'columns may be out of order (expected ' + ', '.join(self.names) + '): ' + '; '.join(swaps)
+
+    def _named_row_error(self, rows):
+        """Describe the first few malformed {name: value} rows."""
+        details = []
+        bad = 0
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                problem = {'row': i, 'reason': 'mixes positional and named rows'}
+            else:
+                missing = [n for n in self.names if n not in row]
+                unknown = [n for n in row if n not in self.index]
+                if not missing and not unknown:
+                    continue
+                problem = {'row': i, 'missing': missing, 'unknown': unknown}
+            bad += 1
+            if len(details) < MAX_REPORTED_ERRORS:
+                details.append(problem)
+        return InvalidInput(f'{bad} sample(s) do not match the feature names {self.names}', details)
+
+
+def _bound(value, default):
+    return float(value) if value is not None else default
+
+
+def _json_float(value):
+    return value if np.isfinite(value) else str(value)
@@ -5,14 +5,19 @@ Use this on EC2 instance to test S3 connectivity.
 """
 
 import boto3
-import pandas as pd
 import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from s3_download import ChecksumMismatch, fetch  # noqa: E402
+
 # S3 Configuration
 BUCKET_NAME = 'mlops-test-ass'
 OBJECT_KEY = 'dataset.csv'
 LOCAL_PATH = 'data/dataset.csv'
+# Concurrent byte-range requests per download
+DOWNLOAD_WORKERS = int(os.environ.get('S3_DOWNLOAD_WORKERS', '8'))
 
 def download_from_s3():
     """Download dataset from S3 bucket."""
@@ -20,21 +25,25 @@ def download_from_s3():
         # Create S3 client
         s3_client = boto3.client('s3', region_name='eu-north-1')
         
-        # Create local directory if it doesn't exist
-        os.makedirs(os.path.dirname(LOCAL_PATH), exist_ok=True)
-        
-        # Download file
-        print(f"Downloading {OBJECT_KEY} from s3://{BUCKET_NAME}...")
-        s3_client.download_file(BUCKET_NAME, OBJECT_KEY, LOCAL_PATH)
-        
-        print(f"✅ Successfully downloaded to {LOCAL_PATH}")
+        # Download file (skipped if the local copy matches the remote ETag)
+        print(f"Fetching {OBJECT_KEY} from s3://{BUCKET_NAME}...")
+        result = fetch(s3_client, BUCKET_NAME, OBJECT_KEY, LOCAL_PATH, workers=DOWNLOAD_WORKERS)
         
-        # Verify file
-        df = pd.read_csv(LOCAL_PATH)
-        print(f"✅ Dataset verified: {df.shape[0]} rows, {df.shape[1]} columns")
+        if result['status'] == 'unchanged':
+            print(f"✅ {LOCAL_PATH} is up to date (ETag {result['etag']})")
+        else:
+            resumed = f", {result['resumed_parts']} resumed" if result['resumed_parts'] else ''
+            print(f"✅ Successfully downloaded to {LOCAL_PATH} ({result['parts']} parts{resumed})")
+            if result['verified']:
+                print(f"✅ Checksum verified against ETag {result['etag']}")
+            else:
+                print(f"⚠️  ETag {result['etag']} is not an MD5; content not verified")
         
         return True
         
+    except ChecksumMismatch as e:
+        print(f"❌ Checksum mismatch: {e}")
+        return False
     except ClientError as e:
         print(f"❌ Error downloading from S3: {e}")
         return False
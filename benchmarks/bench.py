@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the training pipeline and the inference API.
+
+Training steps (load_data, prepare_data, train_model, evaluate_model,
+save_model) run on generated datasets for each row and feature count. The
+Flask endpoints run in-process through the test client for single and batch
+requests. Linear models of growing size are saved and loaded in every
+artifact format (pickle, .npz, memory-mapped .bin). Each case records wall
+time, throughput, latency percentiles and peak traced memory; model loads
+also record the RSS and private-memory growth of this process.
+
+Results are written as JSON. A run can be saved as the baseline and later
+runs checked against it; --check exits non-zero when any case regresses
+past the tolerance. Timings are only comparable on the same machine, so
+record the baseline where the check runs (e.g. the CI runner).
+
+    python benchmarks/bench.py --save-baseline
+    python benchmarks/bench.py --check --tolerance 0.25
+    python benchmarks/bench.py --rows 1e3,1e5,1e7 --features 5,50
+    python benchmarks/bench.py --rows '' --batch-sizes '' --model-sizes 1e3,1e6,1e7
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'api'))
+
+from dataset_cache import load_frame  # noqa: E402
+from datagen import generate_dataset  # noqa: E402
+from model_artifact import FORMATS, load_model_artifact  # noqa: E402
+from model_format import save_compact_model  # noqa: E402
+from train import evaluate_model, load_data, model_from_coefficients, prepare_data, save_model, train_model  # noqa: E402
+import procinfo  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baseline.json'
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+DEFAULT_FEATURES = [5, 20]
+DEFAULT_BATCH_SIZES = [1, 100, 1_000, 10_000]
+# Coefficient counts of the models saved and loaded in each artifact format
+DEFAULT_MODEL_SIZES = [1_000, 100_000, 1_000_000]
+# The API serves a 5-feature model
+API_FEATURES = 5
+
+# Metrics that get worse when they go up, and when they go down
+LOWER_IS_BETTER = ('seconds', 'p50_ms', 'p95_ms', 'p99_ms', 'peak_memory_bytes')
+HIGHER_IS_BETTER = ('rows_per_second', 'requests_per_second')
+# Timing changes smaller than this are scheduler noise and never fail a check
+MIN_DELTA_MS = 1.0
+
+
+def percentiles(samples_ms):
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def measure(fn, repeat=5):
+    """
+    Time `fn` `repeat` times, then once more under tracemalloc for peak memory.
+
+    Returns (result of the last call, fastest seconds per call, peak bytes).
+    The fastest run is the least disturbed by other load on the machine, so
+    it is the most stable figure to gate on. Timing runs are untraced
+    because tracemalloc slows allocation-heavy code.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, min(times), peak
+
+
+def bench_training(workdir, n_rows, n_features, repeat=5):
+    """Benchmark each training step on one generated dataset."""
+    data_path = generate_dataset(os.path.join(workdir, f'data_{n_rows}_{n_features}.csv'), rows=n_rows,
+                                 n_features=n_features)
+    model_path = os.path.join(workdir, 'model.pkl')
+    compact_path = os.path.join(workdir, 'model.npz')
+    cache_dir = os.path.join(workdir, 'cache')
+    tag = f'[rows={n_rows},features={n_features}]'
+
+    load_frame(data_path, cache_dir=cache_dir)  # build the binary cache outside the timed region
+
+    steps = [
+        ('load_data.csv', lambda: load_data(data_path, use_cache=False)),
+        ('load_data.cached', lambda: load_frame(data_path, cache_dir=cache_dir)),
+    ]
+    results = {}
+    df = None
+    for name, fn in steps:
+        df, seconds, peak = measure(fn, repeat)
+        results[name + tag] = _training_result(seconds, peak, n_rows)
+
+    (X, y), seconds, peak = measure(lambda: prepare_data(df), repeat)
+    results['prepare_data' + tag] = _training_result(seconds, peak, n_rows)
+
+    model, seconds, peak = measure(lambda: train_model(X, y), repeat)
+    results['train_model' + tag] = _training_result(seconds, peak, n_rows)
+
+    _, seconds, peak = measure(lambda: evaluate_model(model, X, y), repeat)
+    results['evaluate_model' + tag] = _training_result(seconds, peak, n_rows)
+
+    _, seconds, peak = measure(lambda: save_model(model, model_path), repeat)
+    results['save_model' + tag] = _training_result(seconds, peak, n_rows)
+
+    _, seconds, peak = measure(lambda: save_compact_model(model, compact_path), repeat)
+    results['save_compact_model' + tag] = _training_result(seconds, peak, n_rows)
+    return results
+
+
+def _training_result(seconds, peak, n_rows):
+    return {
+        'seconds': seconds,
+        'rows_per_second': n_rows / seconds if seconds > 0 else float('inf'),
+        'peak_memory_bytes': int(peak),
+    }
+
+
+def bench_api(workdir, batch_sizes, requests_per_case=200, max_rows_per_case=200_000):
+    """Benchmark /predict and /predict/batch in-process through the Flask test client."""
+    import app as api
+    from predictor import LinearPredictor
+
+    data_path = generate_dataset(os.path.join(workdir, 'api_data.csv'), rows=1_000, n_features=API_FEATURES)
+    X, y = prepare_data(load_data(data_path, use_cache=False))
+    model_path = os.path.join(workdir, 'api_model.npz')
+    save_compact_model(train_model(X, y), model_path)
+
+    saved = api.model, api.prediction_cache, api.batcher
+    # Measure the scoring path itself, not repeated-row cache hits
+    api.model, api.prediction_cache, api.batcher = LinearPredictor.from_file(model_path), None, None
+    client = api.app.test_client()
+    rng = np.random.default_rng(0)
+    results = {}
+    try:
+        for batch_size in batch_sizes:
+            n_requests = max(5, min(requests_per_case, max_rows_per_case // batch_size))
+            if batch_size == 1:
+                name, path = 'api./predict', '/predict'
+                payloads = [{'features': row.tolist()} for row in rng.standard_normal((n_requests, API_FEATURES))]
+            else:
+                name, path = f'api./predict/batch[batch={batch_size}]', '/predict/batch'
+                payloads = [{'features': rng.standard_normal((batch_size, API_FEATURES)).tolist()}
+                            for _ in range(n_requests)]
+            for payload in payloads[:3]:  # warm-up
+                client.post(path, json=payload)
+
+            latencies = []
+            gc.collect()
+            start = time.perf_counter()
+            for payload in payloads:
+                t0 = time.perf_counter()
+                response = client.post(path, json=payload)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)}')
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            try:
+                client.post(path, json=payloads[0])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            results[name] = dict(
+                percentiles(latencies),
+                requests_per_second=n_requests / elapsed,
+                rows_per_second=n_requests * batch_size / elapsed,
+                peak_memory_bytes=int(peak),
+            )
+    finally:
+        api.model, api.prediction_cache, api.batcher = saved
+    return results
+
+
+def _process_memory():
+    """(RSS, private dirty) bytes of this process; (peak RSS, 0) where smaps is unavailable."""
+    usage = procinfo.memory_usage()
+    return usage.get('rss_bytes', usage.get('max_rss_bytes', 0)), usage.get('private_dirty_bytes', 0)
+
+
+def bench_model_formats(workdir, sizes, repeat=5):
+    """
+    Save and load a linear model of each size in every artifact format.
+
+    Load cases also record how much this process's RSS and private memory
+    grow while the loaded model is held. Mapped pages are shared with the
+    page cache (and other workers) rather than private.
+    """
+    rng = np.random.default_rng(0)
+    loaders = {name: load for name, (_, load) in FORMATS.items()}
+    loaders['mmap.noverify'] = lambda path: load_model_artifact(path, verify=False)
+    results = {}
+    for n_features in sizes:
+        names = [f'feature_{i+1}' for i in range(n_features)]
+        model = model_from_coefficients(rng.standard_normal(n_features), 0.5, names)
+        paths = {}
+        for fmt, (save, _) in FORMATS.items():
+            paths[fmt] = os.path.join(workdir, f'model_{n_features}.{fmt}')
+            _, seconds, peak = measure(lambda: save(model, paths[fmt]), repeat)
+            results[f'model.save[format={fmt},features={n_features}]'] = {
+                'seconds': seconds,
+                'peak_memory_bytes': int(peak),
+                'file_bytes': os.path.getsize(paths[fmt]),
+            }
+        for name, load in loaders.items():
+            path = paths[name.split('.')[0]]
+            _, seconds, peak = measure(lambda: load(path), repeat)
+            gc.collect()
+            rss, private = _process_memory()
+            loaded = load(path)
+            rss_after, private_after = _process_memory()
+            del loaded
+            results[f'model.load[format={name},features={n_features}]'] = {
+                'seconds': seconds,
+                'peak_memory_bytes': int(peak),
+                'rss_delta_bytes': rss_after - rss,
+                'private_delta_bytes': private_after - private,
+            }
+    return results
+
+
+def _millis(metrics, metric):
+    """Timing of a case in milliseconds, used for the noise floor."""
+    if metric.endswith('_ms'):
+        return metrics[metric]
+    return metrics['seconds'] * 1000 if 'seconds' in metrics else metrics.get('p50_ms', 0.0)
+
+
+def compare(current, baseline, tolerance=0.25, memory_tolerance=None, min_delta_ms=MIN_DELTA_MS):
+    """
+    Compare a run against a baseline.
+
+    Returns a list of (case, metric, baseline value, current value, change)
+    for every metric that got worse by more than the tolerance (a fraction,
+    0.25 = 25%). Timing and throughput only count as regressed when the
+    case's timing also grew by at least `min_delta_ms`, so sub-millisecond
+    jitter does not fail the check. Cases missing from either side are ignored.
+    """
+    memory_tolerance = tolerance if memory_tolerance is None else memory_tolerance
+    regressions = []
+    for case, base_metrics in baseline.get('cases', {}).items():
+        metrics = current.get('cases', {}).get(case)
+        if metrics is None:
+            continue
+        for metric, base in base_metrics.items():
+            value = metrics.get(metric)
+            if value is None or not base:
+                continue
+            limit = memory_tolerance if metric == 'peak_memory_bytes' else tolerance
+            if metric in LOWER_IS_BETTER:
+                change = value / base - 1
+            elif metric in HIGHER_IS_BETTER:
+                change = base / value - 1 if value else float('inf')
+            else:
+                continue
+            if metric != 'peak_memory_bytes' and _millis(metrics, metric) - _millis(base_metrics, metric) < min_delta_ms:
+                continue
+            if change > limit:
+                regressions.append((case, metric, base, value, change))
+    return regressions
+
+
+def run(rows, features, batch_sizes, repeat=5, model_sizes=()):
+    """Run all benchmarks and return the results document."""
+    cases = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in rows:
+            for n_features in features:
+                print(f"Training benchmarks: {n_rows} rows x {n_features} features", file=sys.stderr)
+                cases.update(bench_training(workdir, n_rows, n_features, repeat))
+        if batch_sizes:
+            print(f"API benchmarks: batch sizes {batch_sizes}", file=sys.stderr)
+            cases.update(bench_api(workdir, batch_sizes))
+        if model_sizes:
+            print(f"Model format benchmarks: sizes {model_sizes}", file=sys.stderr)
+            cases.update(bench_model_formats(workdir, model_sizes, repeat))
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+        },
+        'cases': cases,
+    }
+
+
+def _int_list(text):
+    return [int(float(v)) for v in text.split(',') if v]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark training and inference.')
+    parser.add_argument('--rows', type=_int_list, default=DEFAULT_ROWS, help='Comma-separated row counts (1e7 accepted)')
+    parser.add_argument('--features', type=_int_list, default=DEFAULT_FEATURES, help='Comma-separated feature counts')
+    parser.add_argument('--batch-sizes', type=_int_list, default=DEFAULT_BATCH_SIZES,
+                        help='Comma-separated API batch sizes (1 means /predict); empty to skip the API')
+    parser.add_argument('--model-sizes', type=_int_list, default=DEFAULT_MODEL_SIZES,
+                        help='Comma-separated model coefficient counts for the artifact formats; empty to skip')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per training step (fastest is kept)')
+    parser.add_argument('--output', default=None, help='Write this run\'s results to a JSON file')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--check', action='store_true', help='Fail if any case regressed past the tolerance')
+    parser.add_argument('--tolerance', type=float, default=float(os.environ.get('BENCH_TOLERANCE', '0.25')),
+                        help='Allowed slowdown as a fraction (default 0.25)')
+    parser.add_argument('--memory-tolerance', type=float, default=None,
+                        help='Allowed peak memory growth as a fraction (default: --tolerance)')
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_MS,
+                        help='Ignore timing regressions smaller than this many milliseconds')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.rows, args.features, args.batch_sizes, args.repeat, args.model_sizes)
+
+    for case, metrics in results['cases'].items():
+        summary = ', '.join(f'{k}={v:.4g}' for k, v in metrics.items())
+        print(f"{case:<60} {summary}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; record one on this machine with --save-baseline")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.memory_tolerance, args.min_delta_ms)
+        for case, metric, base, value, change in regressions:
+            print(f"REGRESSION {case} {metric}: {base:.4g} -> {value:.4g} ({change:+.0%})")
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} tolerance")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} tolerance")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Load generator and capacity report for the inference API.
+
+Drives a running server (Flask dev server, gunicorn, uvicorn) on localhost
+with a mix of /predict and /predict/batch requests, in one of two modes:
+
+- open loop (--rate): requests are sent on a fixed schedule whether or not
+  earlier ones have finished. Latency is measured from the scheduled send
+  time, so queueing delay behind a saturated server is included rather
+  than hidden (no coordinated omission).
+- closed loop (--concurrency): N clients each send their next request as
+  soon as the previous one returns.
+
+With --find-saturation the rate (or concurrency) is stepped up until the
+server stops keeping up, and the last step that met the targets is
+reported as the capacity of this server configuration.
+
+    gunicorn app:app                           # in api/
+    python benchmarks/loadgen.py --rate 200 --duration 10
+    python benchmarks/loadgen.py --concurrency 8 --batch-fraction 0.2 --batch-size 500
+    python benchmarks/loadgen.py --find-saturation --p99-slo-ms 50 --output capacity.json
+"""
+import argparse
+import http.client
+import json
+import queue
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+N_FEATURES = 5
+# Distinct pre-encoded request bodies per kind, so encoding stays off the send path
+PAYLOAD_VARIANTS = 64
+
+
+def build_payloads(batch_size, n_features=N_FEATURES, variants=PAYLOAD_VARIANTS, seed=0):
+    """Pre-encode request bodies: {'single': [...], 'batch': [...]}."""
+    rng = np.random.default_rng(seed)
+    single = [json.dumps({'features': row.tolist()}).encode('utf-8')
+              for row in rng.standard_normal((variants, n_features))]
+    batch = [json.dumps({'features': rng.standard_normal((batch_size, n_features)).tolist()}).encode('utf-8')
+             for _ in range(variants)]
+    return {'single': single, 'batch': batch}
+
+
+class Client:
+    """One keep-alive HTTP connection, reopened after errors or server closes."""
+
+    def __init__(self, host, port, timeout=30.0):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.conn = None
+
+    def post(self, path, body):
+        """Send a JSON POST and return the HTTP status (0 on connection errors)."""
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request('POST', path, body, {'Content-Type': 'application/json'})
+                response = self.conn.getresponse()
+                response.read()
+                if response.will_close:
+                    self.close()
+                return response.status
+            except (ConnectionError, http.client.HTTPException, OSError):
+                self.close()
+                if attempt:
+                    return 0
+        return 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class Recorder:
+    """Collects (kind, latency seconds, status) samples from client threads."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, kind, latency, status):
+        with self._lock:
+            self.samples.append((kind, latency, status))
+
+
+def _schedule(n, batch_fraction, seed):
+    """Request kinds for the run, drawn once so the mix is reproducible."""
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random(n) < batch_fraction, 'batch', 'single').tolist()
+
+
+PATHS = {'single': '/predict', 'batch': '/predict/batch'}
+
+
+def run_open_loop(url, rate, duration, payloads, batch_fraction=0.0, max_in_flight=64, seed=0):
+    """
+    Send `rate` requests per second for `duration` seconds.
+
+    Up to `max_in_flight` requests are outstanding at once; beyond that,
+    scheduled requests wait in a queue and the wait counts as latency.
+    """
+    parts = urlsplit(url)
+    n = max(1, int(rate * duration))
+    kinds = _schedule(n, batch_fraction, seed)
+    jobs = queue.Queue()
+    recorder = Recorder()
+
+    def worker():
+        client = Client(parts.hostname, parts.port or 80)
+        while True:
+            job = jobs.get()
+            if job is None:
+                client.close()
+                return
+            i, scheduled = job
+            kind = kinds[i]
+            status = client.post(PATHS[kind], payloads[kind][i % len(payloads[kind])])
+            recorder.add(kind, time.perf_counter() - scheduled, status)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_in_flight)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    for i in range(n):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put((i, scheduled))
+    for _ in threads:
+        jobs.put(None)
+    for t in threads:
+        t.join()
+    return summarize(recorder.samples, time.perf_counter() - start, mode='open', target=rate)
+
+
+def run_closed_loop(url, concurrency, duration, payloads, batch_fraction=0.0, seed=0):
+    """Run `concurrency` clients back to back for `duration` seconds."""
+    parts = urlsplit(url)
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        client = Client(parts.hostname, parts.port or 80)
+        kinds = _schedule(4096, batch_fraction, seed + worker_id)
+        i = 0
+        while time.perf_counter() < deadline:
+            kind = kinds[i % len(kinds)]
+            sent = time.perf_counter()
+            status = client.post(PATHS[kind], payloads[kind][i % len(payloads[kind])])
+            recorder.add(kind, time.perf_counter() - sent, status)
+            i += 1
+        client.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(recorder.samples, time.perf_counter() - start, mode='closed', target=concurrency)
+
+
+def _latency_summary(latencies, statuses):
+    if not len(latencies):
+        return {'requests': 0}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    errors = int(np.count_nonzero(np.asarray(statuses) != 200))
+    return {
+        'requests': int(len(ms)),
+        'errors': errors,
+        'error_rate': errors / len(ms),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(ms.max()),
+    }
+
+
+def summarize(samples, elapsed, mode, target):
+    """Throughput, latency percentiles and error rate of a run, overall and per kind."""
+    report = {'mode': mode, 'target': target, 'elapsed_seconds': elapsed}
+    kinds = [s[0] for s in samples]
+    latencies = [s[1] for s in samples]
+    statuses = [s[2] for s in samples]
+    report.update(_latency_summary(latencies, statuses))
+    ok = sum(1 for s in statuses if s == 200)
+    report['throughput_rps'] = ok / elapsed if elapsed > 0 else 0.0
+    report['by_kind'] = {}
+    for kind in ('single', 'batch'):
+        idx = [i for i, k in enumerate(kinds) if k == kind]
+        if idx:
+            report['by_kind'][kind] = _latency_summary([latencies[i] for i in idx], [statuses[i] for i in idx])
+    return report
+
+
+def meets_targets(report, p99_slo_ms, max_error_rate, min_goodput=0.95):
+    """
+    Whether a step was sustained: error rate and p99 within limits and, for
+    open-loop runs, at least `min_goodput` of the offered rate completed.
+    """
+    if report.get('requests', 0) == 0:
+        return False
+    if report['error_rate'] > max_error_rate or report['p99_ms'] > p99_slo_ms:
+        return False
+    if report['mode'] == 'open' and report['throughput_rps'] < min_goodput * report['target']:
+        return False
+    return True
+
+
+def find_saturation(run_step, start, factor, max_steps, p99_slo_ms, max_error_rate, min_gain=0.05):
+    """
+    Step the load up by `factor` until a step misses the targets.
+
+    `run_step(level)` runs one step and returns its report. In closed loop
+    a step that adds less than `min_gain` throughput also ends the search:
+    the server is saturated even if latency is still within the SLO.
+    Returns (capacity report or None, list of step reports).
+    """
+    steps = []
+    best = None
+    level = start
+    for _ in range(max_steps):
+        report = run_step(level)
+        report['sustained'] = meets_targets(report, p99_slo_ms, max_error_rate)
+        steps.append(report)
+        print(f"  {report['mode']} {level:>8g}: {report['throughput_rps']:8.1f} rps  "
+              f"p99={report.get('p99_ms', float('nan')):.1f}ms  errors={report.get('error_rate', 0):.1%}  "
+              f"{'ok' if report['sustained'] else 'saturated'}", file=sys.stderr)
+        if not report['sustained']:
+            break
+        if best is not None and report['mode'] == 'closed' and \
+                report['throughput_rps'] < best['throughput_rps'] * (1 + min_gain):
+            break
+        best = report
+        level = level * factor if report['mode'] == 'open' else max(level + 1, int(round(level * factor)))
+    return best, steps
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the inference API.')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--rate', type=float, help='Open loop: requests per second')
+    load.add_argument('--concurrency', type=int, help='Closed loop: concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run (or per saturation step)')
+    parser.add_argument('--batch-fraction', type=float, default=0.0, help='Fraction of requests sent to /predict/batch')
+    parser.add_argument('--batch-size', type=int, default=100, help='Rows per /predict/batch request')
+    parser.add_argument('--max-in-flight', type=int, default=64, help='Open loop: client threads')
+    parser.add_argument('--find-saturation', action='store_true', help='Step the load up until the server saturates')
+    parser.add_argument('--factor', type=float, default=1.5, help='Load multiplier between saturation steps')
+    parser.add_argument('--max-steps', type=int, default=12)
+    parser.add_argument('--p99-slo-ms', type=float, default=100.0, help='p99 latency a sustained step must meet')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--output', default=None, help='Write the report as JSON')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def _print_report(report):
+    print(f"{report['mode']}-loop target={report['target']:g}: {report['requests']} requests "
+          f"in {report['elapsed_seconds']:.1f}s, {report['throughput_rps']:.1f} rps, "
+          f"errors {report.get('error_rate', 0):.2%}")
+    if report['requests']:
+        print(f"  latency ms: p50={report['p50_ms']:.2f} p95={report['p95_ms']:.2f} "
+              f"p99={report['p99_ms']:.2f} max={report['max_ms']:.2f}")
+    for kind, s in report['by_kind'].items():
+        print(f"  {kind:<6} {s['requests']} requests, p99={s['p99_ms']:.2f}ms, errors {s['error_rate']:.2%}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    payloads = build_payloads(args.batch_size, seed=args.seed)
+    config = {'url': args.url, 'batch_fraction': args.batch_fraction, 'batch_size': args.batch_size,
+              'duration': args.duration}
+
+    if args.concurrency is not None or (args.rate is None and args.find_saturation):
+        def run_step(level):
+            return run_closed_loop(args.url, int(level), args.duration, payloads, args.batch_fraction, args.seed)
+        start = args.concurrency or 1
+    else:
+        def run_step(level):
+            return run_open_loop(args.url, level, args.duration, payloads, args.batch_fraction,
+                                 args.max_in_flight, args.seed)
+        start = args.rate if args.rate is not None else 50.0
+
+    if args.find_saturation:
+        capacity, steps = find_saturation(run_step, start, args.factor, args.max_steps,
+                                          args.p99_slo_ms, args.max_error_rate)
+        result = dict(config, capacity=capacity, steps=steps,
+                      p99_slo_ms=args.p99_slo_ms, max_error_rate=args.max_error_rate)
+        if capacity is None:
+            print("Saturated at the first step; lower --rate/--concurrency")
+        else:
+            print(f"Capacity: {capacity['throughput_rps']:.1f} rps at {capacity['mode']}-loop "
+                  f"target {capacity['target']:g} (p99 {capacity['p99_ms']:.1f}ms)")
+            _print_report(capacity)
+    else:
+        result = dict(config, **run_step(start))
+        _print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,58 @@
 #!/usr/bin/env python3
 """
 Script to create a sample dataset for the MLOps project.
+
+By default writes the 1000 x 5 sample to data/dataset.csv. For load and
+scale testing, any size can be generated in parallel, e.g.
+
+    python create_dataset.py --rows 100000000 --features 20 --workers 8 \\
+        --partitioned --output data/partitions --format parquet
 """
-import pandas as pd
-import numpy as np
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+
+from datagen import DEFAULT_CHUNK_ROWS, FORMATS, generate_dataset, write_partitions  # noqa: E402
+
+
+def _floats(text):
+    return [float(v) for v in text.split(',') if v]
+
 
-# Set random seed for reproducibility
-np.random.seed(42)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic regression dataset.')
+    parser.add_argument('--rows', type=lambda v: int(float(v)), default=1000, help='Number of rows (1e8 accepted)')
+    parser.add_argument('--features', type=int, default=5)
+    parser.add_argument('--noise', type=float, default=0.1, help='Standard deviation of the target noise')
+    parser.add_argument('--coefficients', type=_floats, default=None,
+                        help='Comma-separated feature weights (default 2,1.5,-0.5, then zeros)')
+    parser.add_argument('--intercept', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows per chunk / partition')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--format', choices=FORMATS, default=None, help='Output format (default: from extension)')
+    parser.add_argument('--output', default='data/dataset.csv', help='Output file, or directory with --partitioned')
+    parser.add_argument('--partitioned', action='store_true', help='Write one file per chunk into --output')
+    return parser.parse_args(argv)
 
-# Generate sample data
-n_samples = 1000
-X = np.random.randn(n_samples, 5)
-y = X[:, 0] * 2 + X[:, 1] * 1.5 - X[:, 2] * 0.5 + np.random.randn(n_samples) * 0.1
 
-# Create DataFrame
-df = pd.DataFrame(X, columns=[f'feature_{i+1}' for i in range(5)])
-df['target'] = y
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.partitioned:
+        paths = write_partitions(args.output, args.rows, args.features, args.noise, args.coefficients,
+                                 args.intercept, args.seed, args.chunk_rows, args.workers, args.format or 'csv')
+        where = f"{len(paths)} partitions in {args.output}"
+    else:
+        generate_dataset(args.output, args.rows, args.features, args.noise, args.coefficients,
+                         args.intercept, args.seed, args.chunk_rows, args.workers, args.format)
+        where = args.output
+    elapsed = time.perf_counter() - start
+    print(f"Dataset created with {args.rows} samples and saved to {where} ({elapsed:.1f}s)")
 
-# Save to CSV
-df.to_csv('data/dataset.csv', index=False)
-print(f"Dataset created with {n_samples} samples and saved to data/dataset.csv")
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Content-addressed local store for artifacts handed between pipeline tasks.
+
+Tasks write datasets and fitted models here and pass only a small reference
+dict (hash, suffix, metadata) through XCom, so large blobs never reach the
+Airflow metadata database. Objects are stored under their sha256, so an
+unchanged dataset or model is stored once no matter how many runs produce it.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import uuid
+
+import numpy as np
+
+
+def _file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Store files, arrays and pickled objects under their sha256."""
+
+    def __init__(self, root='artifacts'):
+        self.root = root
+
+    def path(self, ref):
+        """Return the on-disk path of a stored artifact."""
+        digest = ref['sha256']
+        return os.path.join(self.root, digest[:2], digest + ref['suffix'])
+
+    def _commit(self, tmp_path, suffix, meta):
+        """Move a finished temp file to its content address and return its ref."""
+        ref = {'sha256': _file_sha256(tmp_path), 'suffix': suffix, 'meta': meta or {}}
+        final = self.path(ref)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        if os.path.exists(final):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final)
+        return ref
+
+    def _tmp_path(self, suffix):
+        # Unique per call: threads sharing a store (and process) must not share a temp file
+        os.makedirs(self.root, exist_ok=True)
+        return os.path.join(self.root, f'.incoming-{os.getpid()}-{uuid.uuid4().hex}{suffix}')
+
+    def put_file(self, src_path, meta=None):
+        """Add an existing file, hard-linking it when possible instead of copying."""
+        suffix = os.path.splitext(src_path)[1]
+        tmp_path = self._tmp_path(suffix)
+        try:
+            os.link(src_path, tmp_path)
+        except OSError:
+            shutil.copyfile(src_path, tmp_path)
+        return self._commit(tmp_path, suffix, meta)
+
+    def put_array(self, array, meta=None):
+        """Add a NumPy array as an .npy file."""
+        tmp_path = self._tmp_path('.npy')
+        np.save(tmp_path, np.asanyarray(array))
+        return self._commit(tmp_path, '.npy', meta)
+
+    def get_array(self, ref, mmap=True):
+        """Load a stored array, memory-mapped read-only by default."""
+        return np.load(self.path(ref), mmap_mode='r' if mmap else None)
+
+    def put_object(self, obj, meta=None):
+        """Add a picklable object such as a fitted estimator."""
+        tmp_path = self._tmp_path('.pkl')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f)
+        return self._commit(tmp_path, '.pkl', meta)
+
+    def get_object(self, ref):
+        """Load a pickled object. Only load refs produced by this pipeline."""
+        with open(self.path(ref), 'rb') as f:
+            return pickle.load(f)
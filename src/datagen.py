@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Synthetic regression dataset generator.
+
+Rows are produced in fixed-size chunks. Each chunk draws from its own
+random stream, derived from the seed and the chunk index, so chunks can be
+generated in any order by any number of processes and the output is
+identical regardless of the worker count. Each chunk is written to disk as
+soon as it is generated, so memory use is bounded by
+`chunk_rows x workers` whatever the total row count.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Coefficients of the original sample dataset; further features get zero weight
+DEFAULT_COEFFICIENTS = (2.0, 1.5, -0.5)
+DEFAULT_CHUNK_ROWS = 1_000_000
+FORMATS = ('csv', 'parquet')
+
+
+def make_coefficients(n_features, coefficients=None):
+    """Coefficient vector of length `n_features`, zero-padded or truncated."""
+    coefficients = DEFAULT_COEFFICIENTS if coefficients is None else coefficients
+    coef = np.zeros(n_features)
+    given = np.asarray(coefficients, dtype=np.float64)[:n_features]
+    coef[:len(given)] = given
+    return coef
+
+
+def generate_chunk(chunk_index, rows, coef, intercept=0.0, noise=0.1, seed=42):
+    """Generate one chunk as a DataFrame with feature_1..feature_n and target."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+    X = rng.standard_normal((rows, len(coef)))
+    y = X @ coef + intercept + rng.standard_normal(rows) * noise
+    df = pd.DataFrame(X, columns=[f'feature_{i+1}' for i in range(len(coef))])
+    df['target'] = y
+    return df
+
+
+def _write_frame(df, path, fmt):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _write_chunk(path, fmt, chunk_index, rows, coef, intercept, noise, seed):
+    _write_frame(generate_chunk(chunk_index, rows, coef, intercept, noise, seed), path, fmt)
+    return path
+
+
+def _chunk_sizes(rows, chunk_rows):
+    return [min(chunk_rows, rows - start) for start in range(0, rows, chunk_rows)]
+
+
+def write_partitions(output_dir, rows, n_features=5, noise=0.1, coefficients=None, intercept=0.0,
+                     seed=42, chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, fmt='csv'):
+    """Write the dataset as part-00000.<fmt>, part-00001.<fmt>, ... and return their paths."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {FORMATS}")
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError('Parquet output requires pyarrow to be installed')
+    coef = make_coefficients(n_features, coefficients)
+    sizes = _chunk_sizes(rows, chunk_rows)
+    paths = [os.path.join(output_dir, f'part-{i:05d}.{fmt}') for i in range(len(sizes))]
+    os.makedirs(output_dir, exist_ok=True)
+    args = [(path, fmt, i, size, coef, intercept, noise, seed) for i, (path, size) in enumerate(zip(paths, sizes))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(args) == 1:
+        for a in args:
+            _write_chunk(*a)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            list(pool.map(_write_chunk, *zip(*args)))
+    return paths
+
+
+def _concat_csv(part_paths, output_path):
+    with open(output_path, 'wb') as out:
+        for i, path in enumerate(part_paths):
+            with open(path, 'rb') as part:
+                header = part.readline()
+                if i == 0:
+                    out.write(header)
+                shutil.copyfileobj(part, out, 1 << 20)
+
+
+def _concat_parquet(part_paths, output_path):
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for path in part_paths:
+            table = pq.read_table(path)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def generate_dataset(output_path='data/dataset.csv', rows=1000, n_features=5, noise=0.1, coefficients=None,
+                     intercept=0.0, seed=42, chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, fmt=None):
+    """
+    Generate a dataset into a single file.
+
+    Chunks are written in parallel to a scratch directory next to the
+    output and then concatenated in order, so the parent process never
+    holds more than one chunk. The format follows the file extension
+    unless `fmt` is given.
+    """
+    fmt = fmt or ('parquet' if output_path.endswith('.parquet') else 'csv')
+    output_dir = os.path.dirname(output_path) or '.'
+    os.makedirs(output_dir, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix='.datagen-', dir=output_dir)
+    try:
+        parts = write_partitions(scratch, rows, n_features, noise, coefficients, intercept,
+                                 seed, chunk_rows, workers, fmt)
+        tmp_path = os.path.join(scratch, 'dataset.tmp')
+        if fmt == 'parquet':
+            _concat_parquet(parts, tmp_path)
+        else:
+            _concat_csv(parts, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return output_path
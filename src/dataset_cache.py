@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Binary columnar cache for CSV datasets.
+
+The CSV is parsed once into a column-major float64 .npy file named after
+the dataset's content hash. Later loads memory-map that file instead of
+parsing text. The hash is read from the DVC pointer file next to the CSV
+(`data/dataset.csv.dvc`) when it is current, so `dvc pull`/`dvc add` of
+new data invalidates the cache without any extra bookkeeping; otherwise
+the file is hashed once and the md5 remembered until the file changes.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows parsed per chunk while building a cache entry
+BUILD_CHUNKSIZE = 100_000
+
+
+def cache_dir_for(data_path):
+    """Return the default cache directory for a dataset."""
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), '.cache')
+
+
+def read_dvc_hash(data_path):
+    """
+    Return (md5, size) recorded in `<data_path>.dvc`, or (None, None).
+
+    Only the two fields we need are read, so this does not depend on a
+    YAML parser.
+    """
+    dvc_path = data_path + '.dvc'
+    if not os.path.exists(dvc_path):
+        return None, None
+    md5 = size = None
+    with open(dvc_path) as f:
+        for line in f:
+            key, _, value = line.strip().lstrip('- ').partition(':')
+            if key == 'md5' and md5 is None:
+                md5 = value.strip()
+            elif key == 'size' and size is None:
+                size = int(value.strip())
+    return md5, size
+
+
+def file_md5(path, block_size=1 << 20):
+    """Compute the md5 of a file without loading it into memory."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_key(data_path):
+    """(size, mtime_ns, inode) of a file; any rewrite changes at least one."""
+    st = os.stat(data_path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def dataset_hash(data_path, cache_dir=None):
+    """
+    Return the content hash used as the cache key.
+
+    The DVC md5 is trusted when its recorded size matches the file on disk
+    and the file is not newer than the .dvc pointer, which `dvc add` writes
+    after the data. Otherwise (a same-size edit, or data fetched by
+    `dvc pull`/`dvc checkout`, which is always newer than its pointer) the
+    file is hashed once. Either md5 is remembered in
+    `<cache_dir>/<file name>.md5.json` against the file's size, mtime and
+    inode, so later loads of an unchanged file only stat it.
+    """
+    cache_dir = cache_dir or cache_dir_for(data_path)
+    memo_path = os.path.join(cache_dir, os.path.basename(data_path) + '.md5.json')
+    stat_key = _stat_key(data_path)
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+        if memo['stat'] == stat_key:
+            return memo['md5']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    md5, size = read_dvc_hash(data_path)
+    if not (md5 and size == stat_key[0] and os.path.getmtime(data_path) <= os.path.getmtime(data_path + '.dvc')):
+        md5 = file_md5(data_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{memo_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'stat': stat_key, 'md5': md5}, f)
+        os.replace(tmp_path, memo_path)
+    except OSError:
+        # A read-only data directory only costs a rehash next time
+        pass
+    return md5
+
+
+def _count_rows(data_path, block_size=1 << 20):
+    """Count data rows in a CSV by counting newlines (header excluded)."""
+    lines = 0
+    last = b'\n'
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def build_cache(data_path, array_path, meta_path, chunksize=BUILD_CHUNKSIZE):
+    """Convert a CSV into a column-major float64 .npy file plus column metadata."""
+    columns = list(pd.read_csv(data_path, nrows=0).columns)
+    n_rows = _count_rows(data_path)
+    tmp_array = f'{array_path}.{os.getpid()}.tmp'
+    tmp_meta = f'{meta_path}.{os.getpid()}.tmp'
+
+    values = np.lib.format.open_memmap(
+        tmp_array, mode='w+', dtype=np.float64,
+        shape=(n_rows, len(columns)), fortran_order=True,
+    )
+    filled = 0
+    for chunk in pd.read_csv(data_path, chunksize=chunksize, dtype=np.float64):
+        values[filled:filled + len(chunk)] = chunk.to_numpy()
+        filled += len(chunk)
+    values.flush()
+    if filled != n_rows:
+        # Blank lines made the newline count too high; rewrite at the real size.
+        trimmed = np.asfortranarray(values[:filled])
+        del values
+        np.save(tmp_array, trimmed)
+        os.replace(tmp_array + '.npy', tmp_array)
+    else:
+        del values
+
+    with open(tmp_meta, 'w') as f:
+        json.dump({'columns': columns, 'rows': filled, 'source': os.path.basename(data_path)}, f)
+    os.replace(tmp_array, array_path)
+    os.replace(tmp_meta, meta_path)
+
+
+def _prune_stale(cache_dir, stem, keep):
+    """Remove cache entries for older versions of the same dataset."""
+    prefix = f'{stem}-'
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and not name.startswith(keep) and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def load_array(data_path='data/dataset.csv', cache_dir=None):
+    """
+    Return (values, columns) for a CSV dataset, building the cache on first use.
+
+    `values` is a read-only, column-major float64 memmap of shape
+    (rows, columns).
+    """
+    cache_dir = cache_dir or cache_dir_for(data_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    key = f'{stem}-{dataset_hash(data_path, cache_dir)}'
+    array_path = os.path.join(cache_dir, key + '.npy')
+    meta_path = os.path.join(cache_dir, key + '.json')
+
+    if not (os.path.exists(array_path) and os.path.exists(meta_path)):
+        build_cache(data_path, array_path, meta_path)
+        _prune_stale(cache_dir, stem, keep=key + '.')
+
+    with open(meta_path) as f:
+        columns = json.load(f)['columns']
+    values = np.load(array_path, mmap_mode='r')
+    return values, columns
+
+
+def load_frame(data_path='data/dataset.csv', cache_dir=None):
+    """Return the dataset as a DataFrame backed by the memory-mapped cache."""
+    values, columns = load_array(data_path, cache_dir)
+    return pd.DataFrame(values, columns=columns, copy=False)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Feature schema saved alongside the model.
+
+Records the name, order, dtype and allowed value range of every model
+input, so the API can validate requests against what the model was
+trained on. The schema is plain JSON and needs only NumPy to use.
+"""
+import json
+import os
+
+import numpy as np
+
+SCHEMA_FORMAT_VERSION = 1
+DEFAULT_SCHEMA_PATH = 'models/feature_schema.json'
+
+# Allowed range = observed training range widened by this fraction of its span
+# on each side, so moderate extrapolation is accepted and gross errors are not
+DEFAULT_RANGE_MARGIN = 1.0
+
+
+def build_schema(feature_names, lower, upper, dtypes=None, range_margin=DEFAULT_RANGE_MARGIN, target=None):
+    """
+    Build a schema from the training features' names and observed ranges.
+
+    `lower`/`upper` are the per-feature minimum and maximum seen in training.
+    Non-finite bounds (no rows seen) leave that side unbounded.
+    """
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    margin = (upper - lower) * range_margin
+    features = []
+    for i, name in enumerate(feature_names):
+        bounded = bool(np.isfinite(lower[i]) and np.isfinite(upper[i]))
+        features.append({
+            'name': str(name),
+            'dtype': dtypes[i] if dtypes is not None else 'float64',
+            'min': float(lower[i] - margin[i]) if bounded else None,
+            'max': float(upper[i] + margin[i]) if bounded else None,
+            'observed_min': float(lower[i]) if bounded else None,
+            'observed_max': float(upper[i]) if bounded else None,
+        })
+    return {'format_version': SCHEMA_FORMAT_VERSION, 'target': target, 'features': features}
+
+
+def schema_from_names(feature_names):
+    """A schema that checks names and order only (no range limits)."""
+    return {
+        'format_version': SCHEMA_FORMAT_VERSION,
+        'target': None,
+        'features': [{'name': str(n), 'dtype': 'float64', 'min': None, 'max': None} for n in feature_names],
+    }
+
+
+def save_schema(schema, schema_path=DEFAULT_SCHEMA_PATH):
+    """Write the schema as JSON, atomically."""
+    os.makedirs(os.path.dirname(schema_path) or '.', exist_ok=True)
+    tmp_path = f'{schema_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp_path, schema_path)
+    return schema_path
+
+
+def load_schema(schema_path=DEFAULT_SCHEMA_PATH):
+    """Read a schema written by save_schema."""
+    with open(schema_path) as f:
+        schema = json.load(f)
+    if schema.get('format_version', 0) > SCHEMA_FORMAT_VERSION:
+        raise ValueError(f"Unsupported feature schema version {schema['format_version']} in {schema_path}")
+    return schema
+
+
+def feature_names(schema):
+    return [f['name'] for f in schema['features']]
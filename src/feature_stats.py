@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Constant-memory, mergeable summaries of feature distributions.
+
+A FeatureSummary keeps these per-feature figures:
+
+- the row count, mean and variance (Welford's update, applied a batch at a
+  time with the pairwise form of Chan et al.)
+- the minimum and maximum
+- a quantile sketch of `sketch_size` equal-weight points
+
+A batch is sketched by its own quantiles, one sort of all features plus
+linear interpolation. Two sketches merge by re-quantiling the union of their points,
+weighted by row counts. Memory is O(features × sketch_size) however many rows
+are seen, and summaries from different processes merge in any order.
+
+Training saves the summary of its training rows. The API keeps one over live
+requests and scores drift per feature against it (drift_scores).
+"""
+import json
+import os
+
+import numpy as np
+
+SUMMARY_FORMAT_VERSION = 1
+DEFAULT_SUMMARY_PATH = 'models/feature_summary.json'
+SKETCH_SIZE = 64
+
+# The drift score compares live and training mass in bins between the
+# training deciles (population stability index); empty bins count as this
+DRIFT_BINS = 10
+PSI_FLOOR = 1e-4
+
+
+class FeatureSummary:
+    """Count, mean, variance, range and quantile sketch of each feature."""
+
+    def __init__(self, feature_names=None, sketch_size=SKETCH_SIZE):
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.sketch_size = int(sketch_size)
+        self.reset()
+        # Rank of each sketch point as a fraction of n (midpoints of K equal slices)
+        self._positions = (np.arange(self.sketch_size) + 0.5) / self.sketch_size
+
+    def reset(self):
+        """Forget every row seen, keeping the feature names and sketch size."""
+        self.n = 0
+        self.mean = self.m2 = self.minimum = self.maximum = self.sketch = None
+        return self
+
+    @property
+    def n_features(self):
+        return None if self.mean is None else self.mean.shape[0]
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.zeros_like(self.mean)
+
+    def update(self, X):
+        """Fold a 2-D batch of rows (columns in feature order) into the summary."""
+        X = np.asarray(X, dtype=np.float64)
+        n_b = X.shape[0]
+        if n_b == 0:
+            return self
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        sketch_b = self._batch_sketch(X)
+        return self._combine(n_b, mean_b, m2_b, X.min(axis=0), X.max(axis=0), sketch_b)
+
+    def _batch_sketch(self, X):
+        """The batch's quantiles at the sketch positions, shape (n_features, sketch_size)."""
+        # One sort plus linear interpolation is much cheaper than np.quantile
+        # with this many probabilities
+        n = X.shape[0]
+        ordered = np.sort(X, axis=0)
+        at = self._positions * (n - 1)
+        lo = at.astype(np.intp)
+        hi = np.minimum(lo + 1, n - 1)
+        frac = (at - lo)[:, None]
+        return (ordered[lo] * (1 - frac) + ordered[hi] * frac).T
+
+    def merge(self, other):
+        """Fold another summary of the same features into this one."""
+        if other.n:
+            if other.sketch_size != self.sketch_size:
+                raise ValueError(f'Cannot merge sketches of size {other.sketch_size} and {self.sketch_size}')
+            self._combine(other.n, other.mean, other.m2, other.minimum, other.maximum, other.sketch)
+            if self.feature_names is None:
+                self.feature_names = other.feature_names
+        return self
+
+    def copy(self):
+        return FeatureSummary(self.feature_names, self.sketch_size).merge(self)
+
+    def _combine(self, n_b, mean_b, m2_b, min_b, max_b, sketch_b):
+        if self.n == 0:
+            self.n = int(n_b)
+            self.mean, self.m2 = np.array(mean_b, dtype=np.float64), np.array(m2_b, dtype=np.float64)
+            self.minimum, self.maximum = np.array(min_b, dtype=np.float64), np.array(max_b, dtype=np.float64)
+            self.sketch = np.array(sketch_b, dtype=np.float64)
+            return self
+        if mean_b.shape != self.mean.shape:
+            raise ValueError(f'Expected {self.n_features} features, got {mean_b.shape[0]}')
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.m2 = self.m2 + m2_b + delta * delta * (self.n * n_b / n)
+        self.mean = self.mean + delta * (n_b / n)
+        self.sketch = self._merge_sketches(self.sketch, self.n, sketch_b, n_b)
+        self.minimum = np.minimum(self.minimum, min_b)
+        self.maximum = np.maximum(self.maximum, max_b)
+        self.n = n
+        return self
+
+    def _merge_sketches(self, a, n_a, b, n_b):
+        """Equal-weight points of the union of two sketches, all features at once."""
+        k = self.sketch_size
+        n = n_a + n_b
+        values = np.concatenate([a, b], axis=1)
+        order = np.argsort(values, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        w = np.where(order < k, n_a / k, n_b / k)
+        ranks = np.cumsum(w, axis=1) - w / 2
+        # Every target rank lies within its own row's ranks, so shifting each
+        # row by a distinct offset lets one np.interp cover all features
+        offsets = np.arange(values.shape[0])[:, None] * (2.0 * n)
+        targets = self._positions * n + offsets
+        return np.interp(targets.ravel(), (ranks + offsets).ravel(), values.ravel()).reshape(targets.shape)
+
+    def _curve(self, i):
+        """(values, cumulative fractions) of feature i, including the exact extremes."""
+        values = np.concatenate([[self.minimum[i]], self.sketch[i], [self.maximum[i]]])
+        fractions = np.concatenate([[0.0], self._positions, [1.0]])
+        return values, fractions
+
+    def quantiles(self, probs):
+        """Approximate quantiles, shape (n_features, len(probs))."""
+        probs = np.asarray(probs, dtype=np.float64)
+        return np.array([np.interp(probs, *self._curve(i)[::-1]) for i in range(self.n_features)])
+
+    def cdf(self, edges):
+        """Approximate fraction of rows <= each edge; `edges` has one row per feature."""
+        return np.array([np.interp(edges[i], *self._curve(i)) for i in range(self.n_features)])
+
+    def to_dict(self):
+        return {
+            'format_version': SUMMARY_FORMAT_VERSION,
+            'feature_names': self.feature_names,
+            'sketch_size': self.sketch_size,
+            'n': self.n,
+            'mean': None if self.mean is None else self.mean.tolist(),
+            'm2': None if self.m2 is None else self.m2.tolist(),
+            'min': None if self.minimum is None else self.minimum.tolist(),
+            'max': None if self.maximum is None else self.maximum.tolist(),
+            'sketch': None if self.sketch is None else self.sketch.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format_version', 0) > SUMMARY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature summary version {data['format_version']}")
+        summary = cls(data.get('feature_names'), data['sketch_size'])
+        if data['n']:
+            summary._combine(data['n'], np.array(data['mean']), np.array(data['m2']),
+                             np.array(data['min']), np.array(data['max']), np.array(data['sketch']))
+        return summary
+
+
+def drift_scores(reference, live, bins=DRIFT_BINS):
+    """
+    Per-feature drift of `live` against the `reference` (training) summary.
+
+    `psi` is the population stability index over bins between the reference
+    deciles (< 0.1 stable, 0.1-0.25 moderate, > 0.25 large shift).
+    `mean_shift` is the live mean's distance from the reference mean in
+    reference standard deviations. The sketch interpolates between points,
+    so features with few distinct values score somewhat noisier.
+    """
+    edges = reference.quantiles(np.linspace(0, 1, bins + 1)[1:-1])
+    ref_mass = np.diff(reference.cdf(edges), prepend=0.0, append=1.0, axis=1)
+    live_mass = np.diff(live.cdf(edges), prepend=0.0, append=1.0, axis=1)
+    ref_mass = np.maximum(ref_mass, PSI_FLOOR)
+    live_mass = np.maximum(live_mass, PSI_FLOOR)
+    psi = ((live_mass - ref_mass) * np.log(live_mass / ref_mass)).sum(axis=1)
+    std = np.sqrt(reference.variance)
+    mean_shift = np.abs(live.mean - reference.mean) / np.where(std > 0, std, 1.0)
+    names = reference.feature_names or [f'feature_{i+1}' for i in range(reference.n_features)]
+    return {
+        name: {'psi': float(psi[i]), 'mean_shift': float(mean_shift[i]),
+               'live_mean': float(live.mean[i]), 'reference_mean': float(reference.mean[i])}
+        for i, name in enumerate(names)
+    }
+
+
+def save_summary(summary, summary_path=DEFAULT_SUMMARY_PATH):
+    """Write the summary as JSON, atomically."""
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    tmp_path = f'{summary_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(summary.to_dict(), f)
+    os.replace(tmp_path, summary_path)
+    return summary_path
+
+
+def load_summary(summary_path=DEFAULT_SUMMARY_PATH):
+    with open(summary_path) as f:
+        return FeatureSummary.from_dict(json.load(f))
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Memory-mappable model artifact.
+
+Layout of a `.bin` artifact:
+
+    magic        8 bytes, b'\\x93MLMODEL'
+    header size  uint32, little-endian
+    header       UTF-8 JSON, padded so the data section starts aligned
+    data         each array uncompressed and C-ordered at an ALIGNMENT offset
+
+The header holds the format version, the model kind, metadata (e.g. the
+model type) and each array's dtype, shape and offset. It also holds a
+SHA-256 of the data section. Loading maps the file read-only and returns
+arrays that view the mapping. Nothing is copied or unpickled, and all
+processes serving the same file share its pages through the page cache.
+Files are replaced atomically, so a process still using an old mapping
+keeps the old inode until it lets go.
+
+Other formats are registered in FORMATS, so tools can save and load a model
+by format name. This includes a reader for legacy pickles. Unpickling runs
+arbitrary code, so it must be enabled explicitly with `allow_pickle`.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import struct
+
+import numpy as np
+
+from model_format import linear_coefficients, load_compact_model, save_compact_model
+
+MAGIC = b'\x93MLMODEL'
+ARTIFACT_VERSION = 1
+ALIGNMENT = 64
+DEFAULT_ARTIFACT_PATH = 'models/model.bin'
+
+_PREFIX = struct.Struct('<8sI')
+
+
+class ArtifactError(ValueError):
+    """The file is not a readable model artifact (bad magic, version, layout or checksum)."""
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_artifact(path, arrays, metadata=None, kind='linear'):
+    """Write named arrays and JSON-serializable metadata as an artifact, atomically."""
+    arrays = {name: np.asarray(a) for name, a in arrays.items()}
+    arrays = {name: a if a.flags.c_contiguous else a.copy(order='C') for name, a in arrays.items()}
+    layout, offset = {}, 0
+    for name, a in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset}
+        offset += a.nbytes
+    data_size = offset
+
+    digest = hashlib.sha256()
+    chunks, position = [], 0
+    for name, a in arrays.items():
+        padding = b'\0' * (layout[name]['offset'] - position)
+        raw = memoryview(a).cast('B') if a.nbytes else b''
+        digest.update(padding)
+        digest.update(raw)
+        chunks.extend([padding, raw])
+        position = layout[name]['offset'] + a.nbytes
+
+    header = json.dumps({
+        'format_version': ARTIFACT_VERSION,
+        'kind': kind,
+        'metadata': metadata or {},
+        'arrays': layout,
+        'data_size': data_size,
+        'checksum': 'sha256:' + digest.hexdigest(),
+    }).encode()
+    data_start = _aligned(_PREFIX.size + len(header))
+    header += b' ' * (data_start - _PREFIX.size - len(header))
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_artifact(path, mmap=True, verify=True):
+    """
+    Read an artifact written by write_artifact.
+
+    With `mmap` the arrays are read-only views of a shared file mapping;
+    otherwise the file is read into memory. `verify` checks the data
+    section against the header's checksum (this touches every page).
+    Returns a dict with kind, metadata, arrays, format_version and version
+    (a short hash identifying this exact artifact).
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size or prefix[:len(MAGIC)] != MAGIC:
+            raise ArtifactError(f'{path} is not a model artifact')
+        _, header_size = _PREFIX.unpack(prefix)
+        header_bytes = f.read(header_size)
+        buffer = None if mmap else f.read()
+    try:
+        header = json.loads(header_bytes)
+    except ValueError:
+        raise ArtifactError(f'{path} has a corrupt header')
+    if header.get('format_version', 0) > ARTIFACT_VERSION:
+        raise ArtifactError(f"Unsupported model artifact version {header['format_version']} in {path}")
+
+    data_start = _PREFIX.size + header_size
+    data_size = header['data_size']
+    if os.path.getsize(path) != data_start + data_size:
+        raise ArtifactError(f'{path} is truncated or has trailing data')
+    if mmap:
+        data = np.memmap(path, dtype=np.uint8, mode='r', offset=data_start, shape=(data_size,)) if data_size else b''
+    else:
+        data = buffer
+    if verify:
+        algorithm, _, expected = header['checksum'].partition(':')
+        if hashlib.new(algorithm, data).hexdigest() != expected:
+            raise ArtifactError(f'{path} failed its {algorithm} checksum')
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+    return {
+        'kind': header['kind'],
+        'metadata': header['metadata'],
+        'arrays': arrays,
+        'format_version': header['format_version'],
+        'version': hashlib.sha256(header_bytes).hexdigest()[:12],
+    }
+
+
+def save_model_artifact(model, path=DEFAULT_ARTIFACT_PATH, feature_names=None, dtype='float64'):
+    """Export a fitted linear model as a memory-mappable artifact."""
+    if feature_names is None:
+        feature_names = getattr(model, 'feature_names_in_', None)
+    coef, intercept = linear_coefficients(model)
+    coef = np.asarray(coef, dtype=dtype)
+    if feature_names is None:
+        feature_names = [f'feature_{i+1}' for i in range(coef.shape[0])]
+    return _write_linear(path, coef, intercept, feature_names, type(model).__name__)
+
+
+def _write_linear(path, coef, intercept, feature_names, model_type):
+    # Names go in the data section as one NUL-separated UTF-8 blob: splitting
+    # it is much cheaper than parsing a JSON list for wide models
+    names = '\0'.join(str(n) for n in feature_names).encode()
+    arrays = {
+        'coef': coef,
+        'intercept': np.asarray(intercept, dtype=coef.dtype).reshape(()),
+        'feature_names': np.frombuffer(names, dtype=np.uint8),
+    }
+    return write_artifact(path, arrays, {'model_type': model_type}, kind='linear')
+
+
+def load_model_artifact(path, mmap=True, verify=True):
+    """
+    Read a linear model artifact in the same form as load_compact_model.
+
+    `coef` is a read-only view of the file mapping when `mmap` is set.
+    """
+    artifact = read_artifact(path, mmap, verify)
+    if artifact['kind'] != 'linear':
+        raise ArtifactError(f"{path} holds a {artifact['kind']!r} model, expected 'linear'")
+    arrays = artifact['arrays']
+    coef = arrays['coef']
+    names = arrays['feature_names'].tobytes().decode()
+    return {
+        'coef': coef,
+        'intercept': coef.dtype.type(arrays['intercept']),
+        'feature_names': names.split('\0') if names else [],
+        'dtype': coef.dtype,
+        'format_version': artifact['format_version'],
+        'version': artifact['version'],
+    }
+
+
+def save_pickle(model, path, feature_names=None):
+    """Write the estimator with pickle (the legacy format), atomically."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_pickle(path, allow_pickle=False):
+    """
+    Read a legacy pickled linear estimator in the same form as load_compact_model.
+
+    Unpickling runs arbitrary code, so only pass `allow_pickle` for trusted files.
+    """
+    if not allow_pickle:
+        raise ArtifactError(f'{path} is a pickle; pass allow_pickle=True to load trusted pickles')
+    with open(path, 'rb') as f:
+        raw = f.read()
+    model = pickle.loads(raw)
+    coef, intercept = linear_coefficients(model)
+    coef = np.asarray(coef, dtype=np.float64)
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        names = [f'feature_{i+1}' for i in range(coef.shape[0])]
+    return {
+        'coef': coef,
+        'intercept': coef.dtype.type(intercept),
+        'feature_names': [str(n) for n in names],
+        'dtype': coef.dtype,
+        'format_version': 0,
+        'version': hashlib.sha256(raw).hexdigest()[:12],
+    }
+
+
+# name -> (save(model, path, feature_names=None), load(path)); every loader
+# returns coef, intercept, feature_names, dtype, format_version and version
+FORMATS = {
+    'mmap': (save_model_artifact, load_model_artifact),
+    'npz': (save_compact_model, load_compact_model),
+    'pickle': (save_pickle, lambda path: load_pickle(path, allow_pickle=True)),
+}
+
+
+def detect_format(path):
+    """Name of the format in FORMATS that `path` is written in, from its first bytes."""
+    with open(path, 'rb') as f:
+        head = f.read(len(MAGIC))
+    if head == MAGIC:
+        return 'mmap'
+    if head.startswith(b'PK'):
+        return 'npz'
+    if head[:1] == b'\x80':
+        return 'pickle'
+    raise ArtifactError(f'{path} is not a recognised model file')
+
+
+def load_linear_model(path, allow_pickle=False):
+    """Load a linear model from any format in FORMATS; pickles need `allow_pickle`."""
+    fmt = detect_format(path)
+    if fmt == 'pickle':
+        return load_pickle(path, allow_pickle)
+    return FORMATS[fmt][1](path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a linear model file to the memory-mappable format.')
+    parser.add_argument('source', help='Model in any supported format (.pkl, .npz, .bin)')
+    parser.add_argument('destination', nargs='?', default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument('--allow-pickle', action='store_true', help='Trust and unpickle a legacy .pkl source')
+    args = parser.parse_args(argv)
+
+    model = load_linear_model(args.source, allow_pickle=args.allow_pickle)
+    _write_linear(args.destination, model['coef'], model['intercept'], model['feature_names'], 'LinearRegression')
+    print(f"Converted {args.source} ({detect_format(args.source)}) to {args.destination}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compact, versioned model artifact for linear models.
+
+The artifact is a plain `.npz` archive holding only NumPy arrays, so it
+can be read with `np.load(..., allow_pickle=False)` and served without
+sklearn or pandas installed.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+FORMAT_NAME = 'linear-npz'
+FORMAT_VERSION = 1
+
+
+def linear_coefficients(model):
+    """
+    Return (coef, intercept) of a fitted linear model.
+
+    Besides plain linear estimators this accepts a Pipeline of a
+    StandardScaler followed by a linear estimator; the scaling is folded
+    into the coefficients. Raises ValueError for anything non-linear.
+    """
+    steps = getattr(model, 'steps', None)
+    if steps is None:
+        if getattr(model, 'coef_', None) is None:
+            raise ValueError(f'{type(model).__name__} is not a linear model')
+        return np.ravel(model.coef_), float(np.ravel(model.intercept_)[0])
+    if len(steps) == 1:
+        return linear_coefficients(steps[0][1])
+    if len(steps) == 2 and hasattr(steps[0][1], 'scale_') and hasattr(steps[0][1], 'mean_'):
+        scaler = steps[0][1]
+        coef, intercept = linear_coefficients(steps[1][1])
+        scale = np.where(scaler.scale_ == 0, 1.0, scaler.scale_) if scaler.scale_ is not None else 1.0
+        mean = scaler.mean_ if scaler.mean_ is not None else 0.0
+        folded = coef / scale
+        return folded, intercept - float(np.sum(folded * mean))
+    raise ValueError(f'Pipeline {[name for name, _ in steps]} is not a linear model')
+
+
+def save_compact_model(model, model_path='models/model.npz', feature_names=None, dtype='float64'):
+    """Export the coefficients of a fitted linear model to a compact artifact."""
+    if feature_names is None:
+        feature_names = getattr(model, 'feature_names_in_', None)
+    coef, intercept = linear_coefficients(model)
+    coef = np.asarray(coef, dtype=dtype)
+    if feature_names is None:
+        feature_names = [f'feature_{i+1}' for i in range(coef.shape[0])]
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    # Write under a temporary name so readers never see a partial file
+    tmp_path = f'{model_path}.{os.getpid()}.tmp.npz'
+    np.savez(
+        tmp_path,
+        format_name=np.array(FORMAT_NAME),
+        format_version=np.array(FORMAT_VERSION),
+        coef=coef,
+        intercept=np.asarray(intercept, dtype=dtype).reshape(()),
+        feature_names=np.asarray([str(n) for n in feature_names]),
+        dtype=np.array(np.dtype(dtype).str),
+    )
+    os.replace(tmp_path, model_path)
+    return model_path
+
+
+def load_compact_model(model_path):
+    """
+    Read a compact artifact.
+
+    Returns a dict with coef, intercept, feature_names, dtype, format_version
+    and version (a short content hash identifying this exact artifact).
+    """
+    with open(model_path, 'rb') as f:
+        raw = f.read()
+    with np.load(model_path, allow_pickle=False) as npz:
+        if str(npz['format_name']) != FORMAT_NAME:
+            raise ValueError(f"{model_path} is not a {FORMAT_NAME} artifact")
+        format_version = int(npz['format_version'])
+        if format_version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported {FORMAT_NAME} version {format_version} in {model_path}")
+        dtype = np.dtype(str(npz['dtype']))
+        return {
+            'coef': npz['coef'].astype(dtype, copy=False),
+            'intercept': dtype.type(npz['intercept']),
+            'feature_names': [str(n) for n in npz['feature_names']],
+            'dtype': dtype,
+            'format_version': format_version,
+            'version': hashlib.sha256(raw).hexdigest()[:12],
+        }
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Stages of the DVC training pipeline (see dvc.yaml and params.yaml).
+
+    prepare    CSV -> column-major float64 .npy plus column metadata
+    split      row indices of the train/test hold-out split
+    featurize  model-ready X/y arrays per split, feature schema and summary
+    train      fit and export the model (pickle, .npz and .bin)
+    evaluate   hold-out metrics, plus optional repeated k-fold CV
+
+Every stage reads the previous stage's binary outputs through memory maps
+and processes rows in chunks. Each stage declares only the params it uses,
+so `dvc repro` reruns only the stages downstream of what changed. A new
+evaluation setting reruns `evaluate`, and a training setting reruns
+`train` and `evaluate`; the prepared and featurized arrays come from the
+DVC cache.
+
+`src/train.py` remains the one-shot equivalent of the whole pipeline.
+
+Run a stage directly with, e.g.:
+    python src/pipeline.py split --test-size 0.2 --random-state 42
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import BUILD_CHUNKSIZE, build_cache
+from feature_schema import DEFAULT_SCHEMA_PATH, build_schema, save_schema
+from feature_stats import DEFAULT_SUMMARY_PATH, FeatureSummary, save_summary
+from model_artifact import DEFAULT_ARTIFACT_PATH, save_model_artifact
+from model_format import load_compact_model, save_compact_model
+from train import (DEFAULT_CHUNKSIZE, SufficientStatistics, cross_validate, model_from_coefficients, save_model,
+                   train_model)
+
+PREPARED_DIR = 'data/prepared'
+FEATURES_DIR = 'data/features'
+DEFAULT_METRICS_PATH = 'models/metrics.json'
+
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_prepared(prepared_dir=PREPARED_DIR):
+    """Return (values, columns): the prepared dataset as a read-only memmap."""
+    columns = _read_json(os.path.join(prepared_dir, 'dataset.json'))['columns']
+    return np.load(os.path.join(prepared_dir, 'dataset.npy'), mmap_mode='r'), columns
+
+
+def load_split_arrays(features_dir, split):
+    """Return (X, y, feature_names, target) of one featurized split, memory-mapped."""
+    meta = _read_json(os.path.join(features_dir, 'features.json'))
+    X = np.load(os.path.join(features_dir, f'X_{split}.npy'), mmap_mode='r')
+    y = np.load(os.path.join(features_dir, f'y_{split}.npy'), mmap_mode='r')
+    return X, y, meta['feature_names'], meta['target']
+
+
+def prepare(data_path='data/dataset.csv', prepared_dir=PREPARED_DIR, chunksize=BUILD_CHUNKSIZE):
+    """Parse the CSV once into a binary column-major array."""
+    os.makedirs(prepared_dir, exist_ok=True)
+    build_cache(data_path, os.path.join(prepared_dir, 'dataset.npy'),
+                os.path.join(prepared_dir, 'dataset.json'), chunksize)
+    return load_prepared(prepared_dir)
+
+
+def split(prepared_dir=PREPARED_DIR, test_size=0.2, random_state=42, split_path=None):
+    """
+    Save the train/test row indices.
+
+    The split matches train_test_split on the full frame, so the pipeline
+    trains on exactly the rows `src/train.py --mode memory` uses.
+    """
+    values, _ = load_prepared(prepared_dir)
+    train_idx, test_idx = train_test_split(np.arange(values.shape[0]), test_size=test_size,
+                                           random_state=random_state)
+    split_path = split_path or os.path.join(prepared_dir, 'split.npz')
+    tmp_path = f'{split_path}.{os.getpid()}.tmp.npz'
+    np.savez(tmp_path, train=train_idx, test=test_idx)
+    os.replace(tmp_path, split_path)
+    return train_idx, test_idx
+
+
+def _gather(values, rows, feature_columns, target_column, X_path, y_path, chunksize, summary=None):
+    """Copy the selected rows into C-ordered X/y .npy files, chunk by chunk."""
+    tmp_X, tmp_y = f'{X_path}.{os.getpid()}.tmp', f'{y_path}.{os.getpid()}.tmp'
+    X = np.lib.format.open_memmap(tmp_X, mode='w+', dtype=np.float64, shape=(len(rows), len(feature_columns)))
+    y = np.lib.format.open_memmap(tmp_y, mode='w+', dtype=np.float64, shape=(len(rows),))
+    for start in range(0, len(rows), chunksize):
+        block = values[rows[start:start + chunksize]]
+        X[start:start + len(block)] = block[:, feature_columns]
+        y[start:start + len(block)] = block[:, target_column]
+        if summary is not None:
+            summary.update(X[start:start + len(block)])
+    X.flush()
+    y.flush()
+    del X, y
+    os.replace(tmp_X, X_path)
+    os.replace(tmp_y, y_path)
+
+
+def featurize(prepared_dir=PREPARED_DIR, features_dir=FEATURES_DIR, target='target',
+              schema_path=DEFAULT_SCHEMA_PATH, summary_path=DEFAULT_SUMMARY_PATH,
+              chunksize=DEFAULT_CHUNKSIZE, split_path=None):
+    """Write model-ready arrays for each split, plus the training feature schema and summary."""
+    values, columns = load_prepared(prepared_dir)
+    if target not in columns:
+        raise ValueError(f"Target column '{target}' not in {columns}")
+    feature_names = [c for c in columns if c != target]
+    feature_columns = [columns.index(c) for c in feature_names]
+    target_column = columns.index(target)
+    with np.load(split_path or os.path.join(prepared_dir, 'split.npz')) as indices:
+        train_idx, test_idx = indices['train'], indices['test']
+
+    os.makedirs(features_dir, exist_ok=True)
+    summary = FeatureSummary(feature_names)
+    _gather(values, train_idx, feature_columns, target_column,
+            os.path.join(features_dir, 'X_train.npy'), os.path.join(features_dir, 'y_train.npy'),
+            chunksize, summary)
+    _gather(values, test_idx, feature_columns, target_column,
+            os.path.join(features_dir, 'X_test.npy'), os.path.join(features_dir, 'y_test.npy'), chunksize)
+    _write_json({'feature_names': feature_names, 'target': target,
+                 'rows': {'train': len(train_idx), 'test': len(test_idx)}},
+                os.path.join(features_dir, 'features.json'))
+
+    save_schema(build_schema(feature_names, summary.minimum, summary.maximum, target=target), schema_path)
+    save_summary(summary, summary_path)
+    return summary
+
+
+def train(features_dir=FEATURES_DIR, mode='memory', chunksize=DEFAULT_CHUNKSIZE, model_path='models/model.pkl',
+          compact_model_path='models/model.npz', artifact_path=DEFAULT_ARTIFACT_PATH):
+    """Fit on the training split and export the model in every serving format."""
+    X, y, feature_names, _ = load_split_arrays(features_dir, 'train')
+    if mode == 'streaming':
+        stats = SufficientStatistics(len(feature_names))
+        for start in range(0, len(y), chunksize):
+            stats.update(X[start:start + chunksize], y[start:start + chunksize])
+        model = model_from_coefficients(*stats.solve(), feature_names)
+    else:
+        model = train_model(pd.DataFrame(np.asarray(X), columns=feature_names), np.asarray(y))
+    save_model(model, model_path)
+    save_compact_model(model, compact_model_path)
+    save_model_artifact(model, artifact_path)
+    return model
+
+
+def evaluate(features_dir=FEATURES_DIR, compact_model_path='models/model.npz', metrics_path=DEFAULT_METRICS_PATH,
+             chunksize=DEFAULT_CHUNKSIZE, cv_folds=0, cv_repeats=1, n_jobs=None, prepared_dir=PREPARED_DIR):
+    """Score the model on the hold-out split in chunks; optionally cross-validate."""
+    X, y, _, target = load_split_arrays(features_dir, 'test')
+    artifact = load_compact_model(compact_model_path)
+    sse = 0.0
+    for start in range(0, len(y), chunksize):
+        residual = y[start:start + chunksize] - (X[start:start + chunksize] @ artifact['coef'] + artifact['intercept'])
+        sse += float(residual @ residual)
+    y_mean = float(np.mean(y))
+    sst = sum(float(((y[s:s + chunksize] - y_mean) ** 2).sum()) for s in range(0, len(y), chunksize))
+    metrics = {
+        'rows': int(len(y)),
+        'mse': sse / len(y),
+        'r2': 1.0 - sse / sst if sst > 0 else 0.0,
+    }
+    if cv_folds:
+        values, columns = load_prepared(prepared_dir)
+        results = cross_validate(values.filename, columns.index(target), cv_folds, cv_repeats, n_jobs)
+        metrics['cv'] = {'folds': cv_folds, 'repeats': cv_repeats,
+                         **{name: results['aggregate'][name] for name in ('mse', 'r2')}}
+    _write_json(metrics, metrics_path)
+    return metrics
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run one stage of the training pipeline.')
+    stages = parser.add_subparsers(dest='stage', required=True)
+
+    p = stages.add_parser('prepare', help='Convert the CSV to a binary array')
+    p.add_argument('--data-path', default='data/dataset.csv')
+    p.add_argument('--prepared-dir', default=PREPARED_DIR)
+    p.add_argument('--chunksize', type=int, default=BUILD_CHUNKSIZE, help='CSV rows parsed per chunk')
+
+    p = stages.add_parser('split', help='Choose the train/test rows')
+    p.add_argument('--prepared-dir', default=PREPARED_DIR)
+    p.add_argument('--test-size', type=float, default=0.2)
+    p.add_argument('--random-state', type=int, default=42)
+
+    p = stages.add_parser('featurize', help='Write model-ready arrays, feature schema and summary')
+    p.add_argument('--prepared-dir', default=PREPARED_DIR)
+    p.add_argument('--features-dir', default=FEATURES_DIR)
+    p.add_argument('--target', default='target')
+    p.add_argument('--schema-path', default=DEFAULT_SCHEMA_PATH)
+    p.add_argument('--summary-path', default=DEFAULT_SUMMARY_PATH)
+    p.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows copied per chunk')
+
+    p = stages.add_parser('train', help='Fit and export the model')
+    p.add_argument('--features-dir', default=FEATURES_DIR)
+    p.add_argument('--mode', choices=['memory', 'streaming'], default='memory',
+                   help='memory: fit on the whole training array; streaming: fold bounded-size chunks')
+    p.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows per chunk in streaming mode')
+    p.add_argument('--model-path', default='models/model.pkl')
+    p.add_argument('--compact-model-path', default='models/model.npz')
+    p.add_argument('--artifact-path', default=DEFAULT_ARTIFACT_PATH)
+
+    p = stages.add_parser('evaluate', help='Score the model on the hold-out rows')
+    p.add_argument('--features-dir', default=FEATURES_DIR)
+    p.add_argument('--prepared-dir', default=PREPARED_DIR)
+    p.add_argument('--compact-model-path', default='models/model.npz')
+    p.add_argument('--metrics-path', default=DEFAULT_METRICS_PATH)
+    p.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows scored per chunk')
+    p.add_argument('--cv-folds', type=int, default=0, help='Also run k-fold cross-validation (0 disables)')
+    p.add_argument('--cv-repeats', type=int, default=1)
+    p.add_argument('--n-jobs', type=int, default=None, help='Cross-validation worker processes')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.stage == 'prepare':
+        values, columns = prepare(args.data_path, args.prepared_dir, args.chunksize)
+        print(f"Prepared {values.shape[0]} rows x {len(columns)} columns in {args.prepared_dir}")
+    elif args.stage == 'split':
+        train_idx, test_idx = split(args.prepared_dir, args.test_size, args.random_state)
+        print(f"Training set size: {len(train_idx)}")
+        print(f"Test set size: {len(test_idx)}")
+    elif args.stage == 'featurize':
+        summary = featurize(args.prepared_dir, args.features_dir, args.target, args.schema_path,
+                            args.summary_path, args.chunksize)
+        print(f"Featurized {summary.n_features} features into {args.features_dir}")
+        print(f"Feature schema saved to {args.schema_path}")
+        print(f"Feature summary saved to {args.summary_path}")
+    elif args.stage == 'train':
+        train(args.features_dir, args.mode, args.chunksize, args.model_path, args.compact_model_path,
+              args.artifact_path)
+        print(f"Model saved to {args.model_path}, {args.compact_model_path} and {args.artifact_path}")
+    else:
+        metrics = evaluate(args.features_dir, args.compact_model_path, args.metrics_path, args.chunksize,
+                           args.cv_folds, args.cv_repeats, args.n_jobs, args.prepared_dir)
+        print("Model performance:")
+        print(f"  MSE: {metrics['mse']:.4f}")
+        print(f"  R²: {metrics['r2']:.4f}")
+        print(f"Metrics saved to {args.metrics_path}")
+
+
+if __name__ == '__main__':
+    main()
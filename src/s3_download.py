@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Incremental, parallel, resumable download of an S3 object.
+
+A small manifest next to the local file records the ETag and size of the
+object it was downloaded from, so an unchanged object is not fetched again.
+Changed objects are fetched with concurrent byte-range GETs into a
+`.part` file. Completed ranges are recorded in a `.part.json` state file,
+so an interrupted download resumes where it stopped. Every range is pinned
+to the ETag seen at the start (If-Match), and the content is checked
+against the ETag as it streams in.
+
+The ETag of a single-part upload is the MD5 of the object. The ETag of a
+multipart upload is the MD5 of the concatenated part MD5s, suffixed with
+"-<parts>". Ranges are aligned to the upload's part size, so both kinds can
+be verified from digests computed while streaming. Objects whose ETag is
+not an MD5 (e.g. SSE-KMS) are downloaded without verification.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 8
+STREAM_BLOCK_SIZE = 1 << 20
+
+_MD5_ETAG = re.compile(r'^[0-9a-f]{32}(-\d+)?$')
+
+
+class ChecksumMismatch(Exception):
+    """Downloaded content does not match the object's ETag."""
+
+
+def manifest_path(local_path):
+    return local_path + '.s3.json'
+
+
+def _state_path(local_path):
+    return local_path + '.part.json'
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _etag(response):
+    return response['ETag'].strip('"')
+
+
+def is_unchanged(local_path, bucket, key, etag, size):
+    """Whether `local_path` holds exactly the object version described by etag/size."""
+    manifest = _read_json(manifest_path(local_path))
+    return (manifest is not None
+            and manifest.get('bucket') == bucket and manifest.get('key') == key
+            and manifest.get('etag') == etag and manifest.get('size') == size
+            and os.path.exists(local_path) and os.path.getsize(local_path) == size)
+
+
+def plan_parts(size, part_size):
+    """Inclusive (start, end) byte ranges covering `size` bytes."""
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)] or [(0, -1)]
+
+
+def _upload_part_size(s3_client, bucket, key, etag):
+    """Part size of a multipart upload, so ranges can line up with its parts."""
+    if '-' not in etag:
+        return None
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key, PartNumber=1)['ContentLength']
+    except Exception:
+        return None
+
+
+def _expected_digest(etag, part_md5s, part_size, upload_part_size):
+    """ETag recomputed from the part MD5s, or None when it cannot be derived."""
+    if not _MD5_ETAG.match(etag):
+        return None
+    if '-' in etag:
+        if upload_part_size != part_size:
+            return None
+        combined = hashlib.md5(b''.join(bytes.fromhex(m) for m in part_md5s))
+        return f'{combined.hexdigest()}-{len(part_md5s)}'
+    if len(part_md5s) == 1:
+        return part_md5s[0]
+    return None
+
+
+def _file_md5(path, block_size=STREAM_BLOCK_SIZE):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fetch(s3_client, bucket, key, local_path, part_size=DEFAULT_PART_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Make `local_path` a verified copy of s3://bucket/key, downloading only if needed.
+
+    Returns a dict with status ('unchanged' or 'downloaded'), etag, size,
+    parts, resumed_parts (ranges reused from an interrupted run) and
+    verified (whether the content was checked against the ETag).
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    etag, size = _etag(head), head['ContentLength']
+    if is_unchanged(local_path, bucket, key, etag, size):
+        return {'status': 'unchanged', 'etag': etag, 'size': size, 'parts': 0, 'resumed_parts': 0, 'verified': True}
+
+    upload_part_size = _upload_part_size(s3_client, bucket, key, etag)
+    part_size = upload_part_size or part_size
+    parts = plan_parts(size, part_size)
+
+    os.makedirs(os.path.dirname(local_path) or '.', exist_ok=True)
+    part_path = local_path + '.part'
+    state_path = _state_path(local_path)
+    state = _read_json(state_path)
+    if (state is None or not os.path.exists(part_path)
+            or [state.get(k) for k in ('bucket', 'key', 'etag', 'size', 'part_size')]
+            != [bucket, key, etag, size, part_size]):
+        state = {'bucket': bucket, 'key': key, 'etag': etag, 'size': size, 'part_size': part_size, 'done': {}}
+        with open(part_path, 'wb'):
+            pass
+    os.truncate(part_path, size)
+    done = state['done']
+    resumed = len(done)
+    lock = threading.Lock()
+
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        def download(index):
+            start, end = parts[index]
+            digest = hashlib.md5()
+            if end >= start:
+                response = s3_client.get_object(Bucket=bucket, Key=key, Range=f'bytes={start}-{end}', IfMatch=etag)
+                offset = start
+                for block in response['Body'].iter_chunks(STREAM_BLOCK_SIZE):
+                    os.pwrite(fd, block, offset)
+                    digest.update(block)
+                    offset += len(block)
+                if offset != end + 1:
+                    raise IOError(f'Short read for bytes {start}-{end} of s3://{bucket}/{key}')
+            with lock:
+                done[str(index)] = digest.hexdigest()
+                _write_json(state_path, state)
+
+        pending = [i for i in range(len(parts)) if str(i) not in done]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as pool:
+            futures = [pool.submit(download, i) for i in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop queued ranges; finished ones stay recorded for the next run
+                for future in futures:
+                    future.cancel()
+                raise
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    part_md5s = [done[str(i)] for i in range(len(parts))]
+    expected = _expected_digest(etag, part_md5s, part_size, upload_part_size)
+    if expected is None and _MD5_ETAG.match(etag) and '-' not in etag:
+        # Single-part object fetched in several ranges: hash the (page-cached) file once
+        expected = _file_md5(part_path)
+    verified = expected is not None
+    if verified and expected != etag:
+        os.remove(part_path)
+        os.remove(state_path)
+        raise ChecksumMismatch(f's3://{bucket}/{key}: content hashes to {expected}, ETag is {etag}')
+
+    os.replace(part_path, local_path)
+    _write_json(manifest_path(local_path), {'bucket': bucket, 'key': key, 'etag': etag, 'size': size})
+    os.remove(state_path)
+    return {'status': 'downloaded', 'etag': etag, 'size': size, 'parts': len(parts),
+            'resumed_parts': resumed, 'verified': verified}
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Parallel sweep over model candidates.
+
+Candidates are fitted in a process pool. Workers memory-map the same
+read-only .npy dataset instead of receiving a pickled copy each, and they
+derive the train/test split themselves from the same seed. The best
+candidate is picked by held-out MSE (R² breaks ties).
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.linear_model import Lasso, LinearRegression, Ridge, SGDRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+from dataset_cache import load_array
+from workers import limit_worker_threads
+
+ESTIMATORS = {
+    'linear': LinearRegression,
+    'ridge': Ridge,
+    'lasso': Lasso,
+    'sgd': SGDRegressor,
+}
+
+# Each entry expands to one candidate per combination of its grid values
+DEFAULT_GRID = [
+    {'estimator': 'linear'},
+    {'estimator': 'ridge', 'grid': {'alpha': [0.01, 0.1, 1.0, 10.0, 100.0]}},
+    {'estimator': 'lasso', 'grid': {'alpha': [0.0001, 0.001, 0.01, 0.1]}},
+    {'estimator': 'sgd', 'scale': True, 'params': {'random_state': 42, 'max_iter': 1000, 'tol': 1e-4},
+     'grid': {'alpha': [0.0001, 0.001]}},
+    {'estimator': 'linear', 'degree': 2},
+    {'estimator': 'ridge', 'degree': 2, 'grid': {'alpha': [0.1, 1.0, 10.0]}},
+]
+
+
+def expand_candidates(grid=None):
+    """Expand grid entries into a flat list of candidate specs."""
+    candidates = []
+    for entry in grid or DEFAULT_GRID:
+        keys = sorted(entry.get('grid', {}))
+        for values in itertools.product(*(entry['grid'][k] for k in keys)):
+            params = dict(entry.get('params', {}), **dict(zip(keys, values)))
+            label = ', '.join(f'{k}={v}' for k, v in zip(keys, values))
+            name = entry['estimator'] + (f'[degree={entry["degree"]}]' if entry.get('degree', 1) > 1 else '')
+            candidates.append({
+                'name': f'{name}({label})' if label else name,
+                'estimator': entry['estimator'],
+                'params': params,
+                'degree': entry.get('degree', 1),
+                'scale': entry.get('scale', False),
+            })
+    return candidates
+
+
+def build_estimator(spec):
+    """Instantiate the (unfitted) estimator described by a candidate spec."""
+    steps = []
+    if spec['degree'] > 1:
+        steps.append(PolynomialFeatures(degree=spec['degree'], include_bias=False))
+    if spec['scale']:
+        steps.append(StandardScaler())
+    estimator = ESTIMATORS[spec['estimator']](**spec['params'])
+    return make_pipeline(*steps, estimator) if steps else estimator
+
+
+def split_indices(n_rows, test_size=0.2, random_state=42):
+    """Deterministic train/test row indices, identical in every worker."""
+    return train_test_split(np.arange(n_rows), test_size=test_size, random_state=random_state)
+
+
+def fit_candidate(array_path, target_index, spec, test_size=0.2, random_state=42, test_mask_path=None):
+    """Fit and score one candidate on the shared memory-mapped dataset."""
+    values = np.load(array_path, mmap_mode='r')
+    feature_index = [i for i in range(values.shape[1]) if i != target_index]
+    if test_mask_path is not None:
+        is_test = np.load(test_mask_path, mmap_mode='r')
+        train_idx, test_idx = np.flatnonzero(~is_test), np.flatnonzero(is_test)
+    else:
+        train_idx, test_idx = split_indices(values.shape[0], test_size, random_state)
+
+    start = time.perf_counter()
+    model = build_estimator(spec)
+    model.fit(values[np.ix_(train_idx, feature_index)], values[train_idx, target_index])
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(values[np.ix_(test_idx, feature_index)])
+    y_test = values[test_idx, target_index]
+    return {
+        'name': spec['name'],
+        'spec': spec,
+        'mse': float(mean_squared_error(y_test, y_pred)),
+        'r2': float(r2_score(y_test, y_pred)),
+        'fit_seconds': fit_seconds,
+        'model': model,
+    }
+
+
+def run_sweep(array_path, target_index, candidates=None, n_jobs=None, test_size=0.2, random_state=42,
+              test_mask_path=None):
+    """
+    Fit all candidates in parallel and return their results, best first.
+
+    `array_path` must point to an .npy file (e.g. the dataset cache or an
+    artifact-store object) so that workers can memory-map it. An .npy
+    boolean row mask at `test_mask_path` fixes the held-out rows instead of
+    a random `test_size` split.
+    """
+    candidates = candidates if candidates is not None else expand_candidates()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    args = [(array_path, target_index, spec, test_size, random_state, test_mask_path) for spec in candidates]
+    if n_jobs == 1:
+        results = [fit_candidate(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(args)), initializer=limit_worker_threads) as pool:
+            results = list(pool.map(fit_candidate, *zip(*args)))
+    return sorted(results, key=lambda r: (r['mse'], -r['r2']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep model candidates in parallel.')
+    parser.add_argument('--data-path', default='data/dataset.csv')
+    parser.add_argument('--n-jobs', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    values, columns = load_array(args.data_path)
+    start = time.perf_counter()
+    results = run_sweep(values.filename, columns.index('target'), n_jobs=args.n_jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"Swept {len(results)} candidates in {elapsed:.2f}s")
+    for r in results:
+        print(f"  {r['name']:<40} MSE={r['mse']:.6f} R²={r['r2']:.6f} fit={r['fit_seconds']:.3f}s")
+    print(f"Best candidate: {results[0]['name']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,45 @@
 Training script for the MLOps project.
 Loads dataset, trains a model, and saves it.
 """
+import argparse
+import glob
+import json
+import numpy as np
 import pandas as pd
 import pickle
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 
+from dataset_cache import dataset_hash, load_array, load_frame
+from feature_schema import DEFAULT_SCHEMA_PATH, build_schema, save_schema
+from feature_stats import DEFAULT_SUMMARY_PATH, FeatureSummary, load_summary, save_summary
+from model_artifact import DEFAULT_ARTIFACT_PATH, save_model_artifact
+from model_format import save_compact_model
+from workers import limit_worker_threads
 
-def load_data(data_path='data/dataset.csv'):
-    """Load dataset from CSV file."""
+# Rows per chunk when streaming the dataset from disk
+DEFAULT_CHUNKSIZE = 100_000
+
+# Sufficient statistics persisted next to the model for incremental retraining
+DEFAULT_STATS_PATH = 'models/model_stats.npz'
+
+# Per-fold and aggregate cross-validation metrics
+DEFAULT_CV_PATH = 'models/cv_metrics.json'
+
+
+def load_data(data_path='data/dataset.csv', use_cache=True):
+    """
+    Load dataset from CSV file.
+
+    With `use_cache` the CSV is parsed once into a memory-mapped binary
+    cache keyed by its DVC hash, and later calls skip parsing entirely.
+    """
+    if use_cache:
+        return load_frame(data_path)
     df = pd.read_csv(data_path)
     return df
 
@@ -39,17 +68,478 @@ def evaluate_model(model, X_test, y_test):
     return mse, r2, y_pred
 
 
+def iter_chunks(data_path='data/dataset.csv', chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (X, y, feature_names) from the CSV in chunks of at most `chunksize` rows."""
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        feature_names = [c for c in chunk.columns if c != 'target']
+        X = chunk[feature_names].to_numpy(dtype=np.float64)
+        y = chunk['target'].to_numpy(dtype=np.float64)
+        yield X, y, feature_names
+
+
+class SufficientStatistics:
+    """
+    Running sufficient statistics of a linear least-squares problem.
+
+    Keeps the row count, the mean, minimum and maximum of each feature and
+    of the target, and the centered co-moment matrix of [X, y]. Chunks are
+    folded in with the pairwise update of Chan et al., which stays accurate
+    when the data has a large offset. Memory is O(n_features²) regardless of
+    the number of rows.
+    """
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features + 1)
+        self.comoment = np.zeros((n_features + 1, n_features + 1))
+        self.minimum = np.full(n_features + 1, np.inf)
+        self.maximum = np.full(n_features + 1, -np.inf)
+
+    @property
+    def n_features(self):
+        return self.mean.shape[0] - 1
+
+    def update(self, X, y):
+        """Fold a chunk of rows into the statistics."""
+        Z = np.column_stack([X, y])
+        n_b = Z.shape[0]
+        if n_b == 0:
+            return self
+        mean_b = Z.mean(axis=0)
+        centered = Z - mean_b
+        self._combine(n_b, mean_b, centered.T @ centered)
+        np.minimum(self.minimum, Z.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, Z.max(axis=0), out=self.maximum)
+        return self
+
+    def merge(self, other):
+        """Fold another SufficientStatistics into this one."""
+        if other.n:
+            self._combine(other.n, other.mean, other.comoment)
+            np.minimum(self.minimum, other.minimum, out=self.minimum)
+            np.maximum(self.maximum, other.maximum, out=self.maximum)
+        return self
+
+    def _combine(self, n_b, mean_b, comoment_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+
+    def solve(self):
+        """Return (coef, intercept) of the ordinary least-squares fit."""
+        p = self.n_features
+        sxx = self.comoment[:p, :p]
+        sxy = self.comoment[:p, p]
+        try:
+            coef = np.linalg.solve(sxx, sxy)
+        except np.linalg.LinAlgError:
+            coef = np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+        intercept = self.mean[p] - self.mean[:p] @ coef
+        return coef, intercept
+
+    def raw_moments(self):
+        """Return (XᵀX, Xᵀy, per-feature sums, sum of y) reconstructed from the centered form."""
+        p = self.n_features
+        second = self.comoment + self.n * np.outer(self.mean, self.mean)
+        sums = self.n * self.mean
+        return second[:p, :p], second[:p, p], sums[:p], sums[p]
+
+    def to_arrays(self, prefix):
+        """Serialize to a dict of arrays (for np.savez)."""
+        xtx, xty, x_sum, y_sum = self.raw_moments()
+        return {
+            f'{prefix}_n': np.array(self.n),
+            f'{prefix}_mean': self.mean,
+            f'{prefix}_comoment': self.comoment,
+            f'{prefix}_min': self.minimum,
+            f'{prefix}_max': self.maximum,
+            # Uncentered equivalents, kept for consumers that expect them
+            f'{prefix}_xtx': xtx,
+            f'{prefix}_xty': xty,
+            f'{prefix}_x_sum': x_sum,
+            f'{prefix}_y_sum': np.array(y_sum),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        stats = cls(arrays[f'{prefix}_mean'].shape[0] - 1)
+        stats.n = int(arrays[f'{prefix}_n'])
+        stats.mean = np.array(arrays[f'{prefix}_mean'], dtype=np.float64)
+        stats.comoment = np.array(arrays[f'{prefix}_comoment'], dtype=np.float64)
+        # Statistics saved before ranges were tracked have no min/max
+        if f'{prefix}_min' in arrays:
+            stats.minimum = np.array(arrays[f'{prefix}_min'], dtype=np.float64)
+            stats.maximum = np.array(arrays[f'{prefix}_max'], dtype=np.float64)
+        return stats
+
+    def score(self, coef, intercept):
+        """Return (mse, r2) of a linear model on the rows seen so far."""
+        p = self.n_features
+        sxx = self.comoment[:p, :p]
+        sxy = self.comoment[:p, p]
+        syy = self.comoment[p, p]
+        bias = self.mean[p] - self.mean[:p] @ coef - intercept
+        sse = syy - 2 * coef @ sxy + coef @ sxx @ coef + self.n * bias ** 2
+        sse = max(sse, 0.0)
+        r2 = 1.0 - sse / syy if syy > 0 else 0.0
+        return float(sse / self.n), float(r2)
+
+
+def model_from_coefficients(coef, intercept, feature_names):
+    """Build a fitted LinearRegression from precomputed coefficients."""
+    model = LinearRegression()
+    model.coef_ = np.asarray(coef, dtype=np.float64)
+    model.intercept_ = float(intercept)
+    model.n_features_in_ = len(feature_names)
+    model.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return model
+
+
+def partition_rng(data_path, random_state=42, partition_id=None):
+    """Generator of a partition's train/test split, seeded from its content hash."""
+    partition_id = partition_id or dataset_hash(data_path)
+    return np.random.default_rng([random_state, int(partition_id[:16], 16)])
+
+
+def accumulate_partition(data_path, train_stats=None, test_stats=None,
+                         chunksize=DEFAULT_CHUNKSIZE, test_size=0.2, random_state=42, summary=None):
+    """
+    Fold one CSV partition into running train/test statistics.
+
+    Each row goes to the test set with probability `test_size`. The
+    generator is seeded from `random_state` and the partition's content
+    hash, so a partition is split the same way whether it is folded alone,
+    in a full refit, or in a later incremental run, and for any chunk size.
+    Training rows are also folded into `summary` (a FeatureSummary), if given.
+    Returns (train_stats, test_stats, feature_names).
+    """
+    rng = partition_rng(data_path, random_state)
+    feature_names = None
+    for X, y, names in iter_chunks(data_path, chunksize):
+        if train_stats is None:
+            train_stats = SufficientStatistics(len(names))
+            test_stats = SufficientStatistics(len(names))
+        if train_stats.n_features != len(names):
+            raise ValueError(f"{data_path} has {len(names)} features, expected {train_stats.n_features}")
+        feature_names = names
+        is_test = rng.random(len(y)) < test_size
+        train_stats.update(X[~is_test], y[~is_test])
+        test_stats.update(X[is_test], y[is_test])
+        if summary is not None:
+            summary.update(X[~is_test])
+    return train_stats, test_stats, feature_names
+
+
+def fit_from_statistics(train_stats, test_stats, feature_names):
+    """Solve for the model and score it on the held-out statistics."""
+    if train_stats is None or train_stats.n == 0:
+        raise ValueError("No training rows found")
+    coef, intercept = train_stats.solve()
+    model = model_from_coefficients(coef, intercept, feature_names)
+    metrics = test_stats.score(coef, intercept) if test_stats.n else None
+    return model, metrics
+
+
+def train_model_streaming(data_path='data/dataset.csv', chunksize=DEFAULT_CHUNKSIZE,
+                          test_size=0.2, random_state=42, summary=None):
+    """
+    Train a linear regression in one pass over the CSV without loading it.
+
+    Returns the model, the train and test statistics, and (mse, r2) on the
+    test rows (None when `test_size` is 0).
+    """
+    train_stats, test_stats, feature_names = accumulate_partition(
+        data_path, chunksize=chunksize, test_size=test_size, random_state=random_state, summary=summary
+    )
+    model, metrics = fit_from_statistics(train_stats, test_stats, feature_names)
+    return model, train_stats, test_stats, metrics
+
+
+def save_statistics(train_stats, test_stats, feature_names, partitions, stats_path=DEFAULT_STATS_PATH):
+    """
+    Persist train/test statistics and the partitions already folded into them.
+
+    `partitions` maps partition content hash to file name.
+    """
+    os.makedirs(os.path.dirname(stats_path) or '.', exist_ok=True)
+    tmp_path = f'{stats_path}.{os.getpid()}.tmp.npz'
+    np.savez(
+        tmp_path,
+        feature_names=np.asarray(feature_names),
+        partition_ids=np.asarray(list(partitions), dtype=str),
+        partition_names=np.asarray(list(partitions.values()), dtype=str),
+        **train_stats.to_arrays('train'),
+        **test_stats.to_arrays('test'),
+    )
+    os.replace(tmp_path, stats_path)
+
+
+def load_statistics(stats_path=DEFAULT_STATS_PATH):
+    """Return (train_stats, test_stats, feature_names, partitions) saved by save_statistics."""
+    with np.load(stats_path, allow_pickle=False) as arrays:
+        partitions = dict(zip(arrays['partition_ids'].tolist(), arrays['partition_names'].tolist()))
+        return (
+            SufficientStatistics.from_arrays(arrays, 'train'),
+            SufficientStatistics.from_arrays(arrays, 'test'),
+            arrays['feature_names'].tolist(),
+            partitions,
+        )
+
+
+def plan_partitions(partition_paths, partitions):
+    """
+    Return ([(path, content hash)], rebuild) for an incremental run.
+
+    Partitions are identified by content hash, so a file that was folded in
+    before and has since been edited or regenerated would look new and be
+    added on top of its old rows. When a recorded file name now has a
+    different hash, `rebuild` is True and the statistics must be rebuilt
+    from every partition.
+    """
+    hashes = [(path, dataset_hash(path)) for path in partition_paths]
+    recorded = {name: partition_id for partition_id, name in partitions.items()}
+    rebuild = any(recorded.get(os.path.basename(path), h) != h for path, h in hashes)
+    return hashes, rebuild
+
+
+def pending_partitions(partition_paths, stats_path=DEFAULT_STATS_PATH):
+    """Paths an incremental run would fold (all of them when the statistics need a rebuild)."""
+    partitions = load_statistics(stats_path)[3] if os.path.exists(stats_path) else {}
+    hashes, rebuild = plan_partitions(partition_paths, partitions)
+    return [path for path, h in hashes if rebuild or h not in partitions]
+
+
+def train_incremental(partition_paths, stats_path=DEFAULT_STATS_PATH, chunksize=DEFAULT_CHUNKSIZE,
+                      test_size=0.2, random_state=42, summary=None):
+    """
+    Warm-start retraining: fold only partitions not seen before, then solve.
+
+    The cost is proportional to the new partitions, and the result equals a
+    full streaming refit over all partitions (up to floating-point rounding).
+    If a partition folded earlier has changed since, everything is refolded
+    from scratch (see plan_partitions).
+    Training rows of new partitions are folded into `summary`, if given.
+    Returns (model, train_stats, test_stats, metrics, new_paths).
+    """
+    if os.path.exists(stats_path):
+        train_stats, test_stats, feature_names, partitions = load_statistics(stats_path)
+    else:
+        train_stats = test_stats = feature_names = None
+        partitions = {}
+
+    hashes, rebuild = plan_partitions(partition_paths, partitions)
+    if rebuild:
+        print(f"A partition changed since {stats_path} was written; rebuilding the statistics")
+        train_stats = test_stats = feature_names = None
+        partitions = {}
+        if summary is not None:
+            summary.reset()
+
+    new_paths = []
+    for path, partition_id in hashes:
+        if partition_id in partitions:
+            continue
+        train_stats, test_stats, names = accumulate_partition(
+            path, train_stats, test_stats, chunksize, test_size, random_state, summary
+        )
+        if feature_names is not None and names is not None and names != feature_names:
+            raise ValueError(f"{path} columns {names} do not match {feature_names}")
+        feature_names = feature_names or names
+        partitions[partition_id] = os.path.basename(path)
+        new_paths.append(path)
+
+    model, metrics = fit_from_statistics(train_stats, test_stats, feature_names)
+    if new_paths:
+        save_statistics(train_stats, test_stats, feature_names, partitions, stats_path)
+    return model, train_stats, test_stats, metrics, new_paths
+
+
+def list_partitions(data_path='data/dataset.csv', partitions_dir='data/partitions'):
+    """The base dataset followed by any partition CSVs, oldest name first."""
+    return [data_path] + sorted(glob.glob(os.path.join(partitions_dir, '*.csv')))
+
+
+def load_partitions(partition_paths, test_size=0.2, random_state=42):
+    """
+    Load every partition into one array, split the way incremental runs split.
+
+    Each partition's test rows are drawn exactly as accumulate_partition
+    draws them, so a full retrain and a later warm start train and score on
+    the same rows. A single partition is returned as its memory-mapped
+    dataset cache. Returns (values, columns, is_test, partitions), with
+    `partitions` mapping content hash to file name as in save_statistics.
+    """
+    arrays, masks, partitions = [], [], {}
+    columns = None
+    for path in partition_paths:
+        values, names = load_array(path)
+        if columns is not None and names != columns:
+            raise ValueError(f"{path} columns {names} do not match {columns}")
+        columns = names
+        partition_id = dataset_hash(path)
+        arrays.append(values)
+        masks.append(partition_rng(path, random_state, partition_id).random(len(values)) < test_size)
+        partitions[partition_id] = os.path.basename(path)
+    if not arrays:
+        raise ValueError("No partitions to load")
+    values = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+    return values, columns, np.concatenate(masks), partitions
+
+
+def split_statistics(values, target_index, is_test):
+    """Train and test SufficientStatistics of an in-memory dataset and its test mask."""
+    feature_index = [i for i in range(values.shape[1]) if i != target_index]
+    stats = []
+    for rows in (np.flatnonzero(~is_test), np.flatnonzero(is_test)):
+        stats.append(SufficientStatistics(len(feature_index)).update(
+            values[np.ix_(rows, feature_index)], values[rows, target_index]))
+    return tuple(stats)
+
+
+def schema_from_statistics(train_stats, feature_names):
+    """Feature schema from the ranges tracked by streaming statistics."""
+    p = train_stats.n_features
+    return build_schema(feature_names, train_stats.minimum[:p], train_stats.maximum[:p], target='target')
+
+
+def fold_indices(n_rows, n_splits, repeat, fold, random_state=42):
+    """
+    Sorted (train, test) row indices of one fold of a (repeated) k-fold split.
+
+    Each repeat shuffles the rows with its own seed, so any worker can
+    derive any fold without seeing the others.
+    """
+    order = np.random.default_rng([random_state, repeat]).permutation(n_rows)
+    bounds = np.linspace(0, n_rows, n_splits + 1).astype(np.int64)
+    test_idx = np.sort(order[bounds[fold]:bounds[fold + 1]])
+    is_train = np.ones(n_rows, dtype=bool)
+    is_train[test_idx] = False
+    return np.flatnonzero(is_train), test_idx
+
+
+def fit_fold(array_path, target_index, n_splits, repeat, fold, random_state=42):
+    """Fit and score one fold on the shared memory-mapped dataset."""
+    values = np.load(array_path, mmap_mode='r')
+    feature_index = [i for i in range(values.shape[1]) if i != target_index]
+    train_idx, test_idx = fold_indices(values.shape[0], n_splits, repeat, fold, random_state)
+
+    start = time.perf_counter()
+    model = train_model(values[np.ix_(train_idx, feature_index)], values[train_idx, target_index])
+    fit_seconds = time.perf_counter() - start
+
+    mse, r2, _ = evaluate_model(model, values[np.ix_(test_idx, feature_index)], values[test_idx, target_index])
+    return {
+        'repeat': repeat,
+        'fold': fold,
+        'n_train': int(train_idx.size),
+        'n_test': int(test_idx.size),
+        'mse': float(mse),
+        'r2': float(r2),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def cross_validate(array_path, target_index, n_splits=10, n_repeats=1, n_jobs=None, random_state=42):
+    """
+    Run (repeated) k-fold cross-validation with folds fitted in parallel.
+
+    `array_path` must point to an .npy file (e.g. the dataset cache) so
+    that workers memory-map it instead of each receiving a pickled copy.
+    Returns {'folds': [...], 'aggregate': {...}}.
+    """
+    if n_splits < 2:
+        raise ValueError(f"Cross-validation needs at least 2 folds, got {n_splits}")
+    n_jobs = n_jobs or os.cpu_count() or 1
+    args = [(array_path, target_index, n_splits, repeat, fold, random_state)
+            for repeat in range(n_repeats) for fold in range(n_splits)]
+    start = time.perf_counter()
+    if n_jobs == 1:
+        folds = [fit_fold(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(args)), initializer=limit_worker_threads) as pool:
+            folds = list(pool.map(fit_fold, *zip(*args)))
+    elapsed = time.perf_counter() - start
+
+    aggregate = {'n_splits': n_splits, 'n_repeats': n_repeats, 'n_jobs': n_jobs, 'seconds': elapsed}
+    for metric in ('mse', 'r2', 'fit_seconds'):
+        scores = np.array([f[metric] for f in folds])
+        aggregate[metric] = {'mean': float(scores.mean()), 'std': float(scores.std(ddof=1)),
+                             'min': float(scores.min()), 'max': float(scores.max())}
+    return {'folds': folds, 'aggregate': aggregate}
+
+
+def save_cv_metrics(results, cv_path=DEFAULT_CV_PATH):
+    """Write cross-validation results as JSON, atomically."""
+    os.makedirs(os.path.dirname(cv_path) or '.', exist_ok=True)
+    tmp_path = f'{cv_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, cv_path)
+
+
+def run_cross_validation(data_path, n_splits, n_repeats, n_jobs, cv_path):
+    """Cross-validate on the memory-mapped dataset cache and save the metrics."""
+    values, columns = load_array(data_path)
+    print(f"Cross-validating: {n_repeats} x {n_splits}-fold...")
+    results = cross_validate(values.filename, columns.index('target'), n_splits, n_repeats, n_jobs)
+    aggregate = results['aggregate']
+    print(f"  MSE: {aggregate['mse']['mean']:.4f} ± {aggregate['mse']['std']:.4f}")
+    print(f"  R²: {aggregate['r2']['mean']:.4f} ± {aggregate['r2']['std']:.4f}")
+    print(f"  {len(results['folds'])} fits in {aggregate['seconds']:.2f}s on {aggregate['n_jobs']} worker(s)")
+    save_cv_metrics(results, cv_path)
+    print(f"Cross-validation metrics saved to {cv_path}")
+    return results
+
+
 def save_model(model, model_path='models/model.pkl'):
     """Save trained model to file."""
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    with open(model_path, 'wb') as f:
+    # Write then rename, so a running API never reloads a half-written file
+    tmp_path = f'{model_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
         pickle.dump(model, f)
+    os.replace(tmp_path, model_path)
+
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Train the linear regression model.')
+    parser.add_argument('--mode', choices=['memory', 'streaming', 'incremental'], default='memory',
+                        help='memory: load the whole CSV; streaming: one pass over bounded-size chunks; '
+                             'incremental: fold only new partitions into saved statistics')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help='Rows per chunk in streaming mode')
+    parser.add_argument('--data-path', default='data/dataset.csv')
+    parser.add_argument('--model-path', default='models/model.pkl')
+    parser.add_argument('--compact-model-path', default='models/model.npz',
+                        help='NumPy-only artifact served by the API')
+    parser.add_argument('--artifact-path', default=DEFAULT_ARTIFACT_PATH,
+                        help='Memory-mappable artifact, preferred by the API')
+    parser.add_argument('--stats-path', default=DEFAULT_STATS_PATH,
+                        help='Sufficient statistics saved by streaming/incremental modes')
+    parser.add_argument('--partitions-dir', default='data/partitions',
+                        help='Directory of new CSV partitions for incremental mode')
+    parser.add_argument('--schema-path', default=DEFAULT_SCHEMA_PATH,
+                        help='Feature schema (names, order, dtypes, ranges) used by the API to validate input')
+    parser.add_argument('--summary-path', default=DEFAULT_SUMMARY_PATH,
+                        help='Per-feature training distributions (moments, quantile sketch) for drift monitoring')
+    parser.add_argument('--cv-folds', type=int, default=0,
+                        help='Also run k-fold cross-validation with this many folds (0: holdout split only)')
+    parser.add_argument('--cv-repeats', type=int, default=1,
+                        help='Repeat cross-validation with a different shuffle each time')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                        help='Worker processes for cross-validation (default: all cores)')
+    parser.add_argument('--cv-path', default=DEFAULT_CV_PATH,
+                        help='Per-fold and aggregate cross-validation metrics')
+    return parser.parse_args(argv)
 
-def main():
+
+def run_in_memory(data_path):
+    """Load the dataset into memory, split, train and evaluate."""
     # Load dataset
     print("Loading dataset...")
-    df = load_data('data/dataset.csv')
+    df = load_data(data_path)
     
     # Separate features and target
     X, y = prepare_data(df)
@@ -68,17 +558,80 @@ def main():
     
     # Evaluate model
     mse, r2, y_pred = evaluate_model(model, X_test, y_test)
+    schema = build_schema(list(X_train.columns), X_train.min().to_numpy(), X_train.max().to_numpy(),
+                          [str(t) for t in X_train.dtypes], target=y.name)
+    summary = FeatureSummary(list(X_train.columns)).update(X_train.to_numpy())
+    return model, mse, r2, schema, summary
+
+
+def run_streaming(data_path, chunksize, stats_path):
+    """Train and evaluate in one pass over the CSV."""
+    print(f"Streaming dataset in chunks of {chunksize} rows...")
+    summary = FeatureSummary()
+    model, train_stats, test_stats, metrics = train_model_streaming(data_path, chunksize, summary=summary)
+    print(f"Training set size: {train_stats.n}")
+    print(f"Test set size: {test_stats.n}")
+    # Seed the statistics so later incremental runs can warm-start
+    partitions = {dataset_hash(data_path): os.path.basename(data_path)}
+    save_statistics(train_stats, test_stats, list(model.feature_names_in_), partitions, stats_path)
+    mse, r2 = metrics if metrics else (float('nan'), float('nan'))
+    summary.feature_names = list(model.feature_names_in_)
+    return model, mse, r2, schema_from_statistics(train_stats, list(model.feature_names_in_)), summary
+
+
+def run_incremental(data_path, partitions_dir, chunksize, stats_path, summary_path):
+    """Fold new partitions into the saved statistics and re-solve."""
+    paths = list_partitions(data_path, partitions_dir)
+    # The saved summary covers the same partitions as the saved statistics
+    if os.path.exists(stats_path) and os.path.exists(summary_path):
+        summary = load_summary(summary_path)
+    else:
+        if os.path.exists(stats_path):
+            print(f"Warning: {summary_path} not found, feature summary covers new partitions only")
+        summary = FeatureSummary()
+    model, train_stats, test_stats, metrics, new_paths = train_incremental(paths, stats_path, chunksize,
+                                                                           summary=summary)
+    print(f"Folded {len(new_paths)} new partition(s): {[os.path.basename(p) for p in new_paths]}")
+    print(f"Training set size: {train_stats.n}")
+    print(f"Test set size: {test_stats.n}")
+    mse, r2 = metrics if metrics else (float('nan'), float('nan'))
+    summary.feature_names = list(model.feature_names_in_)
+    return model, mse, r2, schema_from_statistics(train_stats, list(model.feature_names_in_)), summary
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.mode == 'streaming':
+        model, mse, r2, schema, summary = run_streaming(args.data_path, args.chunksize, args.stats_path)
+    elif args.mode == 'incremental':
+        model, mse, r2, schema, summary = run_incremental(args.data_path, args.partitions_dir, args.chunksize,
+                                                          args.stats_path, args.summary_path)
+    else:
+        model, mse, r2, schema, summary = run_in_memory(args.data_path)
     
     print(f"Model performance:")
     print(f"  MSE: {mse:.4f}")
     print(f"  R²: {r2:.4f}")
     
+    if args.cv_folds:
+        run_cross_validation(args.data_path, args.cv_folds, args.cv_repeats, args.n_jobs, args.cv_path)
+    
+    # Save the schema and summary first, so an API reloading the new model also sees them
+    save_schema(schema, args.schema_path)
+    save_summary(summary, args.summary_path)
+    
     # Save model
-    model_path = 'models/model.pkl'
+    model_path = args.model_path
     save_model(model, model_path)
+    save_compact_model(model, args.compact_model_path)
+    save_model_artifact(model, args.artifact_path)
     
+    print(f"Feature schema saved to {args.schema_path}")
+    print(f"Feature summary saved to {args.summary_path}")
     print(f"Model saved to {model_path}")
+    print(f"Compact model saved to {args.compact_model_path}")
+    print(f"Memory-mappable model saved to {args.artifact_path}")
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Process-pool helpers shared by the candidate sweep and cross-validation.
+"""
+
+
+def limit_worker_threads():
+    """Pool initializer: one BLAS thread per process, so N workers use N cores rather than N²."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
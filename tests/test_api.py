@@ -0,0 +1,1034 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the inference API.
+"""
+import unittest
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+import numpy as np
+from pathlib import Path
+
+# Add src and api directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'api'))
+
+import app as api  # noqa: E402
+from predictor import LinearPredictor  # noqa: E402
+from batching import MicroBatcher  # noqa: E402
+from reload import ModelWatcher  # noqa: E402
+from cache import PredictionCache  # noqa: E402
+from metrics import Histogram, ServiceMetrics  # noqa: E402
+from registry import ModelNotFound, ModelRegistry, version_key  # noqa: E402
+from shadow import DeltaStats, ShadowScorer  # noqa: E402
+from drift import DriftMonitor  # noqa: E402
+import payloads  # noqa: E402
+import asgi  # noqa: E402
+from model_format import save_compact_model  # noqa: E402
+from model_artifact import ArtifactError, save_model_artifact, save_pickle  # noqa: E402
+from feature_schema import build_schema, save_schema  # noqa: E402
+from feature_stats import FeatureSummary, save_summary  # noqa: E402
+from validation import FeatureValidator  # noqa: E402
+from train import load_data, prepare_data, train_model  # noqa: E402
+
+
+class APITestCase(unittest.TestCase):
+    """Serve a freshly trained compact model through the Flask test client."""
+    
+    @classmethod
+    def setUpClass(cls):
+        df = load_data('data/dataset.csv')
+        cls.X, cls.y = prepare_data(df)
+        cls.sk_model = train_model(cls.X, cls.y)
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.tmpdir.name, 'model.npz')
+        save_compact_model(cls.sk_model, cls.model_path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+    
+    def setUp(self):
+        # Keep a locally trained models/model.bin from taking precedence
+        artifact_path, api.ARTIFACT_PATH = api.ARTIFACT_PATH, os.path.join(self.tmpdir.name, 'absent.bin')
+        self.addCleanup(setattr, api, 'ARTIFACT_PATH', artifact_path)
+        api.model = LinearPredictor.from_file(self.model_path)
+        api.prediction_cache = PredictionCache()
+        self.client = api.app.test_client()
+
+
+class TestPredictEndpoints(APITestCase):
+    """Test the JSON prediction contract."""
+    
+    def test_health_reports_model_loaded(self):
+        """Test that /health reports the loaded model."""
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['model_loaded'])
+    
+    def test_stats_reports_worker_memory(self):
+        """Test that /stats reports this process's pid and memory."""
+        worker = self.client.get('/stats').get_json()['worker']
+        self.assertEqual(worker['pid'], os.getpid())
+        self.assertTrue(worker['memory'])
+    
+    def test_predict_matches_sklearn(self):
+        """Test that the NumPy predictor matches the sklearn estimator."""
+        row = self.X.iloc[0].tolist()
+        response = self.client.post('/predict', json={'features': row})
+        self.assertEqual(response.status_code, 200)
+        expected = self.sk_model.predict(self.X.iloc[:1])[0]
+        self.assertAlmostEqual(response.get_json()['prediction'], expected, places=10)
+    
+    def test_predict_rejects_wrong_feature_count(self):
+        """Test that /predict validates the number of features."""
+        response = self.client.post('/predict', json={'features': [1.0, 2.0]})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_predict_batch_matches_sklearn(self):
+        """Test batch predictions against the sklearn estimator."""
+        rows = self.X.iloc[:20].values.tolist()
+        response = self.client.post('/predict/batch', json={'features': rows})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['count'], 20)
+        np.testing.assert_allclose(body['predictions'], self.sk_model.predict(self.X.iloc[:20]))
+
+
+class TestSchemaValidation(APITestCase):
+    """Test request validation against the saved feature schema."""
+    
+    def setUp(self):
+        super().setUp()
+        self.names = list(self.X.columns)
+        schema = build_schema(self.names, self.X.min().values, self.X.max().values)
+        api.model.validator = FeatureValidator(schema)
+    
+    def test_named_rows_match_positional_rows(self):
+        """Test that {name: value} rows are reordered into schema order."""
+        rows = self.X.iloc[:5]
+        named = [dict(reversed(list(row.items()))) for row in rows.to_dict('records')]
+        body = self.client.post('/predict/batch', json={'features': named}).get_json()
+        np.testing.assert_allclose(body['predictions'], self.sk_model.predict(rows))
+        response = self.client.post('/predict', json={'features': named[0]})
+        self.assertAlmostEqual(response.get_json()['prediction'], body['predictions'][0], places=10)
+    
+    def test_feature_names_reorder_columns(self):
+        """Test that "feature_names" gives the column order of positional rows."""
+        rows = self.X.iloc[:5]
+        shuffled = self.names[::-1]
+        response = self.client.post('/predict/batch', json={'features': rows[shuffled].values.tolist(),
+                                                            'feature_names': shuffled})
+        np.testing.assert_allclose(response.get_json()['predictions'], self.sk_model.predict(rows))
+    
+    def test_out_of_range_value_is_reported(self):
+        """Test that the 400 response names the offending row and feature."""
+        rows = self.X.iloc[:5].values.tolist()
+        rows[3][1] = 1e6
+        response = self.client.post('/predict/batch', json={'features': rows})
+        self.assertEqual(response.status_code, 400)
+        body = response.get_json()
+        self.assertEqual(body['details'], [{'row': 3, 'feature': self.names[1], 'value': 1e6,
+                                            'reason': body['details'][0]['reason']}])
+        self.assertIn('above maximum', body['details'][0]['reason'])
+    
+    def test_non_finite_values_are_rejected(self):
+        """Test that NaN is rejected even by a names-only validator."""
+        api.model.validator = FeatureValidator.for_names(self.names)
+        rows = self.X.iloc[:2].values.tolist()
+        rows[0][0] = float('nan')
+        response = self.client.post('/predict/batch', json={'features': rows})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['details'][0]['reason'], 'not a finite number')
+    
+    def test_swapped_columns_get_a_hint(self):
+        """Test that values fitting another feature's range suggest a column mix-up."""
+        lower = np.array([0.0, 100.0, 0.0, 0.0, 0.0])
+        upper = np.array([1.0, 200.0, 1.0, 1.0, 1.0])
+        api.model.validator = FeatureValidator(build_schema(self.names, lower, upper, range_margin=0.0))
+        response = self.client.post('/predict/batch', json={'features': [[150.0, 0.5, 0.5, 0.5, 0.5]]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('columns may be out of order', response.get_json()['error'])
+        response = self.client.post('/predict', json={'features': [150.0, 0.5, 0.5, 0.5, 0.5]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('columns may be out of order', response.get_json()['error'])
+    
+    def test_missing_and_unknown_names_are_reported(self):
+        """Test that malformed named rows list what is missing or unknown."""
+        row = dict(zip(self.names, self.X.iloc[0].tolist()))
+        row.pop(self.names[0])
+        row['extra'] = 1.0
+        response = self.client.post('/predict/batch', json={'features': [row]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['details'],
+                         [{'row': 0, 'missing': [self.names[0]], 'unknown': ['extra']}])
+    
+    def test_read_model_loads_schema(self):
+        """Test that read_model attaches the validator from SCHEMA_PATH."""
+        schema_path = os.path.join(self.tmpdir.name, 'feature_schema.json')
+        save_schema(build_schema(self.names, np.zeros(5), np.ones(5), range_margin=0.0), schema_path)
+        paths = (api.COMPACT_MODEL_PATH, api.SCHEMA_PATH)
+        api.COMPACT_MODEL_PATH, api.SCHEMA_PATH = self.model_path, schema_path
+        self.addCleanup(lambda: (setattr(api, 'COMPACT_MODEL_PATH', paths[0]),
+                                 setattr(api, 'SCHEMA_PATH', paths[1])))
+        loaded = api.read_model()
+        np.testing.assert_array_equal(loaded.validator.upper, np.ones(5))
+    
+    def test_pickles_need_an_explicit_opt_in(self):
+        """Test that a pickled model is only unpickled when MODEL_ALLOW_PICKLE is set."""
+        pickle_path = os.path.join(self.tmpdir.name, 'model.pkl')
+        save_pickle(self.sk_model, pickle_path)
+        self.addCleanup(setattr, api, 'MODEL_ALLOW_PICKLE', api.MODEL_ALLOW_PICKLE)
+        api.MODEL_ALLOW_PICKLE = False
+        with self.assertRaises(ArtifactError):
+            api.load_model_file(pickle_path, api.SCHEMA_PATH)
+        api.MODEL_ALLOW_PICKLE = True
+        loaded = api.load_model_file(pickle_path, api.SCHEMA_PATH)
+        self.assertIsInstance(loaded, LinearPredictor)
+        np.testing.assert_allclose(loaded.predict(self.X.to_numpy()[:3]), self.sk_model.predict(self.X.iloc[:3]))
+
+
+class TestModelRegistry(unittest.TestCase):
+    """Test lazy loading, LRU eviction and load deduplication."""
+    
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.loads = []
+        for name, version in [('eu', '1'), ('eu', '2'), ('eu', '10'), ('us', '1'), ('asia', '1')]:
+            os.makedirs(os.path.join(self.root.name, name, version))
+            with open(os.path.join(self.root.name, name, version, 'model.bin'), 'wb') as f:
+                f.write(b'x' * 100)
+    
+    def load(self, model_path, schema_path):
+        self.loads.append(model_path)
+        return model_path
+    
+    def test_versions_sort_numerically(self):
+        """Test that the latest version is the numerically highest one."""
+        registry = ModelRegistry(self.root.name, self.load)
+        self.assertEqual(registry.versions('eu'), ['1', '2', '10'])
+        self.assertEqual(registry.latest_version('eu'), '10')
+        self.assertLess(version_key('v1.9'), version_key('v1.10'))
+    
+    def test_peek_without_listing_uses_only_the_cached_latest(self):
+        """Test that peek(list_versions=False) never lists versions and misses on a stale cache."""
+        now = [0.0]
+        registry = ModelRegistry(self.root.name, self.load, latest_ttl=5, clock=lambda: now[0])
+        self.assertIsNone(registry.peek('eu', list_versions=False))
+        self.assertNotIn('eu', registry._latest)
+        loaded = registry.get('eu')
+        self.assertEqual(registry.peek('eu', list_versions=False), loaded)
+        now[0] = 10.0
+        self.assertIsNone(registry.peek('eu', list_versions=False))
+        self.assertEqual(registry.peek('eu', '10', list_versions=False), loaded)
+    
+    def test_pickles_are_ignored_without_opt_in(self):
+        """Test that a registry version holding only model.pkl is not served unless pickles are allowed."""
+        os.makedirs(os.path.join(self.root.name, 'eu', '11'))
+        with open(os.path.join(self.root.name, 'eu', '11', 'model.pkl'), 'wb') as f:
+            f.write(b'\x80' + b'x' * 99)
+        registry = ModelRegistry(self.root.name, self.load)
+        self.assertEqual(registry.latest_version('eu'), '10')
+        with self.assertRaises(ModelNotFound):
+            registry.get('eu', '11')
+        self.assertEqual(self.loads, [])
+        trusting = ModelRegistry(self.root.name, self.load, allow_pickle=True)
+        self.assertTrue(trusting.get('eu').endswith(os.path.join('eu', '11', 'model.pkl')))
+    
+    def test_models_load_lazily_once(self):
+        """Test that a model is loaded on first use and then served from memory."""
+        registry = ModelRegistry(self.root.name, self.load)
+        self.assertEqual(self.loads, [])
+        first = registry.get('eu', '2')
+        self.assertEqual(registry.get('eu', '2'), first)
+        self.assertEqual(len(self.loads), 1)
+        self.assertTrue(first.endswith(os.path.join('eu', '2', 'model.bin')))
+        self.assertEqual(registry.stats()['hits'], 1)
+    
+    def test_least_recently_used_is_evicted(self):
+        """Test that the budget evicts the least recently used model."""
+        registry = ModelRegistry(self.root.name, self.load, memory_budget_bytes=250)
+        registry.get('eu', '1')
+        registry.get('us')
+        registry.get('eu', '1')
+        registry.get('asia')
+        loaded = [(m['name'], m['version']) for m in registry.stats()['loaded']]
+        self.assertEqual(loaded, [('eu', '1'), ('asia', '1')])
+        self.assertEqual(registry.stats()['evictions'], 1)
+        self.assertLessEqual(registry.stats()['loaded_bytes'], 250)
+    
+    def test_concurrent_cold_requests_load_once(self):
+        """Test that a burst of requests for a cold model triggers one load."""
+        release = threading.Event()
+        
+        def slow_load(model_path, schema_path):
+            release.wait(5)
+            return self.load(model_path, schema_path)
+        
+        registry = ModelRegistry(self.root.name, slow_load)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('us', '1'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while registry.stats()['coalesced'] < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(results), 8)
+    
+    def test_failed_load_is_shared_and_retried(self):
+        """Test that waiters see a failed load and the next request retries it."""
+        calls = []
+        
+        def flaky_load(model_path, schema_path):
+            calls.append(model_path)
+            if len(calls) == 1:
+                raise ValueError('corrupt artifact')
+            return model_path
+        
+        registry = ModelRegistry(self.root.name, flaky_load)
+        with self.assertRaises(ValueError):
+            registry.get('us')
+        self.assertEqual(registry.get('us'), calls[1])
+        self.assertEqual(registry.stats()['failures'], 1)
+    
+    def test_unknown_and_unsafe_names_are_not_found(self):
+        """Test that unknown models, versions and path tricks raise ModelNotFound."""
+        registry = ModelRegistry(self.root.name, self.load)
+        for name, version in [('mars', None), ('eu', '3'), ('..', '1'), ('eu', '../us/1')]:
+            with self.assertRaises(ModelNotFound):
+                registry.get(name, version)
+        self.assertEqual(self.loads, [])
+
+
+class TestRegistryServing(APITestCase):
+    """Test routing requests to registry models by URL and header."""
+    
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        self.models = {}
+        for version, scale in [('1', 2.0), ('2', 3.0)]:
+            model = train_model(self.X, self.y)
+            model.coef_ = model.coef_ * scale
+            directory = os.path.join(self.root.name, 'eu', version)
+            save_model_artifact(model, os.path.join(directory, 'model.bin'))
+            self.models[version] = model
+        saved = api.registry
+        api.registry = ModelRegistry(self.root.name, api.load_model_file)
+        self.addCleanup(setattr, api, 'registry', saved)
+        self.rows = self.X.iloc[:4]
+    
+    def test_url_selects_model_and_version(self):
+        """Test /models/<name>[/versions/<version>]/predict/batch routing."""
+        latest = self.client.post('/models/eu/predict/batch', json={'features': self.rows.values.tolist()})
+        np.testing.assert_allclose(latest.get_json()['predictions'], self.models['2'].predict(self.rows))
+        pinned = self.client.post('/models/eu/versions/1/predict', json={'features': self.rows.iloc[0].tolist()})
+        self.assertAlmostEqual(pinned.get_json()['prediction'], self.models['1'].predict(self.rows.iloc[:1])[0])
+    
+    def test_headers_select_model(self):
+        """Test X-Model-Name / X-Model-Version routing on the default endpoints."""
+        response = self.client.post('/predict/batch', json={'features': self.rows.values.tolist()},
+                                    headers={'X-Model-Name': 'eu', 'X-Model-Version': '1'})
+        np.testing.assert_allclose(response.get_json()['predictions'], self.models['1'].predict(self.rows))
+        default = self.client.post('/predict/batch', json={'features': self.rows.values.tolist()})
+        np.testing.assert_allclose(default.get_json()['predictions'], self.sk_model.predict(self.rows))
+    
+    def test_unknown_model_is_404(self):
+        """Test that unknown names and versions are 404s."""
+        self.assertEqual(self.client.post('/models/us/predict', json={'features': [0] * 5}).status_code, 404)
+        response = self.client.post('/predict', json={'features': [0] * 5}, headers={'X-Model-Name': 'eu',
+                                                                                      'X-Model-Version': '9'})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_models_listing(self):
+        """Test that /models lists versions and what is loaded."""
+        self.client.post('/models/eu/predict', json={'features': self.rows.iloc[0].tolist()})
+        body = self.client.get('/models').get_json()
+        self.assertEqual(body['models'], {'eu': ['1', '2']})
+        self.assertEqual([(m['name'], m['version']) for m in body['loaded']], [('eu', '2')])
+    
+    def test_asgi_routes_to_registry(self):
+        """Test that the ASGI server resolves registry models the same way."""
+        payload = json.dumps({'features': self.rows.values.tolist()}).encode()
+        status, _, body = call_asgi('POST', '/models/eu/versions/1/predict/batch', payload)
+        self.assertEqual(status, 200)
+        np.testing.assert_allclose(json.loads(body)['predictions'], self.models['1'].predict(self.rows))
+        status, _, _ = call_asgi('POST', '/predict', payload, {'X-Model-Name': 'nope'})
+        self.assertEqual(status, 404)
+
+
+class TestShadowScoring(APITestCase):
+    """Test background scoring of live traffic with a candidate model."""
+    
+    def setUp(self):
+        super().setUp()
+        self.candidate = LinearPredictor(api.model.coef * 1.5, api.model.intercept + 0.25, api.model.feature_names,
+                                         version='candidate')
+        self.addCleanup(setattr, api, 'shadow', api.shadow)
+        self.addCleanup(setattr, api, 'metrics', api.metrics)
+        api.metrics = ServiceMetrics()
+    
+    def test_delta_stats_match_numpy(self):
+        """Test that batch-merged statistics equal statistics of all deltas."""
+        rng = np.random.default_rng(0)
+        batches = [rng.normal(0.3, 2.0, size=n) for n in (1, 7, 100, 3)]
+        stats = DeltaStats()
+        for batch in batches:
+            stats.update(batch)
+        everything = np.concatenate(batches)
+        summary = stats.summary()
+        self.assertEqual(summary['count'], everything.size)
+        self.assertAlmostEqual(summary['mean'], everything.mean())
+        self.assertAlmostEqual(summary['std'], everything.std(ddof=1))
+        self.assertAlmostEqual(summary['rmse'], np.sqrt(np.mean(everything ** 2)))
+        self.assertAlmostEqual(summary['max_abs'], np.abs(everything).max())
+    
+    def test_vectorized_histogram_matches_scalar(self):
+        """Test that Histogram.observe_many buckets like repeated observe."""
+        values = np.array([0.0, 1e-9, 0.005, 0.01, 0.3, 7.0, 1e6])
+        one, many = Histogram([1e-9, 0.01, 1.0]), Histogram([1e-9, 0.01, 1.0])
+        for v in values:
+            one.observe(v)
+        many.observe_many(values)
+        self.assertEqual(one.snapshot(), many.snapshot())
+    
+    def test_endpoints_feed_the_shadow(self):
+        """Test that /predict and /predict/batch deltas reach the shadow and /metrics."""
+        api.shadow = ShadowScorer(self.candidate, metrics=api.metrics)
+        rows = self.X.iloc[:10]
+        self.client.post('/predict/batch', json={'features': rows.values.tolist()})
+        self.client.post('/predict', json={'features': rows.iloc[0].tolist()})
+        self.assertTrue(api.shadow.drain(5))
+        stats = self.client.get('/stats').get_json()['shadow']
+        self.assertEqual(stats['scored_rows'], 11)
+        primary = self.sk_model.predict(rows)
+        expected = np.concatenate([self.candidate.predict(rows.values) - primary,
+                                   self.candidate.predict(rows.values[:1]) - primary[:1]])
+        self.assertAlmostEqual(stats['delta']['mean'], expected.mean())
+        self.assertAlmostEqual(stats['delta']['max_abs'], np.abs(expected).max())
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('api_shadow_abs_delta_count 11', text)
+        self.assertIn('api_shadow_dropped_rows_total 0', text)
+    
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that submissions are dropped, not waited for, when the candidate falls behind."""
+        release = threading.Event()
+        candidate = self.candidate
+        
+        class SlowCandidate:
+            def predict(self, X):
+                release.wait(5)
+                return candidate.predict(X)
+        
+        scorer = ShadowScorer(SlowCandidate(), max_queue=2)
+        X = self.X.to_numpy()[:3]
+        primary = self.sk_model.predict(self.X.iloc[:3])
+        self.assertTrue(scorer.submit(X, primary))
+        while scorer._queue.qsize():
+            threading.Event().wait(0.01)
+        self.assertTrue(scorer.submit(X, primary))
+        self.assertTrue(scorer.submit(X, primary))
+        self.assertFalse(scorer.submit(X, primary))
+        release.set()
+        self.assertTrue(scorer.drain(5))
+        stats = scorer.stats()
+        self.assertEqual(stats['dropped_rows'], 3)
+        self.assertEqual(stats['scored_rows'], 9)
+        # The two requests that queued up behind the slow call were scored together
+        self.assertEqual(stats['batches'], 2)
+    
+    def test_mismatched_candidate_is_not_shadowed(self):
+        """Test that a candidate with a different feature count is refused."""
+        path = os.path.join(self.tmpdir.name, 'wide', 'model.bin')
+        wide = train_model(np.random.rand(20, 6), np.random.rand(20))
+        save_model_artifact(wide, path)
+        api.shadow = None
+        self.assertIsNone(api.load_shadow_model(path))
+        self.assertIsNone(api.shadow)
+
+
+class TestDriftMonitoring(APITestCase):
+    """Test streaming drift scores of live inputs against the training summary."""
+    
+    def setUp(self):
+        super().setUp()
+        self.reference = FeatureSummary(list(self.X.columns)).update(self.X.to_numpy())
+        api.model.feature_summary = self.reference
+        self.addCleanup(setattr, api, 'drift', api.drift)
+        api.drift = DriftMonitor(buffer_rows=64, min_rows=50)
+    
+    def test_buffered_rows_are_summarized(self):
+        """Test that rows waiting in the buffer count toward the live summary."""
+        X = self.X.to_numpy()
+        api.drift.observe(X[:10])
+        api.drift.observe(X[10:100])
+        self.assertEqual(api.drift._filled, 100 - 64)
+        live = api.drift.live_summary()
+        self.assertEqual(live.n, 100)
+        np.testing.assert_allclose(live.mean, X[:100].mean(axis=0), rtol=1e-10)
+    
+    def test_window_rotation_bounds_history(self):
+        """Test that the live summary only spans the last one to two windows."""
+        monitor = DriftMonitor(window_rows=100, buffer_rows=10)
+        X = self.X.to_numpy()
+        monitor.observe(X[:250])
+        live = monitor.live_summary()
+        self.assertGreaterEqual(live.n, 100)
+        self.assertLessEqual(live.n, 200)
+        self.assertEqual(monitor.observed_rows, 250)
+        np.testing.assert_allclose(live.mean, X[250 - live.n:250].mean(axis=0), rtol=1e-10)
+    
+    def test_large_requests_are_sampled(self):
+        """Test that a request over the row limit contributes a strided sample."""
+        monitor = DriftMonitor(max_rows_per_request=100)
+        monitor.observe(self.X.to_numpy()[:1000])
+        self.assertEqual(monitor.live_summary().n, 100)
+    
+    def test_drift_endpoint(self):
+        """Test that /drift scores default-model traffic and returns a mergeable summary."""
+        X = self.X.to_numpy()
+        self.assertIsNone(self.client.get('/drift').get_json()['features'])
+        self.client.post('/predict/batch', json={'features': X[:300].tolist()})
+        self.client.post('/predict', json={'features': X[300].tolist()})
+        body = self.client.get('/drift').get_json()
+        self.assertEqual(body['observed_rows'], 301)
+        self.assertEqual(list(body['features']), list(self.X.columns))
+        for score in body['features'].values():
+            self.assertLess(score['mean_shift'], 0.5)
+        merged = FeatureSummary.from_dict(body['live_summary']).merge(FeatureSummary.from_dict(body['live_summary']))
+        self.assertEqual(merged.n, 602)
+    
+        shifted = X[:300].copy()
+        shifted[:, 0] += 5 * X[:, 0].std()
+        api.drift = DriftMonitor(min_rows=50)
+        self.client.post('/predict/batch', json={'features': shifted.tolist()})
+        scores = self.client.get('/drift').get_json()['features']
+        self.assertGreater(scores['feature_1']['psi'], 1.0)
+        self.assertLess(scores['feature_2']['psi'], 0.25)
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('api_feature_drift_psi{feature="feature_1"}', text)
+        self.assertIn('api_drift_observed_rows_total 300', text)
+        # Drift gauges do not depend on which ServiceMetrics instance is live
+        self.addCleanup(setattr, api, 'metrics', api.metrics)
+        api.metrics = ServiceMetrics()
+        _, _, body = call_asgi('GET', '/metrics')
+        self.assertIn('api_feature_drift_psi{feature="feature_1"}', body.decode())
+    
+    def test_reference_summary_is_loaded_with_the_model(self):
+        """Test that read_model attaches a matching training summary."""
+        summary_path = os.path.join(self.tmpdir.name, 'feature_summary.json')
+        save_summary(self.reference, summary_path)
+        paths = (api.COMPACT_MODEL_PATH, api.FEATURE_SUMMARY_PATH)
+        api.COMPACT_MODEL_PATH, api.FEATURE_SUMMARY_PATH = self.model_path, summary_path
+        self.addCleanup(lambda: (setattr(api, 'COMPACT_MODEL_PATH', paths[0]),
+                                 setattr(api, 'FEATURE_SUMMARY_PATH', paths[1])))
+        loaded = api.read_model()
+        self.assertEqual(loaded.feature_summary.n, self.reference.n)
+        save_summary(FeatureSummary(['other'] * 5).update(self.X.to_numpy()), summary_path)
+        self.assertIsNone(api.read_model().feature_summary)
+
+
+class TestMicroBatching(APITestCase):
+    """Test coalescing of concurrent single-row predictions."""
+    
+    def tearDown(self):
+        api.batcher = None
+    
+    def test_concurrent_rows_are_batched(self):
+        """Test that concurrent callers share batches and get their own results."""
+        calls = []
+        
+        def predict_fn(X):
+            calls.append(len(X))
+            return X.sum(axis=1)
+        
+        batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=50)
+        rows = [np.full(3, i, dtype=float) for i in range(16)]
+        futures = [batcher.submit(row) for row in rows]
+        results = [f.result(timeout=5) for f in futures]
+        self.assertEqual(results, [3.0 * i for i in range(16)])
+        self.assertLessEqual(max(calls), 8)
+        stats = batcher.stats()
+        self.assertEqual(stats['requests'], 16)
+        self.assertGreater(stats['max_batch_size_seen'], 1)
+    
+    def test_rows_are_scored_by_the_model_they_came_with(self):
+        """Test that a batch spanning a hot reload scores each row with its request's model."""
+        old = api.model
+        new = LinearPredictor(old.coef * 2.0, old.intercept, old.feature_names, version='new')
+        batcher = MicroBatcher(api._predict_rows, max_batch_size=8, max_wait_ms=50)
+        rows = self.X.iloc[:6].to_numpy()
+        futures = [batcher.submit(row, old if i % 2 else new) for i, row in enumerate(rows)]
+        api._swap_model(new)
+        self.addCleanup(api._swap_model, old)
+        results = [f.result(timeout=5) for f in futures]
+        expected = [(old if i % 2 else new).predict(row[None])[0] for i, row in enumerate(rows)]
+        np.testing.assert_allclose(results, expected)
+    
+    def test_errors_reach_every_caller(self):
+        """Test that a failing batch raises in each waiting caller."""
+        def predict_fn(X):
+            raise ValueError('boom')
+        
+        batcher = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.predict(np.zeros(3), timeout=5)
+    
+    def test_predict_endpoint_uses_batcher(self):
+        """Test /predict through the batcher from several threads."""
+        api.batcher = MicroBatcher(api._predict_rows, max_batch_size=16, max_wait_ms=5)
+        rows = self.X.iloc[:8].values.tolist()
+        results = [None] * len(rows)
+        
+        def call(i):
+            client = api.app.test_client()
+            results[i] = client.post('/predict', json={'features': rows[i]}).get_json()['prediction']
+        
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(rows))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        np.testing.assert_allclose(results, self.sk_model.predict(self.X.iloc[:8]))
+        stats = self.client.get('/stats').get_json()['batching']
+        self.assertEqual(stats['requests'], len(rows))
+
+
+class TestBinaryBatchInput(APITestCase):
+    """Test content negotiation on /predict/batch."""
+    
+    def setUp(self):
+        super().setUp()
+        self.rows = self.X.iloc[:50].to_numpy()
+        self.expected = self.sk_model.predict(self.X.iloc[:50])
+    
+    def test_npy_round_trip(self):
+        """Test .npy request and response bodies."""
+        buffer = io.BytesIO()
+        np.save(buffer, self.rows)
+        response = self.client.post('/predict/batch', data=buffer.getvalue(),
+                                    content_type=payloads.NPY)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, payloads.NPY)
+        np.testing.assert_allclose(np.load(io.BytesIO(response.data)), self.expected)
+    
+    def test_npy_decode_is_zero_copy(self):
+        """Test that decoded .npy arrays share memory with the body."""
+        buffer = io.BytesIO()
+        np.save(buffer, self.rows)
+        body = buffer.getvalue()
+        decoded = payloads.decode_npy(body)
+        np.testing.assert_array_equal(decoded, self.rows)
+        self.assertFalse(decoded.flags.owndata)
+    
+    def test_non_numeric_npy_is_rejected(self):
+        """Test that string and structured .npy arrays get a 400, not a 500."""
+        arrays = [self.rows.astype(str), np.zeros((2, 5), dtype=[('a', '<f8'), ('b', '<i4')])]
+        for array in arrays:
+            buffer = io.BytesIO()
+            np.save(buffer, array)
+            response = self.client.post('/predict/batch', data=buffer.getvalue(),
+                                        content_type=payloads.NPY)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('numeric', response.get_json()['error'])
+        buffer = io.BytesIO()
+        np.save(buffer, self.rows.astype(np.int64))
+        response = self.client.post('/predict/batch', data=buffer.getvalue(), content_type=payloads.NPY)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_raw_float32_buffer(self):
+        """Test raw little-endian float32 input with a shape header."""
+        body = self.rows.astype('<f4').tobytes()
+        response = self.client.post('/predict/batch', data=body, content_type=payloads.RAW,
+                                    headers={'X-Shape': '50,5', 'X-Dtype': 'float32'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Shape'], '50')
+        predictions = np.frombuffer(response.data, dtype='<f8')
+        np.testing.assert_allclose(predictions, self.expected, rtol=1e-5, atol=1e-5)
+    
+    def test_raw_buffer_size_mismatch(self):
+        """Test that a raw body that disagrees with X-Shape is rejected."""
+        response = self.client.post('/predict/batch', data=b'\x00' * 10, content_type=payloads.RAW,
+                                    headers={'X-Shape': '50,5'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_shape_checks_apply_to_binary_input(self):
+        """Test that binary input with the wrong width is rejected."""
+        buffer = io.BytesIO()
+        np.save(buffer, self.rows[:, :3])
+        response = self.client.post('/predict/batch', data=buffer.getvalue(),
+                                    content_type=payloads.NPY)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_unknown_content_type(self):
+        """Test that unsupported media types get 415."""
+        response = self.client.post('/predict/batch', data=b'1,2,3,4,5', content_type='text/csv')
+        self.assertEqual(response.status_code, 415)
+    
+    def test_arrow_round_trip(self):
+        """Test Arrow IPC request and response bodies."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        table = pa.table({f'feature_{i+1}': self.rows[:, i] for i in range(5)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        response = self.client.post('/predict/batch', data=sink.getvalue().to_pybytes(),
+                                    content_type=payloads.ARROW)
+        self.assertEqual(response.status_code, 200)
+        result = pa.ipc.open_stream(pa.py_buffer(response.data)).read_all()
+        np.testing.assert_allclose(result.column('prediction').to_numpy(), self.expected)
+
+
+class TestStreamingPrediction(APITestCase):
+    """Test the NDJSON streaming endpoint."""
+    
+    def setUp(self):
+        super().setUp()
+        self.stream_chunk_rows = api.STREAM_CHUNK_ROWS
+        api.STREAM_CHUNK_ROWS = 7
+    
+    def tearDown(self):
+        api.STREAM_CHUNK_ROWS = self.stream_chunk_rows
+    
+    def test_stream_matches_batch(self):
+        """Test that streamed predictions match the estimator row for row."""
+        rows = self.X.iloc[:30].values.tolist()
+        lines = [json.dumps(r) if i % 2 else json.dumps({'features': r}) for i, r in enumerate(rows)]
+        body = '\n'.join(lines) + '\n\n'
+        response = self.client.post('/predict/stream', data=body, content_type=payloads.NDJSON)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, payloads.NDJSON)
+        out = [json.loads(line)['prediction'] for line in response.get_data(as_text=True).splitlines()]
+        np.testing.assert_allclose(out, self.sk_model.predict(self.X.iloc[:30]))
+    
+    def test_non_finite_predictions_are_valid_json(self):
+        """Test that NaN/inf predictions are sent as null rather than invalid JSON tokens."""
+        self.assertEqual(api.json_predictions(np.array([1.5, np.nan, np.inf, -np.inf])), [1.5, None, None, None])
+        api.model = LinearPredictor(api.model.coef, float('nan'), api.model.feature_names)
+        api.prediction_cache = None
+        rows = self.X.iloc[:3].values.tolist()
+        
+        def strict(text):
+            return json.loads(text, parse_constant=lambda c: self.fail(f'invalid JSON constant {c}'))
+        
+        response = self.client.post('/predict/stream', data='\n'.join(json.dumps(r) for r in rows),
+                                    content_type=payloads.NDJSON)
+        self.assertEqual([strict(line) for line in response.get_data(as_text=True).splitlines()],
+                         [{'prediction': None}] * 3)
+        response = self.client.post('/predict/batch', json={'features': rows})
+        self.assertEqual(strict(response.get_data(as_text=True))['predictions'], [None] * 3)
+        response = self.client.post('/predict', json={'features': rows[0]})
+        self.assertIsNone(strict(response.get_data(as_text=True))['prediction'])
+    
+    def test_stream_reports_bad_line(self):
+        """Test that a malformed row ends the stream with an error line."""
+        rows = [json.dumps(r) for r in self.X.iloc[:10].values.tolist()]
+        rows[8] = '[1, 2'
+        response = self.client.post('/predict/stream', data='\n'.join(rows), content_type=payloads.NDJSON)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(lines), 8)
+        self.assertIn('line 9', lines[-1]['error'])
+        self.assertEqual(lines[-1]['rows_scored'], 7)
+
+
+class TestHotReload(APITestCase):
+    """Test background model reload and atomic swap."""
+    
+    def setUp(self):
+        super().setUp()
+        self.paths = (api.COMPACT_MODEL_PATH, api.MODEL_PATH)
+        self.reload_dir = tempfile.TemporaryDirectory()
+        api.COMPACT_MODEL_PATH = os.path.join(self.reload_dir.name, 'model.npz')
+        api.MODEL_PATH = os.path.join(self.reload_dir.name, 'model.pkl')
+        save_compact_model(self.sk_model, api.COMPACT_MODEL_PATH)
+        api.load_model()
+        self.watcher = ModelWatcher([api.COMPACT_MODEL_PATH], api.read_model, api._swap_model,
+                                    lambda: api.model, interval=60, expected_features=5)
+    
+    def tearDown(self):
+        api.COMPACT_MODEL_PATH, api.MODEL_PATH = self.paths
+        self.reload_dir.cleanup()
+    
+    def _write_model(self, scale):
+        model = train_model(self.X, self.y)
+        model.coef_ = model.coef_ * scale
+        save_compact_model(model, api.COMPACT_MODEL_PATH)
+        os.utime(api.COMPACT_MODEL_PATH, ns=(0, os.stat(api.COMPACT_MODEL_PATH).st_mtime_ns + 10**9))
+        return model
+    
+    def test_new_artifact_is_swapped_in(self):
+        """Test that a changed artifact is loaded and reported on /health."""
+        old_version = self.client.get('/health').get_json()['model_version']
+        in_flight = api.model
+        new_model = self._write_model(2.0)
+        self.assertTrue(self.watcher.check())
+        health = self.client.get('/health').get_json()
+        self.assertNotEqual(health['model_version'], old_version)
+        row = self.X.iloc[:1]
+        prediction = self.client.post('/predict', json={'features': row.iloc[0].tolist()}).get_json()['prediction']
+        self.assertAlmostEqual(prediction, new_model.predict(row)[0], places=10)
+        # A request that grabbed the old model keeps using it
+        self.assertAlmostEqual(in_flight.predict(row.to_numpy())[0], self.sk_model.predict(row)[0], places=10)
+    
+    def test_invalid_artifact_keeps_current_model(self):
+        """Test that a model failing validation is not swapped in."""
+        current = api.model
+        with open(api.COMPACT_MODEL_PATH, 'wb') as f:
+            f.write(b'not a model')
+        self.assertFalse(self.watcher.check())
+        self.assertIs(api.model, current)
+        self.assertEqual(self.watcher.failures, 1)
+    
+    def test_unchanged_content_is_ignored(self):
+        """Test that touching the artifact without changing it does not reload."""
+        os.utime(api.COMPACT_MODEL_PATH, ns=(0, os.stat(api.COMPACT_MODEL_PATH).st_mtime_ns + 10**9))
+        self.assertFalse(self.watcher.check())
+        self.assertEqual(self.watcher.reloads, 0)
+    
+    def test_changed_feature_summary_is_reloaded(self):
+        """Test that a new feature summary is picked up although the model is unchanged."""
+        summary_path = os.path.join(self.reload_dir.name, 'feature_summary.json')
+        old_path, api.FEATURE_SUMMARY_PATH = api.FEATURE_SUMMARY_PATH, summary_path
+        self.addCleanup(setattr, api, 'FEATURE_SUMMARY_PATH', old_path)
+        watcher = ModelWatcher([api.COMPACT_MODEL_PATH], api.read_model, api._swap_model,
+                               lambda: api.model, interval=60, sidecar_paths=[summary_path])
+        save_summary(FeatureSummary(list(self.X.columns)).update(self.X.to_numpy()), summary_path)
+        self.assertTrue(watcher.check())
+        self.assertEqual(api.reference_summary().n, len(self.X))
+        # Touching the summary without changing it does not reload
+        os.utime(summary_path, ns=(0, os.stat(summary_path).st_mtime_ns + 10**9))
+        self.assertFalse(watcher.check())
+        self.assertEqual(watcher.reloads, 1)
+
+    
+    def test_mapped_artifact_is_preferred_and_reloaded(self):
+        """Test that a .bin artifact is served over the .npz and swapped in on change."""
+        api.ARTIFACT_PATH = os.path.join(self.reload_dir.name, 'model.bin')
+        save_model_artifact(self.sk_model, api.ARTIFACT_PATH)
+        self.watcher.paths.append(api.ARTIFACT_PATH)
+        self.assertTrue(self.watcher.check())
+        old = api.model
+        self.assertEqual(api.model_source(), api.ARTIFACT_PATH)
+        np.testing.assert_array_equal(old.coef, self.sk_model.coef_)
+        
+        model = train_model(self.X, self.y)
+        model.coef_ = model.coef_ * 2
+        save_model_artifact(model, api.ARTIFACT_PATH)
+        os.utime(api.ARTIFACT_PATH, ns=(0, os.stat(api.ARTIFACT_PATH).st_mtime_ns + 10**9))
+        self.assertTrue(self.watcher.check())
+        np.testing.assert_array_equal(api.model.coef, model.coef_)
+        # The replaced file stays mapped for requests still holding the old model
+        np.testing.assert_array_equal(old.coef, self.sk_model.coef_)
+
+
+class TestPredictionCache(APITestCase):
+    """Test the LRU/TTL prediction cache."""
+    
+    def test_repeated_rows_hit_the_cache(self):
+        """Test that identical vectors are served from the cache."""
+        row = self.X.iloc[0].tolist()
+        first = self.client.post('/predict', json={'features': row}).get_json()
+        second = self.client.post('/predict', json={'features': row}).get_json()
+        self.assertEqual(first, second)
+        stats = self.client.get('/stats').get_json()['cache']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+    
+    def test_batch_rows_are_cached_individually(self):
+        """Test that batch rows share entries with single predictions."""
+        rows = self.X.iloc[:4].values.tolist()
+        self.client.post('/predict', json={'features': rows[1]})
+        body = self.client.post('/predict/batch', json={'features': rows}).get_json()
+        np.testing.assert_allclose(body['predictions'], self.sk_model.predict(self.X.iloc[:4]))
+        self.assertEqual(api.prediction_cache.hits, 1)
+        self.assertEqual(api.prediction_cache.misses, 4)
+    
+    def test_lru_eviction_and_ttl(self):
+        """Test that the cache stays bounded and entries expire."""
+        now = [0.0]
+        cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        cache.put_many('v1', [b'a', b'b'], [1.0, 2.0])
+        cache.get_many('v1', [b'a'])
+        cache.put_many('v1', [b'c'], [3.0])
+        self.assertEqual(cache.get_many('v1', [b'a', b'b', b'c']), [1.0, None, 3.0])
+        now[0] = 11.0
+        self.assertEqual(cache.get_many('v1', [b'a']), [None])
+        self.assertEqual((cache.evictions, cache.expirations), (1, 1))
+    
+    def test_model_version_change_clears_cache(self):
+        """Test that a new model version invalidates cached predictions."""
+        cache = PredictionCache()
+        cache.put_many('v1', [b'a'], [1.0])
+        self.assertEqual(cache.get_many('v2', [b'a']), [None])
+        self.assertEqual(cache.invalidations, 1)
+
+
+class TestMetrics(APITestCase):
+    """Test the /metrics endpoint and its instrumentation."""
+    
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, api, 'metrics', api.metrics)
+        api.metrics = ServiceMetrics()
+    
+    def test_histogram_buckets_are_inclusive(self):
+        """Test that values land in the first bucket whose bound is >= value."""
+        histogram = Histogram([1, 10])
+        for value in (0.5, 1, 5, 10, 50):
+            histogram.observe(value)
+        cumulative, total, count = histogram.snapshot()
+        self.assertEqual(cumulative, [2, 4, 5])
+        self.assertEqual((total, count), (66.5, 5))
+    
+    def test_observe_does_not_allocate(self):
+        """Test that recording requests allocates no lasting memory."""
+        metrics = ServiceMetrics()
+        metrics.observe_request('/predict', 200, 0.001)
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(1000):
+            metrics.observe_request('/predict', 200, 0.001)
+            metrics.observe_phases('/predict', 0.0001, 0.0001, 0.0001, 0.0001)
+            metrics.observe_batch_size('/predict', 1)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(after - before, 1024)
+    
+    def test_requests_and_phases_are_counted(self):
+        """Test that successes, errors, phases and batch sizes are exported."""
+        self.client.post('/predict', json={'features': self.X.iloc[0].tolist()})
+        self.client.post('/predict', json={'features': [1, 2]})
+        self.client.post('/predict/batch', json={'features': self.X.iloc[:7].values.tolist()})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn('api_requests_total{endpoint="/predict",status="200"} 1', text)
+        self.assertIn('api_request_errors_total{endpoint="/predict",status="400"} 1', text)
+        self.assertIn('api_requests_total{endpoint="/predict/batch",status="200"} 1', text)
+        for phase in ('parse', 'convert', 'predict', 'serialize'):
+            self.assertIn(f'api_request_phase_seconds_count{{endpoint="/predict",phase="{phase}"}} 1', text)
+        self.assertIn('api_batch_size_rows_bucket{endpoint="/predict/batch",le="5.0"} 0', text)
+        self.assertIn('api_batch_size_rows_bucket{endpoint="/predict/batch",le="10.0"} 1', text)
+    
+    def test_model_load_time_is_recorded(self):
+        """Test that reading a model records its load time."""
+        compact_path, api.COMPACT_MODEL_PATH = api.COMPACT_MODEL_PATH, self.model_path
+        self.addCleanup(setattr, api, 'COMPACT_MODEL_PATH', compact_path)
+        self.assertIsNotNone(api.read_model())
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('api_model_load_seconds_count 1', text)
+        self.assertIn('api_model_last_load_seconds ', text)
+
+
+def call_asgi(method, path, body=b'', headers=None):
+    """Drive the ASGI app for one request; returns (status, headers, body)."""
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    messages = [{'type': 'http.request', 'body': body[:10], 'more_body': True},
+                {'type': 'http.request', 'body': body[10:], 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(asgi.app(scope, receive, send))
+    start, payload = sent
+    return start['status'], dict(start['headers']), payload['body']
+
+
+class TestASGIServing(APITestCase):
+    """Test that the ASGI server keeps the Flask JSON contract."""
+    
+    def test_home_and_health(self):
+        """Test the informational endpoints."""
+        status, _, body = call_asgi('GET', '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), self.client.get('/').get_json())
+        status, _, body = call_asgi('GET', '/health')
+        self.assertTrue(json.loads(body)['model_loaded'])
+    
+    def test_predict_matches_flask(self):
+        """Test that /predict returns the same body as the Flask app."""
+        payload = {'features': self.X.iloc[3].tolist()}
+        status, _, body = call_asgi('POST', '/predict', json.dumps(payload).encode(),
+                                    {'Content-Type': 'application/json'})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), self.client.post('/predict', json=payload).get_json())
+    
+    def test_predict_validation_error(self):
+        """Test that invalid input gets the same 400 error."""
+        status, _, body = call_asgi('POST', '/predict', b'{"features": [1, 2]}')
+        self.assertEqual(status, 400)
+        self.assertEqual(json.loads(body), {'error': 'Expected 5 features'})
+    
+    def test_metrics(self):
+        """Test that ASGI requests are counted and exported."""
+        self.addCleanup(setattr, api, 'metrics', api.metrics)
+        api.metrics = ServiceMetrics()
+        call_asgi('POST', '/predict', json.dumps({'features': self.X.iloc[3].tolist()}).encode())
+        status, headers, body = call_asgi('GET', '/metrics')
+        self.assertEqual(status, 200)
+        self.assertTrue(headers[b'content-type'].startswith(b'text/plain'))
+        self.assertIn(b'api_requests_total{endpoint="/predict",status="200"} 1', body)
+        self.assertIn(b'api_request_phase_seconds_count{endpoint="/predict",phase="predict"} 1', body)
+    
+    def test_predict_batch_offloaded(self):
+        """Test a batch large enough to be scored on the executor."""
+        buffer = io.BytesIO()
+        np.save(buffer, self.X.to_numpy())
+        offload_min_bytes, asgi.OFFLOAD_MIN_BYTES = asgi.OFFLOAD_MIN_BYTES, 0
+        self.addCleanup(setattr, asgi, 'OFFLOAD_MIN_BYTES', offload_min_bytes)
+        status, headers, body = call_asgi('POST', '/predict/batch', buffer.getvalue(),
+                                          {'Content-Type': payloads.NPY})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], payloads.NPY.encode())
+        np.testing.assert_allclose(np.load(io.BytesIO(body)), self.sk_model.predict(self.X))
+    
+    def test_predict_batch_json(self):
+        """Test the JSON batch contract."""
+        payload = {'features': self.X.iloc[:5].values.tolist()}
+        status, _, body = call_asgi('POST', '/predict/batch', json.dumps(payload).encode(),
+                                    {'Content-Type': 'application/json'})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), self.client.post('/predict/batch', json=payload).get_json())
+    
+    def test_unknown_route(self):
+        """Test that unknown paths return 404."""
+        status, _, _ = call_asgi('GET', '/nope')
+        self.assertEqual(status, 404)
+    
+    def test_coalesced_cache_hits_reach_drift(self):
+        """Test that cached answers on the micro-batched path are still observed by drift monitoring."""
+        self.addCleanup(setattr, api, 'batcher', api.batcher)
+        self.addCleanup(setattr, api, 'drift', api.drift)
+        api.batcher = MicroBatcher(api._predict_rows, max_batch_size=4, max_wait_ms=1)
+        api.drift = DriftMonitor()
+        body = json.dumps({'features': self.X.iloc[3].tolist()}).encode()
+        first = call_asgi('POST', '/predict', body)
+        second = call_asgi('POST', '/predict', body)
+        self.assertEqual(json.loads(first[2]), json.loads(second[2]))
+        self.assertEqual(api.prediction_cache.stats()['hits'], 1)
+        self.assertEqual(api.drift.observed_rows, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
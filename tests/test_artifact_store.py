@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed artifact store.
+"""
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from artifact_store import ArtifactStore
+from train import load_data, prepare_data, train_model
+
+
+class TestArtifactStore(unittest.TestCase):
+    """Test storing and retrieving pipeline artifacts."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(self.tmpdir.name)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_array_round_trip_is_memory_mapped(self):
+        """Test that stored arrays come back memory-mapped and equal."""
+        array = np.arange(12, dtype=np.float64).reshape(4, 3)
+        ref = self.store.put_array(array, meta={'columns': ['a', 'b', 'c']})
+        loaded = self.store.get_array(ref)
+        self.assertIsInstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, array)
+        self.assertEqual(ref['meta']['columns'], ['a', 'b', 'c'])
+    
+    def test_identical_content_is_stored_once(self):
+        """Test that the same content maps to one object."""
+        first = self.store.put_array(np.ones(5))
+        second = self.store.put_array(np.ones(5))
+        self.assertEqual(first['sha256'], second['sha256'])
+        stored = [n for _, _, names in os.walk(self.tmpdir.name) for n in names]
+        self.assertEqual(len(stored), 1)
+    
+    def test_put_file_links_existing_file(self):
+        """Test adding an existing .npy file, e.g. the dataset cache."""
+        src = os.path.join(self.tmpdir.name, 'cache.npy')
+        np.save(src, np.eye(3))
+        ref = self.store.put_file(src)
+        self.assertEqual(ref['suffix'], '.npy')
+        np.testing.assert_array_equal(self.store.get_array(ref), np.eye(3))
+    
+    def test_concurrent_puts_from_threads(self):
+        """Test that threads sharing a store do not overwrite each other's temp files."""
+        arrays = [np.full(50_000, i, dtype=np.float64) for i in range(8)]
+        refs = [None] * len(arrays)
+        barrier = threading.Barrier(len(arrays))
+        
+        def put(i):
+            barrier.wait()
+            refs[i] = self.store.put_array(arrays[i])
+        
+        threads = [threading.Thread(target=put, args=(i,)) for i in range(len(arrays))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for ref, array in zip(refs, arrays):
+            np.testing.assert_array_equal(self.store.get_array(ref), array)
+        leftovers = [n for _, _, names in os.walk(self.tmpdir.name) for n in names if n.startswith('.incoming')]
+        self.assertEqual(leftovers, [])
+    
+    def test_model_round_trip(self):
+        """Test that a fitted model survives the store."""
+        X, y = prepare_data(load_data('data/dataset.csv'))
+        model = train_model(X, y)
+        ref = self.store.put_object(model)
+        loaded = self.store.get_object(ref)
+        np.testing.assert_array_equal(loaded.coef_, model.coef_)
+        self.assertLess(len(repr(ref)), 512, "References must stay small enough for XCom")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the benchmark suite's regression gate.
+"""
+import unittest
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add benchmarks directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+import bench  # noqa: E402
+
+
+class TestCompare(unittest.TestCase):
+    """Test regression detection against a baseline."""
+    
+    def setUp(self):
+        self.baseline = {'cases': {
+            'train_model[rows=1000,features=5]': {'seconds': 0.1, 'rows_per_second': 10_000.0, 'peak_memory_bytes': 1000},
+            'api./predict': {'p50_ms': 10.0, 'p99_ms': 20.0, 'requests_per_second': 100.0},
+        }}
+    
+    def test_within_tolerance_passes(self):
+        """Test that small slowdowns are not reported."""
+        current = {'cases': {
+            'train_model[rows=1000,features=5]': {'seconds': 0.11, 'rows_per_second': 9_100.0, 'peak_memory_bytes': 1100},
+            'api./predict': {'p50_ms': 11.0, 'p99_ms': 22.0, 'requests_per_second': 91.0},
+        }}
+        self.assertEqual(bench.compare(current, self.baseline, tolerance=0.25), [])
+    
+    def test_slowdown_is_reported(self):
+        """Test that timing, throughput and memory regressions are all reported."""
+        current = {'cases': {
+            'train_model[rows=1000,features=5]': {'seconds': 0.2, 'rows_per_second': 5_000.0, 'peak_memory_bytes': 3000},
+            'api./predict': {'p50_ms': 10.0, 'p99_ms': 40.0, 'requests_per_second': 100.0},
+        }}
+        regressed = {(case, metric) for case, metric, *_ in bench.compare(current, self.baseline, tolerance=0.25)}
+        self.assertEqual(regressed, {
+            ('train_model[rows=1000,features=5]', 'seconds'),
+            ('train_model[rows=1000,features=5]', 'rows_per_second'),
+            ('train_model[rows=1000,features=5]', 'peak_memory_bytes'),
+            ('api./predict', 'p99_ms'),
+        })
+    
+    def test_sub_millisecond_jitter_is_ignored(self):
+        """Test that timing changes below the noise floor never fail the check."""
+        baseline = {'cases': {'save_model': {'seconds': 0.0002, 'rows_per_second': 5e6}}}
+        current = {'cases': {'save_model': {'seconds': 0.0006, 'rows_per_second': 1.7e6}}}
+        self.assertEqual(bench.compare(current, baseline, tolerance=0.25), [])
+    
+    def test_missing_cases_are_ignored(self):
+        """Test that cases absent from the current run are skipped."""
+        self.assertEqual(bench.compare({'cases': {}}, self.baseline), [])
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Run the benchmarks on tiny inputs."""
+    
+    def test_training_and_api_cases(self):
+        """Test that a small run records every step and endpoint."""
+        with tempfile.TemporaryDirectory() as workdir:
+            results = bench.bench_training(workdir, 200, 3, repeat=1)
+            results.update(bench.bench_api(workdir, [1, 10], requests_per_case=5))
+        for step in ('load_data.csv', 'load_data.cached', 'prepare_data', 'train_model',
+                     'evaluate_model', 'save_model', 'save_compact_model'):
+            metrics = results[f'{step}[rows=200,features=3]']
+            self.assertGreater(metrics['rows_per_second'], 0)
+            self.assertIn('peak_memory_bytes', metrics)
+        self.assertIn('p99_ms', results['api./predict'])
+        self.assertIn('requests_per_second', results['api./predict/batch[batch=10]'])
+    
+    def test_model_format_cases(self):
+        """Test that every artifact format is saved and loaded at each size."""
+        with tempfile.TemporaryDirectory() as workdir:
+            results = bench.bench_model_formats(workdir, [10, 1000], repeat=1)
+        for fmt in ('pickle', 'npz', 'mmap'):
+            save = results[f'model.save[format={fmt},features=1000]']
+            self.assertGreater(save['file_bytes'], 8000)
+        for fmt in ('pickle', 'npz', 'mmap', 'mmap.noverify'):
+            load = results[f'model.load[format={fmt},features=10]']
+            self.assertGreater(load['seconds'], 0)
+            self.assertIn('rss_delta_bytes', load)
+    
+    def test_check_fails_on_regression(self):
+        """Test that --check exits non-zero against a much faster baseline."""
+        with tempfile.TemporaryDirectory() as workdir:
+            baseline_path = os.path.join(workdir, 'baseline.json')
+            args = ['--rows', '200', '--features', '3', '--batch-sizes', '', '--model-sizes', '', '--repeat', '1', '--baseline', baseline_path]
+            self.assertEqual(bench.main(args + ['--save-baseline']), 0)
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            for metrics in baseline['cases'].values():
+                metrics['peak_memory_bytes'] = 1
+            with open(baseline_path, 'w') as f:
+                json.dump(baseline, f)
+            self.assertEqual(bench.main(args + ['--check']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the synthetic dataset generator.
+"""
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from datagen import generate_dataset, make_coefficients, write_partitions
+
+
+class TestDatasetGenerator(unittest.TestCase):
+    """Test determinism and output layouts of the generator."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+    
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+    
+    def test_output_independent_of_worker_count(self):
+        """Test that 1 and 3 workers produce byte-identical files."""
+        generate_dataset(self.path('serial.csv'), rows=1050, chunk_rows=100, workers=1)
+        generate_dataset(self.path('parallel.csv'), rows=1050, chunk_rows=100, workers=3)
+        with open(self.path('serial.csv'), 'rb') as a, open(self.path('parallel.csv'), 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+    
+    def test_partitions_match_single_file(self):
+        """Test that partitions concatenate to the single-file output."""
+        generate_dataset(self.path('all.csv'), rows=250, n_features=3, chunk_rows=100, workers=1)
+        paths = write_partitions(self.path('parts'), rows=250, n_features=3, chunk_rows=100, workers=2)
+        self.assertEqual([os.path.basename(p) for p in paths], ['part-00000.csv', 'part-00001.csv', 'part-00002.csv'])
+        combined = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        pd.testing.assert_frame_equal(combined, pd.read_csv(self.path('all.csv')))
+    
+    def test_shape_and_coefficients(self):
+        """Test the requested shape and that the target follows the coefficients."""
+        generate_dataset(self.path('data.csv'), rows=5000, n_features=4, noise=0.01,
+                         coefficients=[1.0, -2.0], intercept=3.0, workers=1)
+        df = pd.read_csv(self.path('data.csv'))
+        self.assertEqual(list(df.columns), ['feature_1', 'feature_2', 'feature_3', 'feature_4', 'target'])
+        self.assertEqual(len(df), 5000)
+        X = np.column_stack([df.iloc[:, :4].to_numpy(), np.ones(len(df))])
+        solution = np.linalg.lstsq(X, df['target'].to_numpy(), rcond=None)[0]
+        np.testing.assert_allclose(solution, [1.0, -2.0, 0.0, 0.0, 3.0], atol=0.01)
+    
+    def test_seed_changes_data(self):
+        """Test that different seeds give different data."""
+        generate_dataset(self.path('a.csv'), rows=10, seed=1, workers=1)
+        generate_dataset(self.path('b.csv'), rows=10, seed=2, workers=1)
+        self.assertFalse(pd.read_csv(self.path('a.csv')).equals(pd.read_csv(self.path('b.csv'))))
+    
+    def test_default_coefficients(self):
+        """Test the default weights of the original sample dataset."""
+        np.testing.assert_array_equal(make_coefficients(5), [2.0, 1.5, -0.5, 0.0, 0.0])
+    
+    def test_parquet(self):
+        """Test Parquet output, single file and partitioned."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        generate_dataset(self.path('data.parquet'), rows=300, chunk_rows=100, workers=2)
+        paths = write_partitions(self.path('parts'), rows=300, chunk_rows=100, workers=1, fmt='parquet')
+        combined = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+        pd.testing.assert_frame_equal(combined, pd.read_parquet(self.path('data.parquet')))
+        self.assertEqual(os.listdir(self.tmpdir).count('data.parquet'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
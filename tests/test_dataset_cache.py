@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the binary dataset cache.
+"""
+import unittest
+import json
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from dataset_cache import load_array, load_frame, dataset_hash, file_md5
+
+
+class TestDatasetCache(unittest.TestCase):
+    """Test building and reusing the memory-mapped cache."""
+    
+    def setUp(self):
+        """Copy a small CSV into a scratch directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.tmpdir, 'dataset.csv')
+        self.cache_dir = os.path.join(self.tmpdir, '.cache')
+        pd.read_csv('data/dataset.csv').iloc[:50].to_csv(self.data_path, index=False)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+    
+    def test_cache_matches_csv(self):
+        """Test that cached values equal a direct CSV parse."""
+        df = load_frame(self.data_path, self.cache_dir)
+        expected = pd.read_csv(self.data_path)
+        self.assertEqual(list(df.columns), list(expected.columns))
+        np.testing.assert_array_equal(df.to_numpy(), expected.to_numpy())
+    
+    def test_second_load_is_memory_mapped(self):
+        """Test that later loads memory-map the cache instead of parsing."""
+        load_array(self.data_path, self.cache_dir)
+        values, _ = load_array(self.data_path, self.cache_dir)
+        self.assertIsInstance(values, np.memmap)
+        self.assertTrue(values.flags.f_contiguous, "Cache should be column-major")
+    
+    def test_dvc_hash_is_used_when_size_matches(self):
+        """Test that the md5 recorded in the .dvc file is the cache key."""
+        size = os.path.getsize(self.data_path)
+        with open(self.data_path + '.dvc', 'w') as f:
+            f.write(f"outs:\n- md5: feedbeef\n  size: {size}\n  hash: md5\n  path: dataset.csv\n")
+        self.assertEqual(dataset_hash(self.data_path), 'feedbeef')
+    
+    def test_same_size_edit_after_dvc_add_is_detected(self):
+        """Test that data edited after its .dvc pointer is hashed, even at the same size."""
+        load_array(self.data_path, self.cache_dir)
+        size = os.path.getsize(self.data_path)
+        with open(self.data_path + '.dvc', 'w') as f:
+            f.write(f"outs:\n- md5: {file_md5(self.data_path)}\n  size: {size}\n  hash: md5\n  path: dataset.csv\n")
+        pointer_mtime = os.path.getmtime(self.data_path + '.dvc')
+        with open(self.data_path, 'rb') as f:
+            raw = f.read()
+        edited = raw.replace(b'1', b'2', 1)
+        with open(self.data_path, 'wb') as f:
+            f.write(edited)
+        os.utime(self.data_path, (pointer_mtime + 10, pointer_mtime + 10))
+        self.assertEqual(os.path.getsize(self.data_path), size)
+        self.assertEqual(dataset_hash(self.data_path), file_md5(self.data_path))
+        values, columns = load_array(self.data_path, self.cache_dir)
+        np.testing.assert_array_equal(values, pd.read_csv(self.data_path).to_numpy())
+    
+    def test_hash_of_pulled_data_is_remembered(self):
+        """Test that data newer than its pointer (as after dvc pull) is hashed once, not on every load."""
+        size = os.path.getsize(self.data_path)
+        with open(self.data_path + '.dvc', 'w') as f:
+            f.write(f"outs:\n- md5: {file_md5(self.data_path)}\n  size: {size}\n  hash: md5\n  path: dataset.csv\n")
+        pointer_mtime = os.path.getmtime(self.data_path + '.dvc')
+        os.utime(self.data_path, (pointer_mtime + 10, pointer_mtime + 10))
+        self.assertEqual(dataset_hash(self.data_path, self.cache_dir), file_md5(self.data_path))
+        # The remembered md5 answers while the file is unchanged...
+        memo_path = os.path.join(self.cache_dir, 'dataset.csv.md5.json')
+        with open(memo_path) as f:
+            memo = json.load(f)
+        with open(memo_path, 'w') as f:
+            json.dump(dict(memo, md5='remembered'), f)
+        self.assertEqual(dataset_hash(self.data_path, self.cache_dir), 'remembered')
+        # ...and is dropped once it changes
+        os.utime(self.data_path, (pointer_mtime + 20, pointer_mtime + 20))
+        self.assertEqual(dataset_hash(self.data_path, self.cache_dir), file_md5(self.data_path))
+    
+    def test_changed_data_invalidates_cache(self):
+        """Test that new content gets a new cache entry and the old one is pruned."""
+        load_array(self.data_path, self.cache_dir)
+        pd.read_csv('data/dataset.csv').iloc[:60].to_csv(self.data_path, index=False)
+        values, _ = load_array(self.data_path, self.cache_dir)
+        self.assertEqual(values.shape[0], 60)
+        entries = [n for n in os.listdir(self.cache_dir) if n.endswith('.npy')]
+        self.assertEqual(entries, [f'dataset-{file_md5(self.data_path)}.npy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the load generator.
+"""
+import unittest
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add src, api and benchmarks directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'api'))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as api  # noqa: E402
+import loadgen  # noqa: E402
+from predictor import LinearPredictor  # noqa: E402
+from model_format import save_compact_model  # noqa: E402
+from train import load_data, prepare_data, train_model  # noqa: E402
+
+
+class TestLoadAgainstLocalServer(unittest.TestCase):
+    """Drive the Flask app served on localhost."""
+    
+    @classmethod
+    def setUpClass(cls):
+        X, y = prepare_data(load_data('data/dataset.csv'))
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        model_path = os.path.join(cls.tmpdir.name, 'model.npz')
+        save_compact_model(train_model(X, y), model_path)
+        cls.saved_model = api.model
+        api.model = LinearPredictor.from_file(model_path)
+        cls.server = make_server('127.0.0.1', 0, api.app, threaded=True)
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.payloads = loadgen.build_payloads(batch_size=20, variants=4)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        api.model = cls.saved_model
+        cls.tmpdir.cleanup()
+    
+    def test_open_loop(self):
+        """Test that an open-loop run sends the scheduled mix without errors."""
+        report = loadgen.run_open_loop(self.url, rate=40, duration=0.5, payloads=self.payloads,
+                                       batch_fraction=0.5, max_in_flight=4)
+        self.assertEqual(report['requests'], 20)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(set(report['by_kind']), {'single', 'batch'})
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+        self.assertLessEqual(report['p99_ms'], report['max_ms'])
+    
+    def test_closed_loop(self):
+        """Test that a closed-loop run keeps its clients busy."""
+        report = loadgen.run_closed_loop(self.url, concurrency=2, duration=0.3, payloads=self.payloads)
+        self.assertGreater(report['requests'], 2)
+        self.assertEqual(report['error_rate'], 0.0)
+        self.assertGreater(report['throughput_rps'], 0)
+    
+    def test_errors_are_counted(self):
+        """Test that non-200 responses count as errors."""
+        payloads = {'single': [b'{"features": [1, 2]}'], 'batch': []}
+        report = loadgen.run_closed_loop(self.url, concurrency=1, duration=0.1, payloads=payloads)
+        self.assertEqual(report['error_rate'], 1.0)
+
+
+class TestSaturationSearch(unittest.TestCase):
+    """Test the saturation search against a simulated server."""
+    
+    def test_open_loop_stops_when_goodput_drops(self):
+        """Test that capacity is the last rate the server kept up with."""
+        def run_step(rate):
+            served = min(rate, 300.0)
+            return {'mode': 'open', 'target': rate, 'requests': 100, 'error_rate': 0.0,
+                    'p99_ms': 5.0, 'throughput_rps': served}
+        capacity, steps = loadgen.find_saturation(run_step, 100, 2, 10, p99_slo_ms=50, max_error_rate=0.01)
+        self.assertEqual([s['target'] for s in steps], [100, 200, 400])
+        self.assertEqual(capacity['target'], 200)
+    
+    def test_closed_loop_stops_when_throughput_plateaus(self):
+        """Test that adding clients without added throughput ends the search."""
+        def run_step(concurrency):
+            return {'mode': 'closed', 'target': concurrency, 'requests': 100, 'error_rate': 0.0,
+                    'p99_ms': 1.0 * concurrency, 'throughput_rps': 100.0 * min(concurrency, 4)}
+        capacity, steps = loadgen.find_saturation(run_step, 1, 2, 10, p99_slo_ms=50, max_error_rate=0.01)
+        self.assertEqual([s['target'] for s in steps], [1, 2, 4, 8])
+        self.assertEqual(capacity['target'], 4)
+    
+    def test_slo_violation_is_saturation(self):
+        """Test that a p99 over the SLO fails the step."""
+        report = {'mode': 'closed', 'target': 1, 'requests': 10, 'error_rate': 0.0,
+                  'p99_ms': 80.0, 'throughput_rps': 50.0}
+        self.assertFalse(loadgen.meets_targets(report, p99_slo_ms=50, max_error_rate=0.01))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the memory-mappable model artifact and the format registry.
+"""
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from model_artifact import (ALIGNMENT, ARTIFACT_VERSION, FORMATS, ArtifactError, detect_format,  # noqa: E402
+                            load_linear_model, load_model_artifact, load_pickle, main, read_artifact,
+                            save_model_artifact, save_pickle, write_artifact)
+from train import load_data, prepare_data, train_model  # noqa: E402
+
+
+class TestModelArtifact(unittest.TestCase):
+    """Test writing, mapping and verifying .bin artifacts."""
+    
+    @classmethod
+    def setUpClass(cls):
+        X, y = prepare_data(load_data('data/dataset.csv'))
+        cls.model = train_model(X, y)
+        cls.X = X
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'model.bin')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_round_trip_matches_estimator(self):
+        """Test that a mapped artifact predicts exactly like the estimator."""
+        save_model_artifact(self.model, self.path)
+        artifact = load_model_artifact(self.path)
+        self.assertEqual(artifact['feature_names'], list(self.model.feature_names_in_))
+        self.assertEqual(artifact['format_version'], ARTIFACT_VERSION)
+        np.testing.assert_array_equal(self.X.to_numpy() @ artifact['coef'] + artifact['intercept'],
+                                      self.model.predict(self.X))
+    
+    def test_arrays_are_aligned_read_only_views_of_the_file(self):
+        """Test that loading maps the file instead of copying it."""
+        save_model_artifact(self.model, self.path)
+        coef = load_model_artifact(self.path)['coef']
+        self.assertFalse(coef.flags.writeable)
+        self.assertEqual(coef.ctypes.data % ALIGNMENT, 0)
+        base = coef
+        while not isinstance(base, np.memmap) and base is not None:
+            base = base.base
+        self.assertIsInstance(base, np.memmap)
+    
+    def test_in_memory_read_matches_mapped_read(self):
+        """Test that mmap=False returns the same arrays and version."""
+        write_artifact(self.path, {'a': np.arange(7, dtype=np.int32), 'b': np.eye(3)}, {'note': 'x'}, kind='test')
+        mapped, loaded = read_artifact(self.path), read_artifact(self.path, mmap=False)
+        self.assertEqual(mapped['version'], loaded['version'])
+        self.assertEqual(loaded['metadata'], {'note': 'x'})
+        for name in ('a', 'b'):
+            np.testing.assert_array_equal(mapped['arrays'][name], loaded['arrays'][name])
+        self.assertEqual(loaded['arrays']['b'].shape, (3, 3))
+    
+    def test_corruption_is_detected(self):
+        """Test that flipped bytes, truncation and unknown files are rejected."""
+        save_model_artifact(self.model, self.path)
+        with open(self.path, 'r+b') as f:
+            f.seek(-3, os.SEEK_END)
+            byte = f.read(1)
+            f.seek(-3, os.SEEK_END)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with self.assertRaises(ArtifactError):
+            load_model_artifact(self.path)
+        read_artifact(self.path, verify=False)
+    
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ArtifactError):
+            load_model_artifact(self.path, verify=False)
+    
+        with open(self.path, 'wb') as f:
+            f.write(b'not a model')
+        with self.assertRaises(ArtifactError):
+            read_artifact(self.path)
+    
+    def test_newer_version_is_rejected(self):
+        """Test that a reader refuses artifacts from a newer format version."""
+        save_model_artifact(self.model, self.path)
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        old = b'"format_version": %d' % ARTIFACT_VERSION
+        with open(self.path, 'wb') as f:
+            f.write(raw.replace(old, b'"format_version": %d' % (ARTIFACT_VERSION + 1), 1))
+        with self.assertRaises(ArtifactError):
+            read_artifact(self.path)
+
+
+class TestFormatRegistry(unittest.TestCase):
+    """Test that every registered format loads the same linear model."""
+    
+    @classmethod
+    def setUpClass(cls):
+        X, y = prepare_data(load_data('data/dataset.csv'))
+        cls.model = train_model(X, y)
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_formats_agree(self):
+        """Test that all formats round-trip the same coefficients and are detected."""
+        for fmt, (save, load) in FORMATS.items():
+            path = os.path.join(self.tmpdir.name, f'model.{fmt}')
+            save(self.model, path)
+            self.assertEqual(detect_format(path), fmt)
+            artifact = load(path)
+            np.testing.assert_allclose(artifact['coef'], self.model.coef_, rtol=1e-12)
+            self.assertAlmostEqual(float(artifact['intercept']), self.model.intercept_, places=12)
+            self.assertEqual(artifact['feature_names'], list(self.model.feature_names_in_))
+    
+    def test_pickles_need_opt_in(self):
+        """Test that legacy pickles are only unpickled when allowed."""
+        path = save_pickle(self.model, os.path.join(self.tmpdir.name, 'model.pkl'))
+        with self.assertRaises(ArtifactError):
+            load_linear_model(path)
+        with self.assertRaises(ArtifactError):
+            load_pickle(path)
+        np.testing.assert_allclose(load_linear_model(path, allow_pickle=True)['coef'], self.model.coef_)
+    
+    def test_convert_legacy_pickle(self):
+        """Test that the converter turns a pickle into an equivalent .bin artifact."""
+        source = save_pickle(self.model, os.path.join(self.tmpdir.name, 'model.pkl'))
+        destination = os.path.join(self.tmpdir.name, 'model.bin')
+        main([source, destination, '--allow-pickle'])
+        artifact = load_model_artifact(destination)
+        np.testing.assert_allclose(artifact['coef'], self.model.coef_, rtol=1e-12)
+        self.assertEqual(artifact['feature_names'], list(self.model.feature_names_in_))
+
+
+if __name__ == '__main__':
+    unittest.main()
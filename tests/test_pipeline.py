@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the staged DVC pipeline.
+"""
+import unittest
+import json
+import os
+import re
+import sys
+import tempfile
+import numpy as np
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from pipeline import main as pipeline_main  # noqa: E402
+from train import run_in_memory  # noqa: E402
+from feature_schema import load_schema  # noqa: E402
+from feature_stats import load_summary  # noqa: E402
+from model_format import load_compact_model  # noqa: E402
+from model_artifact import load_model_artifact  # noqa: E402
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestPipelineStages(unittest.TestCase):
+    """Run every stage into a scratch directory and compare with src/train.py."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.prepared = os.path.join(cls.tmpdir.name, 'prepared')
+        cls.features = os.path.join(cls.tmpdir.name, 'features')
+        cls.schema_path = os.path.join(cls.tmpdir.name, 'feature_schema.json')
+        cls.summary_path = os.path.join(cls.tmpdir.name, 'feature_summary.json')
+        pipeline_main(['prepare', '--prepared-dir', cls.prepared, '--chunksize', '100'])
+        pipeline_main(['split', '--prepared-dir', cls.prepared])
+        pipeline_main(['featurize', '--prepared-dir', cls.prepared, '--features-dir', cls.features,
+                       '--schema-path', cls.schema_path, '--summary-path', cls.summary_path, '--chunksize', '64'])
+        cls.reference = run_in_memory('data/dataset.csv')
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+    
+    def train_and_evaluate(self, name, *options):
+        paths = {key: os.path.join(self.tmpdir.name, f'{name}.{ext}')
+                 for key, ext in (('pkl', 'pkl'), ('npz', 'npz'), ('bin', 'bin'), ('metrics', 'json'))}
+        pipeline_main(['train', '--features-dir', self.features, '--model-path', paths['pkl'],
+                       '--compact-model-path', paths['npz'], '--artifact-path', paths['bin'], *options])
+        pipeline_main(['evaluate', '--features-dir', self.features, '--prepared-dir', self.prepared,
+                       '--compact-model-path', paths['npz'], '--metrics-path', paths['metrics'],
+                       '--chunksize', '50'])
+        with open(paths['metrics']) as f:
+            return paths, json.load(f)
+    
+    def test_stages_reproduce_one_shot_training(self):
+        """Test that the staged pipeline trains and scores like train.py in memory mode."""
+        model, mse, r2, schema, summary = self.reference
+        paths, metrics = self.train_and_evaluate('memory')
+        artifact = load_compact_model(paths['npz'])
+        np.testing.assert_allclose(artifact['coef'], model.coef_, rtol=1e-12)
+        self.assertAlmostEqual(float(artifact['intercept']), model.intercept_, places=12)
+        np.testing.assert_array_equal(load_model_artifact(paths['bin'])['coef'], artifact['coef'])
+        self.assertAlmostEqual(metrics['mse'], mse, places=10)
+        self.assertAlmostEqual(metrics['r2'], r2, places=10)
+        self.assertNotIn('cv', metrics)
+    
+        self.assertEqual(load_schema(self.schema_path)['features'], schema['features'])
+        staged = load_summary(self.summary_path)
+        self.assertEqual(staged.feature_names, summary.feature_names)
+        self.assertEqual(staged.n, summary.n)
+        np.testing.assert_allclose(staged.mean, summary.mean, rtol=1e-10)
+    
+    def test_streaming_training_matches_memory(self):
+        """Test that chunked training on the featurized arrays gives the same model."""
+        memory_paths, _ = self.train_and_evaluate('memory')
+        streaming_paths, _ = self.train_and_evaluate('streaming', '--mode', 'streaming', '--chunksize', '37')
+        np.testing.assert_allclose(load_compact_model(streaming_paths['npz'])['coef'],
+                                   load_compact_model(memory_paths['npz'])['coef'], rtol=1e-9)
+    
+    def test_evaluate_adds_cross_validation(self):
+        """Test that cv_folds adds aggregate k-fold metrics to the hold-out score."""
+        paths, _ = self.train_and_evaluate('memory')
+        metrics_path = os.path.join(self.tmpdir.name, 'cv.json')
+        pipeline_main(['evaluate', '--features-dir', self.features, '--prepared-dir', self.prepared,
+                       '--compact-model-path', paths['npz'], '--metrics-path', metrics_path,
+                       '--cv-folds', '3', '--n-jobs', '1'])
+        with open(metrics_path) as f:
+            cv = json.load(f)['cv']
+        self.assertEqual((cv['folds'], cv['repeats']), (3, 1))
+        self.assertGreater(cv['r2']['mean'], 0.9)
+    
+    def test_split_is_disjoint_and_complete(self):
+        """Test that the saved split covers every prepared row exactly once."""
+        with np.load(os.path.join(self.prepared, 'split.npz')) as split:
+            rows = np.concatenate([split['train'], split['test']])
+        n_rows = np.load(os.path.join(self.prepared, 'dataset.npy'), mmap_mode='r').shape[0]
+        np.testing.assert_array_equal(np.sort(rows), np.arange(n_rows))
+
+
+class TestPipelineDefinition(unittest.TestCase):
+    """Check that dvc.yaml and params.yaml agree."""
+    
+    def setUp(self):
+        try:
+            import yaml
+        except ImportError:
+            self.skipTest('PyYAML not installed')
+        with open(ROOT / 'dvc.yaml') as f:
+            self.stages = yaml.safe_load(f)['stages']
+        with open(ROOT / 'params.yaml') as f:
+            self.params = yaml.safe_load(f)
+    
+    def test_interpolated_params_are_declared(self):
+        """Test that every ${param} in a command exists and invalidates its stage."""
+        for name, stage in self.stages.items():
+            used = set(re.findall(r'\$\{([^}]+)\}', stage['cmd']))
+            self.assertEqual(used, set(stage.get('params', [])), name)
+            for param in used:
+                section, key = param.split('.')
+                self.assertIn(key, self.params[section], param)
+    
+    def test_stages_consume_upstream_outputs(self):
+        """Test that every data dependency is the source dataset or another stage's output."""
+        outputs = {}
+        for name, stage in self.stages.items():
+            for out in stage.get('outs', []):
+                outputs[out] = name
+        for name, stage in self.stages.items():
+            for dep in stage['deps']:
+                if not dep.startswith('src/'):
+                    self.assertTrue(dep == 'data/dataset.csv' or dep in outputs, f'{name}: {dep}')
+                    if dep in outputs:
+                        self.assertNotEqual(outputs[dep], name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the S3 download path, against moto's in-process S3.
+"""
+import unittest
+import hashlib
+import io
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+# Let moto accept small multipart uploads
+os.environ.setdefault('S3_UPLOAD_PART_MIN_SIZE', '256')
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    boto3 = None
+
+from s3_download import ChecksumMismatch, fetch, manifest_path  # noqa: E402
+
+BUCKET = 'test-bucket'
+
+
+class CountingClient:
+    """Wrap an S3 client, counting GETs and optionally failing or corrupting one range."""
+    
+    def __init__(self, client, fail_on_call=None, corrupt=False):
+        self.client = client
+        self.gets = 0
+        self.fail_on_call = fail_on_call
+        self.corrupt = corrupt
+    
+    def head_object(self, **kwargs):
+        return self.client.head_object(**kwargs)
+    
+    def get_object(self, **kwargs):
+        self.gets += 1
+        if self.gets == self.fail_on_call:
+            raise ConnectionError('simulated interruption')
+        response = self.client.get_object(**kwargs)
+        if self.corrupt:
+            body = bytearray(response['Body'].read())
+            body[0] ^= 0xFF
+            response['Body'] = FakeBody(bytes(body))
+        return response
+
+
+class FakeBody:
+    def __init__(self, data):
+        self.data = data
+    
+    def iter_chunks(self, chunk_size):
+        stream = io.BytesIO(self.data)
+        return iter(lambda: stream.read(chunk_size), b'')
+
+
+@unittest.skipIf(boto3 is None, 'boto3 and moto not installed')
+class TestS3Fetch(unittest.TestCase):
+    """Test skip, ranged download, resume and verification."""
+    
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.tmpdir = tempfile.mkdtemp()
+        self.local_path = os.path.join(self.tmpdir, 'data', 'dataset.csv')
+        self.data = os.urandom(10_000)
+    
+    def tearDown(self):
+        self.mock.stop()
+        shutil.rmtree(self.tmpdir)
+    
+    def put(self, data):
+        self.s3.put_object(Bucket=BUCKET, Key='dataset.csv', Body=data)
+    
+    def read_local(self):
+        with open(self.local_path, 'rb') as f:
+            return f.read()
+    
+    def test_download_then_skip_unchanged(self):
+        """Test that a second fetch of an unchanged object makes no GET."""
+        self.put(self.data)
+        result = fetch(self.s3, BUCKET, 'dataset.csv', self.local_path)
+        self.assertEqual((result['status'], result['verified']), ('downloaded', True))
+        self.assertEqual(self.read_local(), self.data)
+        self.assertTrue(os.path.exists(manifest_path(self.local_path)))
+        
+        client = CountingClient(self.s3)
+        result = fetch(client, BUCKET, 'dataset.csv', self.local_path)
+        self.assertEqual(result['status'], 'unchanged')
+        self.assertEqual(client.gets, 0)
+    
+    def test_changed_object_is_downloaded(self):
+        """Test that a new ETag triggers a fresh download."""
+        self.put(self.data)
+        fetch(self.s3, BUCKET, 'dataset.csv', self.local_path)
+        self.put(self.data[::-1])
+        result = fetch(self.s3, BUCKET, 'dataset.csv', self.local_path)
+        self.assertEqual(result['status'], 'downloaded')
+        self.assertEqual(self.read_local(), self.data[::-1])
+    
+    def test_parallel_ranges(self):
+        """Test a single-part object fetched in many concurrent ranges."""
+        self.put(self.data)
+        client = CountingClient(self.s3)
+        result = fetch(client, BUCKET, 'dataset.csv', self.local_path, part_size=1024, workers=4)
+        self.assertEqual(result['parts'], 10)
+        self.assertEqual(client.gets, 10)
+        self.assertTrue(result['verified'])
+        self.assertEqual(self.read_local(), self.data)
+    
+    def test_multipart_etag_verified_from_part_digests(self):
+        """Test that ranges align with upload parts and the ETag is recomputed."""
+        upload = self.s3.create_multipart_upload(Bucket=BUCKET, Key='dataset.csv')
+        chunks = [self.data[:4000], self.data[4000:8000], self.data[8000:]]
+        etags = []
+        for number, chunk in enumerate(chunks, start=1):
+            part = self.s3.upload_part(Bucket=BUCKET, Key='dataset.csv', UploadId=upload['UploadId'],
+                                       PartNumber=number, Body=chunk)
+            etags.append({'ETag': part['ETag'], 'PartNumber': number})
+        self.s3.complete_multipart_upload(Bucket=BUCKET, Key='dataset.csv', UploadId=upload['UploadId'],
+                                          MultipartUpload={'Parts': etags})
+        result = fetch(self.s3, BUCKET, 'dataset.csv', self.local_path, part_size=1024)
+        self.assertTrue(result['etag'].endswith('-3'))
+        self.assertEqual(result['parts'], 3)
+        self.assertTrue(result['verified'])
+        self.assertEqual(self.read_local(), self.data)
+    
+    def test_resume_after_interruption(self):
+        """Test that completed ranges are not fetched again after a failure."""
+        self.put(self.data)
+        client = CountingClient(self.s3, fail_on_call=4)
+        with self.assertRaises(ConnectionError):
+            fetch(client, BUCKET, 'dataset.csv', self.local_path, part_size=1024, workers=1)
+        self.assertFalse(os.path.exists(self.local_path))
+        
+        client = CountingClient(self.s3)
+        result = fetch(client, BUCKET, 'dataset.csv', self.local_path, part_size=1024, workers=1)
+        self.assertGreaterEqual(result['resumed_parts'], 3)
+        self.assertEqual(client.gets, 10 - result['resumed_parts'])
+        self.assertEqual(self.read_local(), self.data)
+        self.assertEqual(hashlib.md5(self.read_local()).hexdigest(), result['etag'])
+    
+    def test_corrupt_content_is_rejected(self):
+        """Test that content not matching the ETag is discarded."""
+        self.put(self.data)
+        with self.assertRaises(ChecksumMismatch):
+            fetch(CountingClient(self.s3, corrupt=True), BUCKET, 'dataset.csv', self.local_path)
+        self.assertFalse(os.path.exists(self.local_path))
+        self.assertFalse(os.path.exists(self.local_path + '.part'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the parallel model-candidate sweep.
+"""
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+from pathlib import Path
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from dataset_cache import load_array
+from model_format import linear_coefficients
+from sweep import expand_candidates, run_sweep, build_estimator
+
+
+class TestSweep(unittest.TestCase):
+    """Test candidate expansion, parallel fitting and selection."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.values, cls.columns = load_array('data/dataset.csv')
+        cls.target = cls.columns.index('target')
+        cls.grid = [
+            {'estimator': 'linear'},
+            {'estimator': 'ridge', 'grid': {'alpha': [0.1, 1000.0]}},
+            {'estimator': 'sgd', 'scale': True, 'params': {'random_state': 0}, 'grid': {'alpha': [0.001]}},
+            {'estimator': 'linear', 'degree': 2},
+        ]
+    
+    def test_expand_candidates(self):
+        """Test that grids expand to one candidate per combination."""
+        names = [c['name'] for c in expand_candidates(self.grid)]
+        self.assertEqual(names, ['linear', 'ridge(alpha=0.1)', 'ridge(alpha=1000.0)',
+                                 'sgd(alpha=0.001)', 'linear[degree=2]'])
+    
+    def test_parallel_matches_serial(self):
+        """Test that worker count does not change results."""
+        candidates = expand_candidates(self.grid)
+        serial = run_sweep(self.values.filename, self.target, candidates, n_jobs=1)
+        parallel = run_sweep(self.values.filename, self.target, candidates, n_jobs=2)
+        self.assertEqual([r['name'] for r in serial], [r['name'] for r in parallel])
+        np.testing.assert_allclose([r['mse'] for r in serial], [r['mse'] for r in parallel])
+    
+    def test_test_mask_fixes_held_out_rows(self):
+        """Test that a saved test mask replaces the random split."""
+        is_test = np.zeros(len(self.values), dtype=bool)
+        is_test[::4] = True
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mask_path = os.path.join(tmpdir, 'is_test.npy')
+            np.save(mask_path, is_test)
+            result = run_sweep(self.values.filename, self.target, expand_candidates(self.grid[:1]), n_jobs=1,
+                               test_mask_path=mask_path)[0]
+        features = np.delete(np.asarray(self.values), self.target, axis=1)
+        target = np.asarray(self.values)[:, self.target]
+        expected = build_estimator(expand_candidates(self.grid[:1])[0]).fit(features[~is_test], target[~is_test])
+        np.testing.assert_allclose(result['model'].coef_, expected.coef_, rtol=1e-10)
+        residual = target[is_test] - expected.predict(features[is_test])
+        self.assertAlmostEqual(result['mse'], float(np.mean(residual ** 2)), places=10)
+    
+    def test_best_candidate_is_first(self):
+        """Test that results are ordered by held-out MSE."""
+        results = run_sweep(self.values.filename, self.target, expand_candidates(self.grid), n_jobs=2)
+        mses = [r['mse'] for r in results]
+        self.assertEqual(mses, sorted(mses))
+        self.assertEqual(results[-1]['name'], 'ridge(alpha=1000.0)')
+    
+    def test_scaled_pipeline_folds_to_linear_coefficients(self):
+        """Test that scaler + linear pipelines export as plain coefficients."""
+        spec = expand_candidates(self.grid)[3]
+        model = build_estimator(spec)
+        X = np.delete(np.asarray(self.values), self.target, axis=1)
+        y = self.values[:, self.target]
+        model.fit(X, y)
+        coef, intercept = linear_coefficients(model)
+        np.testing.assert_allclose(X @ coef + intercept, model.predict(X), rtol=1e-9, atol=1e-9)
+    
+    def test_polynomial_candidate_is_not_linear(self):
+        """Test that polynomial candidates are rejected by the compact export."""
+        spec = expand_candidates(self.grid)[4]
+        model = build_estimator(spec)
+        model.fit(np.random.rand(20, 5), np.random.rand(20))
+        with self.assertRaises(ValueError):
+            linear_coefficients(model)
+
+
+if __name__ == '__main__':
+    unittest.main()
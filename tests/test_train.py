@@ -3,8 +3,10 @@
 Unit tests for the training script.
 """
 import unittest
+import json
 import os
 import sys
+import tempfile
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -13,6 +15,14 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from train import load_data, prepare_data, train_model, evaluate_model, save_model
+from train import SufficientStatistics, train_model_streaming, train_incremental, load_statistics
+from train import pending_partitions, load_partitions, split_statistics
+from train import main as train_main
+from train import fold_indices, fit_fold, cross_validate
+from dataset_cache import load_array
+from model_format import save_compact_model, load_compact_model, FORMAT_VERSION
+from feature_schema import load_schema
+from feature_stats import FeatureSummary, drift_scores, load_summary
 
 
 class TestDataLoading(unittest.TestCase):
@@ -196,6 +206,349 @@ class TestShapeValidation(unittest.TestCase):
                         "Model coefficients should match feature count")
 
 
+class TestStreamingTraining(unittest.TestCase):
+    """Test the out-of-core streaming training mode."""
+    
+    def setUp(self):
+        """Fit the in-memory reference model on the full dataset."""
+        self.df = load_data('data/dataset.csv')
+        self.X, self.y = prepare_data(self.df)
+        self.reference = train_model(self.X, self.y)
+    
+    def test_streaming_matches_in_memory_fit(self):
+        """Test that streaming coefficients match LinearRegression.fit."""
+        model, train_stats, _, metrics = train_model_streaming(
+            'data/dataset.csv', chunksize=64, test_size=0.0
+        )
+        self.assertEqual(train_stats.n, len(self.df))
+        self.assertIsNone(metrics)
+        np.testing.assert_allclose(model.coef_, self.reference.coef_, rtol=1e-10, atol=1e-12)
+        self.assertAlmostEqual(model.intercept_, self.reference.intercept_, places=10)
+    
+    def test_streaming_split_independent_of_chunksize(self):
+        """Test that the train/test split does not depend on the chunk size."""
+        small = train_model_streaming('data/dataset.csv', chunksize=7)
+        large = train_model_streaming('data/dataset.csv', chunksize=10_000)
+        self.assertEqual(small[1].n, large[1].n)
+        np.testing.assert_allclose(small[0].coef_, large[0].coef_, rtol=1e-10)
+    
+    def test_streaming_metrics_match_sklearn(self):
+        """Test that metrics computed from statistics match evaluate_model."""
+        X, y = self.X.to_numpy(), self.y.to_numpy()
+        stats = SufficientStatistics(X.shape[1]).update(X, y)
+        mse, r2, _ = evaluate_model(self.reference, self.X, self.y)
+        stream_mse, stream_r2 = stats.score(self.reference.coef_, self.reference.intercept_)
+        self.assertAlmostEqual(stream_mse, mse, places=10)
+        self.assertAlmostEqual(stream_r2, r2, places=10)
+    
+    def test_streaming_model_can_predict(self):
+        """Test that the streaming model predicts like a fitted estimator."""
+        model = train_model_streaming('data/dataset.csv', chunksize=100)[0]
+        predictions = model.predict(self.X.iloc[:10])
+        self.assertEqual(len(predictions), 10)
+
+
+class TestIncrementalTraining(unittest.TestCase):
+    """Test warm-start retraining from persisted sufficient statistics."""
+    
+    def setUp(self):
+        """Split the dataset into three partition files."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        df = pd.read_csv('data/dataset.csv')
+        self.paths = []
+        for i, part in enumerate(np.array_split(np.arange(len(df)), 3)):
+            path = os.path.join(self.tmpdir.name, f'part-{i}.csv')
+            df.iloc[part].to_csv(path, index=False)
+            self.paths.append(path)
+        self.stats_path = os.path.join(self.tmpdir.name, 'model_stats.npz')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_incremental_equals_full_refit(self):
+        """Test that folding partitions over several runs equals one full pass."""
+        train_incremental(self.paths[:1], self.stats_path, chunksize=50)
+        model, train_stats, test_stats, metrics, new = train_incremental(self.paths, self.stats_path, chunksize=50)
+        self.assertEqual(new, self.paths[1:])
+        
+        full_path = os.path.join(self.tmpdir.name, 'full_stats.npz')
+        full = train_incremental(self.paths, full_path, chunksize=1000)
+        np.testing.assert_allclose(model.coef_, full[0].coef_, rtol=1e-12)
+        self.assertAlmostEqual(model.intercept_, full[0].intercept_, places=12)
+        self.assertEqual((train_stats.n, test_stats.n), (full[1].n, full[2].n))
+        np.testing.assert_allclose(metrics, full[3], rtol=1e-10)
+    
+    def test_matches_sklearn_on_training_rows(self):
+        """Test that the warm-started model equals LinearRegression on all training rows."""
+        model, train_stats, _, _, _ = train_incremental(self.paths, self.stats_path, test_size=0.0)
+        X, y = prepare_data(pd.read_csv('data/dataset.csv'))
+        reference = train_model(X, y)
+        self.assertEqual(train_stats.n, len(X))
+        np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-10)
+    
+    def test_seen_partitions_are_skipped(self):
+        """Test that a rerun without new data folds nothing."""
+        train_incremental(self.paths, self.stats_path)
+        _, train_stats, _, _, new = train_incremental(self.paths, self.stats_path)
+        self.assertEqual(new, [])
+        saved = load_statistics(self.stats_path)
+        self.assertEqual(saved[0].n, train_stats.n)
+        self.assertEqual(sorted(saved[3].values()), ['part-0.csv', 'part-1.csv', 'part-2.csv'])
+    
+    def test_changed_partition_rebuilds_statistics(self):
+        """Test that an edited partition is refolded from scratch, not added on top."""
+        summary = FeatureSummary()
+        train_incremental(self.paths, self.stats_path, summary=summary)
+        self.assertEqual(pending_partitions(self.paths, self.stats_path), [])
+        
+        df = pd.read_csv(self.paths[0])
+        df['target'] += 1.0
+        df.to_csv(self.paths[0], index=False)
+        self.assertEqual(pending_partitions(self.paths, self.stats_path), self.paths)
+        model, train_stats, _, _, new = train_incremental(self.paths, self.stats_path, summary=summary)
+        self.assertEqual(new, self.paths)
+        
+        fresh_path = os.path.join(self.tmpdir.name, 'fresh_stats.npz')
+        fresh = train_incremental(self.paths, fresh_path)
+        self.assertEqual(train_stats.n, fresh[1].n)
+        self.assertEqual(summary.n, fresh[1].n)
+        np.testing.assert_allclose(model.coef_, fresh[0].coef_, rtol=1e-12)
+        self.assertAlmostEqual(model.intercept_, fresh[0].intercept_, places=12)
+    
+    def test_full_load_uses_the_incremental_split(self):
+        """Test that load_partitions draws the same test rows as an incremental fold."""
+        values, columns, is_test, partitions = load_partitions(self.paths)
+        self.assertEqual(len(values), len(pd.read_csv('data/dataset.csv')))
+        self.assertEqual(sorted(partitions.values()), ['part-0.csv', 'part-1.csv', 'part-2.csv'])
+        train_stats, test_stats = split_statistics(values, columns.index('target'), is_test)
+        _, incremental_train, incremental_test, _, _ = train_incremental(self.paths, self.stats_path, chunksize=70)
+        self.assertEqual((train_stats.n, test_stats.n), (incremental_train.n, incremental_test.n))
+        np.testing.assert_allclose(train_stats.comoment, incremental_train.comoment, rtol=1e-10, atol=1e-8)
+        np.testing.assert_allclose(test_stats.mean, incremental_test.mean, rtol=1e-12)
+        # Statistics saved by a full run let the next run warm-start with nothing pending
+        self.assertEqual(set(load_statistics(self.stats_path)[3]), set(partitions))
+    
+    def test_raw_moments_match_direct_products(self):
+        """Test that persisted XᵀX and Xᵀy equal the direct products."""
+        X, y = prepare_data(load_data('data/dataset.csv'))
+        X, y = X.to_numpy(), y.to_numpy()
+        stats = SufficientStatistics(X.shape[1]).update(X[:500], y[:500]).update(X[500:], y[500:])
+        xtx, xty, x_sum, y_sum = stats.raw_moments()
+        np.testing.assert_allclose(xtx, X.T @ X, rtol=1e-10, atol=1e-9)
+        np.testing.assert_allclose(xty, X.T @ y, rtol=1e-10, atol=1e-9)
+        np.testing.assert_allclose(x_sum, X.sum(axis=0), atol=1e-9)
+    
+    def test_ranges_survive_merge_and_save(self):
+        """Test that tracked minima and maxima cover every row seen."""
+        _, train_stats, test_stats, _, _ = train_incremental(self.paths, self.stats_path)
+        saved_train, saved_test, _, _ = load_statistics(self.stats_path)
+        values = pd.read_csv('data/dataset.csv').to_numpy()
+        combined = saved_train.merge(saved_test)
+        np.testing.assert_array_equal(combined.minimum, values.min(axis=0))
+        np.testing.assert_array_equal(combined.maximum, values.max(axis=0))
+
+
+class TestFeatureSchema(unittest.TestCase):
+    """Test the feature schema written next to the model."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.args = ['--model-path', os.path.join(self.tmpdir.name, 'model.pkl'),
+                     '--compact-model-path', os.path.join(self.tmpdir.name, 'model.npz'),
+                     '--artifact-path', os.path.join(self.tmpdir.name, 'model.bin'),
+                     '--stats-path', os.path.join(self.tmpdir.name, 'model_stats.npz'),
+                     '--schema-path', os.path.join(self.tmpdir.name, 'feature_schema.json'),
+                     '--summary-path', os.path.join(self.tmpdir.name, 'feature_summary.json')]
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def check_schema(self):
+        schema = load_schema(os.path.join(self.tmpdir.name, 'feature_schema.json'))
+        X, _ = prepare_data(pd.read_csv('data/dataset.csv'))
+        self.assertEqual([f['name'] for f in schema['features']], list(X.columns))
+        self.assertEqual(schema['target'], 'target')
+        for feature in schema['features']:
+            self.assertEqual(feature['dtype'], 'float64')
+            self.assertLess(feature['min'], feature['observed_min'])
+            self.assertGreater(feature['max'], feature['observed_max'])
+            self.assertGreaterEqual(feature['observed_min'], X[feature['name']].min())
+            self.assertLessEqual(feature['observed_max'], X[feature['name']].max())
+        return schema
+    
+    def test_in_memory_training_writes_schema(self):
+        """Test that in-memory training saves names, dtypes and ranges."""
+        train_main(self.args)
+        self.check_schema()
+    
+    def test_streaming_training_writes_schema(self):
+        """Test that streaming training derives ranges from its statistics."""
+        train_main(self.args + ['--mode', 'streaming'])
+        self.check_schema()
+    
+    def test_training_writes_feature_summary(self):
+        """Test that every mode saves a summary of the training rows only."""
+        X, _ = prepare_data(pd.read_csv('data/dataset.csv'))
+        for mode in ('memory', 'streaming', 'incremental'):
+            train_main(self.args + ['--mode', mode])
+            summary = load_summary(os.path.join(self.tmpdir.name, 'feature_summary.json'))
+            self.assertEqual(summary.feature_names, list(X.columns))
+            self.assertGreater(summary.n, 0.7 * len(X))
+            self.assertLess(summary.n, 0.9 * len(X))
+            self.assertTrue(np.all(summary.minimum >= X.min().to_numpy()))
+            self.assertTrue(np.all(summary.maximum <= X.max().to_numpy()))
+        # A rerun of incremental training with no new partitions keeps the summary
+        train_main(self.args + ['--mode', 'incremental'])
+        self.assertEqual(load_summary(os.path.join(self.tmpdir.name, 'feature_summary.json')).n, summary.n)
+
+
+class TestFeatureSummary(unittest.TestCase):
+    """Test streaming feature moments and mergeable quantile sketches."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = np.column_stack([rng.normal(3.0, 2.0, 50_000), rng.exponential(1.0, 50_000),
+                                  rng.integers(0, 5, 50_000)])
+    
+    def test_moments_match_numpy(self):
+        """Test that batch-merged mean and variance equal one-shot figures."""
+        summary = FeatureSummary()
+        for batch in np.array_split(self.X, 37):
+            summary.update(batch)
+        self.assertEqual(summary.n, len(self.X))
+        np.testing.assert_allclose(summary.mean, self.X.mean(axis=0), rtol=1e-10)
+        np.testing.assert_allclose(summary.variance, self.X.var(axis=0, ddof=1), rtol=1e-10)
+        np.testing.assert_array_equal(summary.minimum, self.X.min(axis=0))
+        np.testing.assert_array_equal(summary.maximum, self.X.max(axis=0))
+    
+    def test_sketch_quantiles_are_close(self):
+        """Test that quantiles after many merges stay within a small rank error."""
+        summary = FeatureSummary()
+        for batch in np.array_split(self.X[:, :2], 200):
+            summary.update(batch)
+        probs = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+        estimates = summary.quantiles(probs)
+        for i in range(2):
+            ranks = np.searchsorted(np.sort(self.X[:, i]), estimates[i]) / len(self.X)
+            np.testing.assert_allclose(ranks, probs, atol=0.01)
+    
+    def test_merge_is_order_independent(self):
+        """Test that summaries of disjoint parts merge like any other order."""
+        parts = [FeatureSummary().update(part) for part in np.array_split(self.X, 4)]
+        left = parts[0].copy().merge(parts[1]).merge(parts[2].copy().merge(parts[3]))
+        right = parts[3].copy().merge(parts[2]).merge(parts[1]).merge(parts[0])
+        np.testing.assert_allclose(left.mean, right.mean, rtol=1e-12)
+        np.testing.assert_allclose(left.variance, right.variance, rtol=1e-10)
+        np.testing.assert_allclose(left.quantiles([0.1, 0.5, 0.9]), right.quantiles([0.1, 0.5, 0.9]),
+                                   atol=0.02 * self.X.std(axis=0).max())
+        restored = FeatureSummary.from_dict(json.loads(json.dumps(left.to_dict())))
+        np.testing.assert_array_equal(restored.sketch, left.sketch)
+        self.assertEqual(restored.n, left.n)
+    
+    def test_drift_scores(self):
+        """Test that scores are near zero for fresh samples and flag a shifted feature."""
+        reference = FeatureSummary(['a', 'b', 'c']).update(self.X)
+        rng = np.random.default_rng(1)
+        live = np.column_stack([rng.normal(3.0, 2.0, 5000), rng.exponential(1.0, 5000), rng.integers(0, 5, 5000)])
+        scores = drift_scores(reference, FeatureSummary().update(live))
+        self.assertEqual(list(scores), ['a', 'b', 'c'])
+        for name in 'ab':
+            self.assertLess(scores[name]['psi'], 0.02)
+            self.assertLess(scores[name]['mean_shift'], 0.1)
+        live[:, 1] += 1.0
+        scores = drift_scores(reference, FeatureSummary().update(live))
+        self.assertGreater(scores['b']['psi'], 0.25)
+        self.assertAlmostEqual(scores['b']['mean_shift'], 1.0, delta=0.1)
+        self.assertLess(scores['a']['psi'], 0.02)
+
+
+class TestCompactModel(unittest.TestCase):
+    """Test the sklearn-free compact model artifact."""
+    
+    def setUp(self):
+        """Train a model and export it to a scratch directory."""
+        df = load_data('data/dataset.csv')
+        self.X, self.y = prepare_data(df)
+        self.model = train_model(self.X, self.y)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'model.npz')
+        save_compact_model(self.model, self.path)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_compact_model_round_trip(self):
+        """Test that coefficients, names and version survive a round trip."""
+        artifact = load_compact_model(self.path)
+        np.testing.assert_array_equal(artifact['coef'], self.model.coef_)
+        self.assertEqual(artifact['intercept'], self.model.intercept_)
+        self.assertEqual(artifact['feature_names'], list(self.X.columns))
+        self.assertEqual(artifact['format_version'], FORMAT_VERSION)
+        self.assertEqual(artifact['dtype'], np.float64)
+    
+    def test_compact_model_predictions_match(self):
+        """Test that a dot product with the artifact reproduces model.predict."""
+        artifact = load_compact_model(self.path)
+        X = self.X.to_numpy()
+        np.testing.assert_allclose(X @ artifact['coef'] + artifact['intercept'],
+                                   self.model.predict(self.X))
+
+
+class TestCrossValidation(unittest.TestCase):
+    """Test parallel k-fold cross-validation on the memory-mapped cache."""
+    
+    @classmethod
+    def setUpClass(cls):
+        values, columns = load_array('data/dataset.csv')
+        cls.array_path = values.filename
+        cls.n_rows = values.shape[0]
+        cls.target = columns.index('target')
+    
+    def test_folds_partition_the_rows(self):
+        """Test that each repeat's test folds cover every row exactly once."""
+        for repeat in range(2):
+            tests = [fold_indices(self.n_rows, 4, repeat, fold)[1] for fold in range(4)]
+            np.testing.assert_array_equal(np.sort(np.concatenate(tests)), np.arange(self.n_rows))
+            train_idx, test_idx = fold_indices(self.n_rows, 4, repeat, 0)
+            self.assertEqual(len(np.intersect1d(train_idx, test_idx)), 0)
+            self.assertEqual(train_idx.size + test_idx.size, self.n_rows)
+        self.assertFalse(np.array_equal(fold_indices(self.n_rows, 4, 0, 0)[1], fold_indices(self.n_rows, 4, 1, 0)[1]))
+    
+    def test_fold_matches_direct_fit(self):
+        """Test that a fold's score equals fitting sklearn on the same rows."""
+        df = pd.read_csv('data/dataset.csv')
+        X, y = prepare_data(df)
+        train_idx, test_idx = fold_indices(self.n_rows, 5, 0, 2)
+        model = train_model(X.iloc[train_idx], y.iloc[train_idx])
+        mse, r2, _ = evaluate_model(model, X.iloc[test_idx], y.iloc[test_idx])
+        result = fit_fold(self.array_path, self.target, 5, 0, 2)
+        self.assertAlmostEqual(result['mse'], mse, places=10)
+        self.assertAlmostEqual(result['r2'], r2, places=10)
+    
+    def test_parallel_matches_serial(self):
+        """Test that worker count does not change per-fold or aggregate metrics."""
+        serial = cross_validate(self.array_path, self.target, n_splits=5, n_repeats=2, n_jobs=1)
+        parallel = cross_validate(self.array_path, self.target, n_splits=5, n_repeats=2, n_jobs=2)
+        self.assertEqual(len(parallel['folds']), 10)
+        np.testing.assert_allclose([f['mse'] for f in serial['folds']], [f['mse'] for f in parallel['folds']])
+        self.assertAlmostEqual(serial['aggregate']['r2']['mean'], parallel['aggregate']['r2']['mean'])
+    
+    def test_main_writes_cv_metrics(self):
+        """Test that --cv-folds saves per-fold and aggregate metrics."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cv_path = os.path.join(tmpdir, 'cv_metrics.json')
+            train_main(['--model-path', os.path.join(tmpdir, 'model.pkl'),
+                        '--compact-model-path', os.path.join(tmpdir, 'model.npz'),
+                        '--artifact-path', os.path.join(tmpdir, 'model.bin'),
+                        '--schema-path', os.path.join(tmpdir, 'feature_schema.json'),
+                        '--summary-path', os.path.join(tmpdir, 'feature_summary.json'),
+                        '--cv-folds', '3', '--n-jobs', '2', '--cv-path', cv_path])
+            with open(cv_path) as f:
+                results = json.load(f)
+        self.assertEqual([f['fold'] for f in results['folds']], [0, 1, 2])
+        self.assertGreater(results['aggregate']['r2']['mean'], 0.9)
+
+
 if __name__ == '__main__':
     unittest.main()
 